@@ -21,8 +21,9 @@ class HighlightAdmin(admin.ModelAdmin):
     list_display = ['author', 'caption_preview', 'hashtags_display', 'appreciations_count', 'comments_count', 'views_count', 'created_at', 'expires_at', 'is_active']
     list_filter = ['is_active', 'created_at', 'expires_at']
     search_fields = ['author__username', 'caption', 'hashtags']
-    readonly_fields = ['created_at', 'expires_at', 'views_count']
+    readonly_fields = ['created_at', 'expires_at'] + Highlight.COUNTER_FIELDS
     list_editable = ['is_active']
+    list_select_related = ['author']
     
     def caption_preview(self, obj):
         return obj.caption[:50] + '...' if len(obj.caption) > 50 else obj.caption
@@ -31,18 +32,6 @@ class HighlightAdmin(admin.ModelAdmin):
     def hashtags_display(self, obj):
         return ', '.join([f'#{tag}' for tag in obj.hashtags]) if obj.hashtags else 'Aucun'
     hashtags_display.short_description = 'Hashtags'
-    
-    def appreciations_count(self, obj):
-        return obj.appreciations.count()
-    appreciations_count.short_description = 'Appréciations'
-    
-    def comments_count(self, obj):
-        return obj.comments.count()
-    comments_count.short_description = 'Commentaires'
-    
-    def views_count(self, obj):
-        return obj.views.count()
-    views_count.short_description = 'Vues'
 
 @admin.register(HighlightAppreciation)
 class HighlightAppreciationAdmin(admin.ModelAdmin):
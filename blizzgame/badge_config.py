@@ -3,6 +3,8 @@ Configuration des badges pour le système de réputation BLIZZ
 Focus uniquement sur les vendeurs - Badges visuels personnalisés
 """
 
+import bisect
+
 # Définir les badges vendeurs uniquement (insignes IA sans texte pour compatibilité internationale)
 SELLER_BADGES = [
     {
@@ -72,20 +74,19 @@ BADGE_TRANSLATIONS = {
     }
 }
 
+# Seuils et facteurs dans l'ordre de SELLER_BADGES (min_score croissant), pour bisect
+SELLER_BADGE_THRESHOLDS = [badge['min_score'] for badge in SELLER_BADGES]
+SELLER_BADGE_FACTORS = [badge.get('factor', 1.0) for badge in SELLER_BADGES]
+
+def get_seller_badge_index(score):
+    """Indice dans SELLER_BADGES du badge le plus élevé atteint par le score (recherche dichotomique)"""
+    if score is None or score < 0:
+        return 0  # Bronze par défaut
+    return max(bisect.bisect_right(SELLER_BADGE_THRESHOLDS, score) - 1, 0)
+
 def get_seller_badge(score):
     """Retourne le badge approprié selon le score vendeur"""
-    if score is None or score < 0:
-        return SELLER_BADGES[0]  # Bronze par défaut
-    
-    # Trouver le badge le plus élevé correspondant au score
-    appropriate_badge = SELLER_BADGES[0]
-    for badge in SELLER_BADGES:
-        if score >= badge['min_score']:
-            appropriate_badge = badge
-        else:
-            break
-    
-    return appropriate_badge
+    return SELLER_BADGES[get_seller_badge_index(score)]
 
 def get_badge_by_level(level):
     """Retourne un badge par son niveau"""
@@ -0,0 +1,221 @@
+"""
+Cycle de vie du séquestre (commande process_escrow)
+
+Quand l'acheteur confirme la réception (confirm_reception), la transaction
+passe à « terminée » et sa période de sécurité commence :
+security_period_end = maintenant + ESCROW_SECURITY_PERIOD_HOURS. Un litige
+ouvert pendant cette période change le statut et bloque la libération.
+
+Le planificateur procède en trois étapes, par lots :
+
+1. Libération : les séquestres « en séquestre » dont la transaction est
+   terminée et la période de sécurité échue sont trouvés par une requête
+   sur l'index Transaction(status, security_period_end). Chaque lot est
+   verrouillé, passé à « libéré » (séquestre et transaction CinetPay) et
+   reçoit sa PayoutRequest « en attente » dans la même transaction, ainsi
+   que l'évaluation « réussie » du vendeur et de l'acheteur (réputation).
+2. Paiements : les PayoutRequest en attente (index (status, created_at))
+   sont réservées par lot (« en cours », processing_started_at) dans une
+   transaction courte, puis envoyées une à une au client de paiement hors
+   transaction. Le résultat de chaque virement (« terminé » avec son
+   identifiant, ou « échoué ») est enregistré dès le retour de l'API : un
+   arrêt en cours de lot ne perd que la demande en vol.
+3. Reprise : une demande restée « en cours » plus de
+   ESCROW_PAYOUT_TIMEOUT_MINUTES (processus arrêté pendant l'appel), ou
+   réservée avant l'ajout de processing_started_at, est signalée dans les
+   logs et renvoyée. L'identifiant de la demande sert de
+   clé d'idempotence : l'API ne réexécute pas un virement déjà effectué et
+   renvoie son identifiant.
+
+Plusieurs processus peuvent tourner en même temps : les lots sont lus avec
+select_for_update(skip_locked=True), si bien qu'un autre processus passe
+aux lignes suivantes. SQLite ignore ce verrou de ligne, mais les
+transactions y démarrent en mode IMMEDIATE (settings) : la lecture du lot
+et son changement de statut sont sérialisés entre processus et une ligne
+n'est jamais traitée deux fois.
+
+ESCROW_PAYOUT_BACKEND désigne la classe du client de paiement (chemin
+pointé, méthode transfer(payout, idempotency_key) -> identifiant du
+virement, exception en cas de refus). Par défaut, LocalPayoutClient simule
+l'API de transfert CinetPay sans appel réseau.
+"""
+
+import datetime
+import logging
+import time
+import uuid
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import CinetPayTransaction, EscrowTransaction, PayoutRequest
+from .reputation_utils import record_escrow_release
+
+logger = logging.getLogger(__name__)
+
+def _security_period():
+    return datetime.timedelta(hours=getattr(settings, 'ESCROW_SECURITY_PERIOD_HOURS', 72))
+
+def _payout_timeout():
+    return datetime.timedelta(minutes=getattr(settings, 'ESCROW_PAYOUT_TIMEOUT_MINUTES', 15))
+
+class LocalPayoutClient:
+    """
+    Client de paiement local (développement, tests) : chaque virement
+    réussit, et une même clé d'idempotence donne toujours le même identifiant
+    """
+
+    def transfer(self, payout, idempotency_key):
+        return f"LOCAL_{uuid.UUID(str(idempotency_key)).hex[:16]}"
+
+def get_payout_client():
+    backend = getattr(settings, 'ESCROW_PAYOUT_BACKEND', None)
+    if backend:
+        return import_string(backend)()
+    return LocalPayoutClient()
+
+def start_security_period(tx, now=None):
+    """Marque la transaction terminée et ouvre sa période de sécurité (sans sauvegarder)"""
+    now = now or timezone.now()
+    tx.status = 'completed'
+    tx.completed_at = now
+    tx.security_period_end = now + _security_period()
+
+def due_escrows(now=None):
+    """Séquestres libérables : transaction terminée, période de sécurité échue"""
+    return EscrowTransaction.objects.filter(
+        status='in_escrow',
+        cinetpay_transaction__transaction__status='completed',
+        cinetpay_transaction__transaction__security_period_end__lte=now or timezone.now(),
+    )
+
+def release_escrow_batch(batch_size, now=None):
+    """
+    Libère au plus `batch_size` séquestres échus et crée leurs demandes de
+    paiement, en une transaction. Retourne le nombre de séquestres libérés.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        escrows = list(
+            due_escrows(now).select_related(
+                'cinetpay_transaction__transaction__seller', 'cinetpay_transaction__transaction__buyer'
+            ).select_for_update(
+                skip_locked=True, of=('self',)
+            ).order_by('cinetpay_transaction__transaction__security_period_end')[:batch_size]
+        )
+        if not escrows:
+            return 0
+        EscrowTransaction.objects.filter(id__in=[escrow.id for escrow in escrows]).update(
+            status='released', released_at=now
+        )
+        CinetPayTransaction.objects.filter(
+            id__in=[escrow.cinetpay_transaction_id for escrow in escrows]
+        ).update(status='escrow_released', escrow_released_at=now)
+        PayoutRequest.objects.bulk_create([
+            PayoutRequest(
+                escrow_transaction=escrow,
+                amount=escrow.cinetpay_transaction.seller_amount,
+                currency=escrow.currency,
+                recipient_phone=escrow.cinetpay_transaction.seller_phone_number,
+                recipient_country=escrow.cinetpay_transaction.seller_country,
+                recipient_operator=escrow.cinetpay_transaction.seller_operator,
+            )
+            for escrow in escrows
+        ])
+        for escrow in escrows:
+            record_escrow_release(escrow.cinetpay_transaction.transaction)
+    return len(escrows)
+
+def _send_payouts(payouts, client):
+    """Envoie les demandes réservées et enregistre chaque résultat aussitôt ; retourne (terminées, échouées)"""
+    completed = failed = 0
+    for payout in payouts:
+        try:
+            payout_id = client.transfer(payout, idempotency_key=str(payout.id))
+        except Exception as e:
+            logger.error(f"Échec du paiement {payout.id}: {e}")
+            PayoutRequest.objects.filter(pk=payout.pk, status='processing').update(status='failed')
+            failed += 1
+            continue
+        PayoutRequest.objects.filter(pk=payout.pk, status='processing').update(
+            status='completed', cinetpay_payout_id=payout_id, completed_at=timezone.now()
+        )
+        completed += 1
+    return completed, failed
+
+def _claim_payouts(payouts, now):
+    """Réserve les demandes verrouillées (appelé dans la transaction de lecture)"""
+    PayoutRequest.objects.filter(id__in=[payout.id for payout in payouts]).update(
+        status='processing', processing_started_at=now
+    )
+    return payouts
+
+def process_payout_batch(batch_size, client=None):
+    """
+    Réserve au plus `batch_size` demandes en attente puis les envoie au
+    client de paiement. Retourne (terminées, échouées).
+    """
+    client = client or get_payout_client()
+    with transaction.atomic():
+        payouts = _claim_payouts(list(
+            PayoutRequest.objects.filter(status='pending').select_for_update(skip_locked=True).order_by('created_at')[:batch_size]
+        ), timezone.now())
+
+    # Appels à l'API hors transaction : les demandes réservées restent « en cours » jusqu'à leur résultat
+    return _send_payouts(payouts, client)
+
+def recover_stuck_payouts(batch_size, client=None):
+    """
+    Renvoie (même clé d'idempotence) au plus `batch_size` demandes restées
+    « en cours » au-delà du délai. Retourne (reprises, terminées, échouées).
+    """
+    client = client or get_payout_client()
+    now = timezone.now()
+    with transaction.atomic():
+        payouts = _claim_payouts(list(
+            PayoutRequest.objects.filter(
+                Q(processing_started_at__lt=now - _payout_timeout()) | Q(processing_started_at__isnull=True),
+                status='processing',
+            ).select_for_update(skip_locked=True).order_by('processing_started_at')[:batch_size]
+        ), now)
+    for payout in payouts:
+        logger.warning(
+            f"Paiement {payout.id} bloqué « en cours » depuis {payout.processing_started_at}, nouvel envoi"
+        )
+    completed, failed = _send_payouts(payouts, client)
+    return len(payouts), completed, failed
+
+def run_escrow_cycle(batch_size=100, client=None):
+    """
+    Un passage complet : libère tous les séquestres échus puis traite toutes
+    les demandes en attente, lot par lot. Retourne les compteurs du passage.
+    """
+    started = time.monotonic()
+    stats = {'released': 0, 'payouts_recovered': 0, 'payouts_completed': 0, 'payouts_failed': 0}
+
+    while True:
+        released = release_escrow_batch(batch_size)
+        stats['released'] += released
+        if released < batch_size:
+            break
+
+    client = client or get_payout_client()
+    while True:
+        recovered, completed, failed = recover_stuck_payouts(batch_size, client)
+        stats['payouts_recovered'] += recovered
+        stats['payouts_completed'] += completed
+        stats['payouts_failed'] += failed
+        if recovered < batch_size:
+            break
+
+    while True:
+        completed, failed = process_payout_batch(batch_size, client)
+        stats['payouts_completed'] += completed
+        stats['payouts_failed'] += failed
+        if completed + failed < batch_size:
+            break
+
+    stats['elapsed'] = time.monotonic() - started
+    return stats
@@ -0,0 +1,115 @@
+"""
+Boîte de réception matérialisée (table InboxEntry)
+
+Une ligne par (utilisateur, conversation privée) et par (utilisateur,
+groupe) contient tout ce qu'affichent chat_home et group_list : aperçu et
+date du dernier message, nombre de non lus, nombre de membres. Les listes
+se lisent donc en une requête sur l'index (user, kind, -last_message_at).
+
+Les lignes sont maintenues par les chemins d'écriture :
+- envoi d'un message : aperçu/date pour tous les participants et +1 non lu
+  pour les autres (deux UPDATE, quel que soit le nombre de membres) ;
+- ouverture d'une conversation ou d'un groupe : filigrane de lecture
+  avancé et non lus remis à zéro (un UPDATE) ;
+- création d'une conversation ou d'un groupe : création des lignes.
+
+L'état de lecture n'est plus stocké message par message : last_read_at est
+un filigrane par (utilisateur, conversation/groupe). Un message est lu par
+un participant si sa date est antérieure ou égale au filigrane de celui-ci,
+et les non lus se recalculent par un comptage sur l'intervalle
+]last_read_at, maintenant] de l'index (conversation|group, created_at).
+
+La commande rebuild_inbox reconstruit la table depuis les messages.
+"""
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import GroupMembership, InboxEntry
+
+PREVIEW_LENGTH = 100
+
+def message_preview(content):
+    content = ' '.join((content or '').split())
+    if len(content) <= PREVIEW_LENGTH:
+        return content
+    return content[:PREVIEW_LENGTH - 1] + '…'
+
+def ensure_private_entries(conversation):
+    """Crée (si besoin) les lignes des deux participants d'une conversation privée"""
+    InboxEntry.objects.bulk_create([
+        InboxEntry(
+            user_id=user_id, other_user_id=other_id, kind='private',
+            conversation=conversation, last_message_at=conversation.last_message_at or timezone.now()
+        )
+        for user_id, other_id in [
+            (conversation.user1_id, conversation.user2_id),
+            (conversation.user2_id, conversation.user1_id),
+        ]
+    ], ignore_conflicts=True)
+
+def ensure_group_entries(group):
+    """Crée les lignes manquantes des membres actifs d'un groupe et met à jour admin/nombre de membres"""
+    memberships = list(
+        GroupMembership.objects.filter(group=group, is_active=True).values_list('user_id', 'is_admin')
+    )
+    now = timezone.now()
+    InboxEntry.objects.bulk_create([
+        InboxEntry(
+            user_id=user_id, kind='group', group=group, is_admin=is_admin,
+            # L'historique antérieur à l'arrivée dans le groupe n'est pas compté comme non lu
+            last_message_at=group.last_message_at or now, last_read_at=now
+        )
+        for user_id, is_admin in memberships
+    ], ignore_conflicts=True)
+    InboxEntry.objects.filter(group=group).exclude(user_id__in=[user_id for user_id, _ in memberships]).delete()
+    InboxEntry.objects.filter(group=group).update(member_count=len(memberships))
+
+def record_message(message, conversation=None, group=None):
+    """Met à jour les lignes de la conversation (ou du groupe) après l'envoi de `message`"""
+    entries = InboxEntry.objects.filter(conversation=conversation) if conversation else InboxEntry.objects.filter(group=group)
+    summary = {
+        'last_message_preview': message_preview(message.content),
+        'last_message_sender_name': message.sender.username,
+        'last_message_at': message.created_at,
+    }
+    updated = entries.update(**summary)
+    # Conversation ou groupe antérieur à la table : créer les lignes puis réappliquer
+    if conversation is not None and updated < 2:
+        ensure_private_entries(conversation)
+        entries.update(**summary)
+    elif group is not None and updated == 0:
+        ensure_group_entries(group)
+        entries.update(**summary)
+    entries.exclude(user_id=message.sender_id).update(unread_count=F('unread_count') + 1)
+
+def mark_read(user, conversation=None, group=None):
+    """Avance le filigrane de lecture de l'utilisateur et remet ses non lus à zéro (un UPDATE)"""
+    entries = InboxEntry.objects.filter(user=user)
+    if conversation:
+        entries = entries.filter(conversation=conversation)
+    else:
+        entries = entries.filter(group=group)
+    entries.update(last_read_at=timezone.now(), unread_count=0)
+
+def read_watermarks(conversation):
+    """
+    Filigranes de lecture d'une conversation privée, indexés par expéditeur :
+    {sender_id: date jusqu'à laquelle l'autre participant a lu ses messages}
+    """
+    readers = dict(
+        InboxEntry.objects.filter(conversation=conversation).values_list('user_id', 'last_read_at')
+    )
+    return {
+        conversation.user1_id: readers.get(conversation.user2_id),
+        conversation.user2_id: readers.get(conversation.user1_id),
+    }
+
+def get_inbox(user, kind, limit=None):
+    """Lignes de la boîte de réception d'un utilisateur, plus récentes d'abord (une requête)"""
+    entries = InboxEntry.objects.filter(user=user, kind=kind).order_by('-last_message_at')
+    if kind == 'private':
+        entries = entries.filter(conversation__is_active=True).select_related('other_user', 'other_user__profile')
+    else:
+        entries = entries.filter(group__is_active=True).select_related('group')
+    return list(entries[:limit] if limit else entries)
@@ -0,0 +1,72 @@
+"""
+Classement des vendeurs (page /sellers/top/ et API /api/sellers/top/)
+
+La commande refresh_seller_leaderboard (à lancer périodiquement) lit les
+compteurs vendeur de toutes les lignes UserReputation en une requête,
+calcule en une passe le score ajusté au volume et le badge de chaque
+vendeur (compute_seller_score : recherche dichotomique dans les seuils
+triés de badge_config, sans parcours de SELLER_BADGES), trie, puis
+remplace la table SellerRank en une transaction.
+
+Les pages lisent SellerRank dans l'ordre de l'index unique sur `rank`,
+paginées par curseur keyset.
+"""
+
+from django.db import transaction
+
+from .models import SellerRank, UserReputation
+from .pagination_utils import keyset_paginate
+from .reputation_utils import compute_seller_score
+
+def score_sellers(rows):
+    """
+    rows : itérable de (user_id, réussies, total). Retourne la liste triée
+    des (score, badge, user_id, réussies, total) des vendeurs ayant au
+    moins une transaction, du meilleur au moins bon.
+    """
+    scored = []
+    for user_id, successful, total in rows:
+        if total > 0:
+            score, badge_level = compute_seller_score(successful, total)
+            scored.append((score, badge_level, user_id, successful, total))
+    # Score décroissant, puis volume décroissant, puis ancienneté du compte
+    scored.sort(key=lambda row: (-row[0], -row[4], row[2]))
+    return scored
+
+def refresh_leaderboard(batch_size=1000):
+    """Recalcule SellerRank pour tous les vendeurs ; retourne le nombre de vendeurs classés"""
+    scored = score_sellers(
+        UserReputation.objects.filter(seller_total_transactions__gt=0).values_list(
+            'user_id', 'seller_successful_transactions', 'seller_total_transactions'
+        ).iterator()
+    )
+    ranks = [
+        SellerRank(
+            user_id=user_id, rank=rank, score=score, badge_level=badge_level,
+            total_transactions=total, successful_transactions=successful
+        )
+        for rank, (score, badge_level, user_id, successful, total) in enumerate(scored, start=1)
+    ]
+    with transaction.atomic():
+        SellerRank.objects.all().delete()
+        SellerRank.objects.bulk_create(ranks, batch_size=batch_size)
+    return len(ranks)
+
+def get_leaderboard_page(limit, cursor=None):
+    """Page du classement (dict keyset_paginate), vendeurs et profils chargés"""
+    ranks = SellerRank.objects.select_related('user__profile')
+    return keyset_paginate(ranks, limit, before=cursor, ordering=('rank',), ascending=True)
+
+def seller_rank_data(seller_rank):
+    """Sérialisation JSON d'une entrée du classement"""
+    profile = getattr(seller_rank.user, 'profile', None)
+    badge = seller_rank.badge
+    return {
+        'rank': seller_rank.rank,
+        'username': seller_rank.user.username,
+        'avatar': profile.profileimg.url if profile and profile.profileimg else None,
+        'score': round(seller_rank.score, 1),
+        'badge': {'level': badge['level'], 'name': badge['name'], 'icon': badge['icon']},
+        'total_transactions': seller_rank.total_transactions,
+        'successful_transactions': seller_rank.successful_transactions,
+    }
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from blizzgame.models import Hashtag, Highlight, HighlightHashtag
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = "Remplit l'index Hashtag/HighlightHashtag à partir du champ hashtags des Highlights existants"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Nombre de lignes insérées par requête',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        highlight_tags = {}
+        for highlight_id, hashtags in Highlight.objects.values_list('id', 'hashtags').iterator():
+            names = {tag.lower()[:100] for tag in (hashtags or [])}
+            if names:
+                highlight_tags[highlight_id] = names
+
+        all_names = set().union(*highlight_tags.values()) if highlight_tags else set()
+
+        with transaction.atomic():
+            Hashtag.objects.bulk_create(
+                [Hashtag(name=name) for name in all_names],
+                ignore_conflicts=True,
+                batch_size=batch_size
+            )
+            hashtag_ids = dict(Hashtag.objects.values_list('name', 'id'))
+            links = [
+                HighlightHashtag(highlight_id=highlight_id, hashtag_id=hashtag_ids[name])
+                for highlight_id, names in highlight_tags.items()
+                for name in names
+            ]
+            HighlightHashtag.objects.bulk_create(links, ignore_conflicts=True, batch_size=batch_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Index des hashtags rempli: {len(all_names)} hashtags, '
+                f'{len(links)} liens pour {len(highlight_tags)} Highlights'
+            )
+        )
+        logger.info(f"Backfill de l'index des hashtags: {len(links)} liens")
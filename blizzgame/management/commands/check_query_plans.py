@@ -0,0 +1,154 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from blizzgame.inbox_utils import ensure_group_entries, ensure_private_entries
+from blizzgame.escrow_utils import due_escrows
+from blizzgame.models import (
+    FriendRecommendation, Hashtag, Highlight, HighlightAppreciation, HighlightHashtag, InboxEntry, Notification, Order, PayoutRequest, Post, PrivateConversation,
+    PrivateMessage, Group, GroupMembership, GroupMessage, SellerRank, Transaction, UserSubscription
+)
+import re
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = (
+        "Exécute EXPLAIN sur les requêtes des vues les plus sollicitées (base peuplée "
+        "dans une transaction annulée) et échoue si l'une d'elles parcourt une table entière"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Affiche le plan complet de chaque requête',
+        )
+
+    def handle(self, *args, **options):
+        failures = []
+        try:
+            with transaction.atomic():
+                data = self.seed()
+                for name, queryset in self.hot_queries(data):
+                    plan = queryset.explain()
+                    scans = self.full_scans(plan)
+                    if options['verbose_plans']:
+                        self.stdout.write(f'--- {name}\n{plan}')
+                    if scans:
+                        failures.append((name, scans))
+                        self.stdout.write(self.style.ERROR(f'❌ {name}: {", ".join(scans)}'))
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f'✅ {name}'))
+                raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f'{len(failures)} requête(s) sans index adapté')
+        self.stdout.write(self.style.SUCCESS('Toutes les requêtes utilisent un index'))
+
+    def full_scans(self, plan):
+        """Retourne les lignes du plan correspondant à un parcours complet de table"""
+        if connection.vendor == 'postgresql':
+            return [line.strip() for line in plan.splitlines() if 'Seq Scan' in line]
+        # SQLite : "SCAN <table>" (ou "SCAN TABLE <table>" avant 3.36) sans index
+        # (les "SEARCH ... USING INDEX" sont corrects)
+        scans = []
+        for line in plan.splitlines():
+            match = re.search(r'\bSCAN (?:TABLE )?(\w+)(.*)', line)
+            if match and match.group(1).startswith('blizzgame_') and 'USING' not in match.group(2):
+                scans.append(f'SCAN {match.group(1)}')
+        return scans
+
+    def seed(self):
+        """Crée un jeu de données minimal couvrant chaque table interrogée"""
+        now = timezone.now()
+        alice = User.objects.create_user(username='__plan_alice')
+        bob = User.objects.create_user(username='__plan_bob')
+        UserSubscription.objects.create(subscriber=alice, subscribed_to=bob)
+        highlights = [
+            Highlight.objects.create(
+                author=author, video='highlights_videos/plan.mp4',
+                hashtags=['plan'], expires_at=now + timezone.timedelta(hours=48)
+            )
+            for author in (alice, bob)
+        ]
+        for highlight in highlights:
+            highlight.sync_hashtag_index()
+        HighlightAppreciation.objects.create(highlight=highlights[1], user=alice, appreciation_level=5)
+        conversation = PrivateConversation.objects.create(user1=alice, user2=bob)
+        PrivateMessage.objects.create(conversation=conversation, sender=bob, content='plan')
+        group = Group.objects.create(name='__plan', created_by=alice)
+        GroupMembership.objects.create(user=alice, group=group, is_admin=True)
+        GroupMessage.objects.create(group=group, sender=alice, content='plan')
+        ensure_private_entries(conversation)
+        ensure_group_entries(group)
+        Notification.objects.create(user=alice, type='system', title='plan', content='plan')
+        post = Post.objects.create(user=bob.username, author=bob, title='plan', price=10)
+        Transaction.objects.create(buyer=alice, seller=bob, post=post, amount=10)
+        Order.objects.create(user=alice, subtotal=10, total_amount=10)
+        return {
+            'now': now,
+            'alice': alice,
+            'bob': bob,
+            'highlights': highlights,
+            'conversation': conversation,
+            'group': group,
+        }
+
+    def hot_queries(self, data):
+        """Requêtes reproduisant les filtres et tris des vues de views.py"""
+        now, alice, bob = data['now'], data['alice'], data['bob']
+        active = Highlight.objects.filter(is_active=True, expires_at__gt=now)
+        return [
+            ('highlights_feed_api (chronologique)',
+             active.order_by('-created_at', '-id')[:11]),
+            ('highlights_feed_api (abonnements)',
+             active.filter(author__in=[bob.id]).order_by('-created_at', '-id')[:11]),
+            ('highlights_hashtag',
+             active.filter(hashtag_links__hashtag__name='plan').order_by('-created_at')[:20]),
+            ('highlights_feed_api (appréciations de la page)',
+             HighlightAppreciation.objects.filter(user=alice, highlight__in=[h.id for h in data['highlights']])),
+            ('get_private_messages',
+             PrivateMessage.objects.filter(conversation=data['conversation']).order_by('-created_at', '-id')[:21]),
+            ('rebuild_inbox (non lus après le filigrane)',
+             PrivateMessage.objects.filter(conversation=data['conversation'], created_at__gt=now).exclude(sender=alice)),
+            ('chat_home (boîte de réception)',
+             InboxEntry.objects.filter(user=alice, kind='private', conversation__is_active=True).order_by('-last_message_at')[:10]),
+            ('get_group_messages',
+             GroupMessage.objects.filter(group=data['group']).order_by('-created_at', '-id')[:21]),
+            ('group_list (boîte de réception)',
+             InboxEntry.objects.filter(user=alice, kind='group', group__is_active=True).order_by('-last_message_at')),
+            ('user_search (recommandations)',
+             FriendRecommendation.objects.filter(user=alice).order_by('-score')[:10]),
+            ('notifications',
+             Notification.objects.filter(user=alice).order_by('-created_at', '-id')[:21]),
+            ('notifications (non lues)',
+             Notification.objects.filter(user=alice, is_read=False)),
+            ('transaction_list',
+             Transaction.objects.filter(Q(buyer=alice) | Q(seller=alice)).order_by('-created_at')),
+            ('index (boutique, plus récentes)',
+             Post.objects.order_by('-created_at', '-id')[:21]),
+            ('index (boutique, jeu et prix croissant)',
+             Post.objects.filter(game_type='FreeFire', price__gt=5).order_by('price', 'id')[:21]),
+            ('index (boutique, facettes par jeu)',
+             Post.objects.order_by().values('game_type').annotate(total=Count('id'))),
+            ('profile (annonces)',
+             Post.objects.filter(author=bob).order_by('-created_at')),
+            ('top_sellers (page suivante)',
+             SellerRank.objects.filter(rank__gt=25).order_by('rank')[:26]),
+            ('process_escrow (séquestres échus)',
+             due_escrows(now).order_by('cinetpay_transaction__transaction__security_period_end')[:100]),
+            ('process_escrow (paiements en attente)',
+             PayoutRequest.objects.filter(status='pending').order_by('created_at')[:100]),
+            ('process_escrow (paiements bloqués)',
+             PayoutRequest.objects.filter(
+                 Q(processing_started_at__lt=now - timezone.timedelta(minutes=15)) | Q(processing_started_at__isnull=True),
+                 status='processing',
+             ).order_by('processing_started_at')[:100]),
+            ('my_orders',
+             Order.objects.filter(user=alice).order_by('-created_at')),
+        ]
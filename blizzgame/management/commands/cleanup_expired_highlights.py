@@ -1,6 +1,9 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
-from blizzgame.models import Highlight
+from blizzgame.models import Highlight, Profile
+from blizzgame.ranking_utils import invalidate_active_pool
+from blizzgame.trending_utils import WINDOW_SECONDS, record_highlight_removed
 import logging
 
 logger = logging.getLogger(__name__)
@@ -42,7 +45,16 @@ class Command(BaseCommand):
                 # Supprimer les highlights expirés
                 # Les likes, commentaires, vues et partages seront supprimés automatiquement
                 # grâce aux relations CASCADE dans les modèles
-                deleted_count, deleted_details = expired_highlights.delete()
+                # (les Highlights encore dans la fenêtre des tendances en sont retirés)
+                still_trending = list(expired_highlights.filter(
+                    created_at__gte=now - timezone.timedelta(seconds=WINDOW_SECONDS)
+                ).only('created_at', 'hashtags'))
+                with transaction.atomic():
+                    Profile.discount_highlights(expired_highlights)
+                    deleted_count, deleted_details = expired_highlights.delete()
+                invalidate_active_pool()
+                for highlight in still_trending:
+                    record_highlight_removed(highlight)
                 
                 self.stdout.write(
                     self.style.SUCCESS(f'✅ {count} Highlights expirés supprimés')
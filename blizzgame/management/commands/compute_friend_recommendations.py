@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from blizzgame.recommendation_utils import TOP_K, compute_recommendations
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = "Précalcule les recommandations d'amis (jeux communs, abonnements communs, interactions)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            default=[],
+            help="Nom d'utilisateur à recalculer (répétable ; par défaut : tous les profils)",
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=TOP_K,
+            help='Nombre de recommandations conservées par utilisateur',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Nombre de lignes FriendRecommendation insérées par requête',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['user']:
+            user_ids = list(User.objects.filter(username__in=options['user']).values_list('id', flat=True))
+            if len(user_ids) != len(set(options['user'])):
+                raise CommandError('Utilisateur introuvable')
+
+        written = compute_recommendations(user_ids, top_k=options['top_k'], batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Recommandations d'amis calculées: {written} entrées")
+        )
+        logger.info(f"Calcul des recommandations d'amis: {written} entrées")
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from blizzgame.escrow_utils import run_escrow_cycle
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Libère les séquestres dont la période de sécurité est échue et envoie les paiements aux vendeurs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Nombre de séquestres (ou de paiements) traités par transaction',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Tourne en continu (worker) au lieu d\'un seul passage',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help='Secondes entre deux passages en mode --loop',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                self.run_cycle(options['batch_size'])
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Arrêt du worker de séquestre')
+
+    def run_cycle(self, batch_size):
+        stats = run_escrow_cycle(batch_size=batch_size)
+        processed = stats['released'] + stats['payouts_completed'] + stats['payouts_failed']
+        throughput = processed / stats['elapsed'] if stats['elapsed'] else 0
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Séquestre: {stats['released']} libérés, {stats['payouts_recovered']} paiements bloqués repris, "
+                f"{stats['payouts_completed']} paiements envoyés, "
+                f"{stats['payouts_failed']} échoués en {stats['elapsed']:.2f}s ({throughput:.1f} opérations/s)"
+            )
+        )
+        logger.info(
+            f"Passage du séquestre: {stats['released']} libérés, {stats['payouts_recovered']} repris, "
+            f"{stats['payouts_completed']} paiements, "
+            f"{stats['payouts_failed']} échecs, {throughput:.1f} opérations/s"
+        )
@@ -0,0 +1,56 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from blizzgame.models import FeedAffinity, HighlightAppreciation, HighlightComment
+from blizzgame.ranking_utils import APPRECIATION_AFFINITY, COMMENT_AFFINITY
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Recalcule les affinités hashtags/auteurs du feed "Pour toi" depuis les appréciations et commentaires'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Nombre de lignes FeedAffinity insérées par requête',
+        )
+
+    def handle(self, *args, **options):
+        weights = defaultdict(float)
+
+        def accumulate(user_id, author_id, hashtags, delta):
+            if not delta or user_id == author_id:
+                return
+            for tag in hashtags or []:
+                weights[(user_id, 'hashtag', tag[:100])] += delta
+            weights[(user_id, 'author', str(author_id))] += delta
+
+        appreciations = HighlightAppreciation.objects.values_list(
+            'user_id', 'highlight__author_id', 'highlight__hashtags', 'appreciation_level'
+        )
+        for user_id, author_id, hashtags, level in appreciations.iterator():
+            accumulate(user_id, author_id, hashtags, APPRECIATION_AFFINITY.get(level, 0))
+
+        comments = HighlightComment.objects.values_list(
+            'user_id', 'highlight__author_id', 'highlight__hashtags'
+        )
+        for user_id, author_id, hashtags in comments.iterator():
+            accumulate(user_id, author_id, hashtags, COMMENT_AFFINITY)
+
+        affinities = [
+            FeedAffinity(user_id=user_id, kind=kind, key=key, weight=weight)
+            for (user_id, kind, key), weight in weights.items()
+            if weight
+        ]
+
+        with transaction.atomic():
+            FeedAffinity.objects.all().delete()
+            FeedAffinity.objects.bulk_create(affinities, batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Affinités recalculées: {len(affinities)} entrées')
+        )
+        logger.info(f"Reconstruction des affinités du feed: {len(affinities)} entrées")
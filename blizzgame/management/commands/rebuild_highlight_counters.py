@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from blizzgame.models import (
+    Highlight, HighlightAppreciation, HighlightComment, HighlightView, HighlightShare
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Recalcule les compteurs dénormalisés des Highlights depuis les tables sources'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Nombre de Highlights mis à jour par requête',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Affiche les Highlights désynchronisés sans les corriger',
+        )
+
+    def handle(self, *args, **options):
+        counters = {}
+
+        def counters_for(highlight_id):
+            return counters.setdefault(highlight_id, {field: 0 for field in Highlight.COUNTER_FIELDS})
+
+        # Une requête GROUP BY par table source
+        appreciation_rows = HighlightAppreciation.objects.values('highlight_id').annotate(
+            total=Count('id'),
+            **{f'level_{level}': Count('id', filter=Q(appreciation_level=level)) for level in range(1, 7)}
+        )
+        for row in appreciation_rows:
+            values = counters_for(row['highlight_id'])
+            values['appreciations_count'] = row['total']
+            for level in range(1, 7):
+                values[f'appreciations_level_{level}'] = row[f'level_{level}']
+
+        for model, field in [
+            (HighlightComment, 'comments_count'),
+            (HighlightView, 'views_count'),
+            (HighlightShare, 'shares_count'),
+        ]:
+            for row in model.objects.values('highlight_id').annotate(total=Count('id')):
+                counters_for(row['highlight_id'])[field] = row['total']
+
+        to_update = []
+        for highlight in Highlight.objects.only('id', *Highlight.COUNTER_FIELDS).iterator():
+            values = counters.get(highlight.id) or {field: 0 for field in Highlight.COUNTER_FIELDS}
+            if any(getattr(highlight, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(highlight, field, value)
+                to_update.append(highlight)
+
+        if options['dry_run']:
+            self.stdout.write(
+                self.style.WARNING(f'Mode dry-run: {len(to_update)} Highlights désynchronisés')
+            )
+            return
+
+        Highlight.objects.bulk_update(to_update, Highlight.COUNTER_FIELDS, batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Compteurs recalculés: {len(to_update)} Highlights corrigés')
+        )
+        logger.info(f"Reconstruction des compteurs: {len(to_update)} Highlights corrigés")
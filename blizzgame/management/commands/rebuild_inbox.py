@@ -0,0 +1,123 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from blizzgame.models import (
+    GroupMembership, GroupMessage, InboxEntry, PrivateConversation, PrivateMessage
+)
+from blizzgame.inbox_utils import message_preview
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = ['last_message_preview', 'last_message_sender_name', 'last_message_at']
+
+class Command(BaseCommand):
+    help = 'Reconstruit la boîte de réception matérialisée (InboxEntry) depuis les conversations et groupes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Nombre de lignes écrites par requête',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        private_count = self.rebuild_private(batch_size)
+        group_count = self.rebuild_groups(batch_size)
+        self.rebuild_unread_counts()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Boîte de réception reconstruite: {private_count} lignes privées, {group_count} lignes de groupe'
+            )
+        )
+        logger.info(f"Reconstruction de l'inbox: {private_count} privées, {group_count} groupes")
+
+    def latest(self, model, field, target, outer='pk'):
+        """Sous-requête du champ `field` du dernier message de la conversation ou du groupe courant"""
+        return Subquery(
+            model.objects.filter(**{target: OuterRef(outer)}).order_by('-created_at', '-id').values(field)[:1]
+        )
+
+    def rebuild_private(self, batch_size):
+        conversations = PrivateConversation.objects.annotate(
+            last_content=self.latest(PrivateMessage, 'content', 'conversation'),
+            last_sender=self.latest(PrivateMessage, 'sender__username', 'conversation'),
+            last_created_at=self.latest(PrivateMessage, 'created_at', 'conversation'),
+        )
+        rows = []
+        for conversation in conversations.iterator():
+            for user_id, other_id in [
+                (conversation.user1_id, conversation.user2_id),
+                (conversation.user2_id, conversation.user1_id),
+            ]:
+                rows.append(InboxEntry(
+                    user_id=user_id, other_user_id=other_id, kind='private', conversation_id=conversation.id,
+                    last_message_preview=message_preview(conversation.last_content),
+                    last_message_sender_name=conversation.last_sender or '',
+                    last_message_at=conversation.last_created_at or conversation.created_at,
+                ))
+        InboxEntry.objects.bulk_create(
+            rows, batch_size=batch_size, update_conflicts=True,
+            unique_fields=['user', 'conversation'],
+            update_fields=SUMMARY_FIELDS + ['other_user'],
+        )
+        return len(rows)
+
+    def rebuild_groups(self, batch_size):
+        member_counts = dict(
+            GroupMembership.objects.filter(is_active=True)
+            .values('group_id').annotate(total=Count('id')).values_list('group_id', 'total')
+        )
+        memberships = GroupMembership.objects.filter(is_active=True, group__is_active=True).select_related('group').annotate(
+            last_content=self.latest(GroupMessage, 'content', 'group', 'group_id'),
+            last_sender=self.latest(GroupMessage, 'sender__username', 'group', 'group_id'),
+            last_created_at=self.latest(GroupMessage, 'created_at', 'group', 'group_id'),
+        )
+        rows = [
+            InboxEntry(
+                user_id=membership.user_id, kind='group', group_id=membership.group_id,
+                is_admin=membership.is_admin, member_count=member_counts.get(membership.group_id, 0),
+                last_message_preview=message_preview(membership.last_content),
+                last_message_sender_name=membership.last_sender or '',
+                last_message_at=membership.last_created_at or membership.group.created_at,
+            )
+            for membership in memberships.iterator()
+        ]
+        InboxEntry.objects.bulk_create(
+            rows, batch_size=batch_size, update_conflicts=True,
+            unique_fields=['user', 'group'],
+            update_fields=SUMMARY_FIELDS + ['is_admin', 'member_count'],
+        )
+        # Lignes des adhésions quittées ou désactivées
+        InboxEntry.objects.filter(kind='group').filter(~Exists(
+            GroupMembership.objects.filter(user=OuterRef('user'), group=OuterRef('group'), is_active=True)
+        )).delete()
+        return len(rows)
+
+    def rebuild_unread_counts(self):
+        """
+        Recalcule les non lus depuis les filigranes de lecture : pour chaque
+        ligne, les messages des autres participants plus récents que
+        last_read_at (comptage sur l'index (conversation|group, created_at)).
+        Une ligne de groupe sans filigrane (adhésion ajoutée par cette
+        commande) part du dernier message : l'historique du groupe n'est pas
+        compté comme non lu. Une conversation privée sans filigrane n'a
+        jamais été lue : tous les messages de l'autre participant comptent.
+        Deux UPDATE par type de ligne, quel que soit leur nombre.
+        """
+        InboxEntry.objects.filter(kind='group', last_read_at__isnull=True).update(last_read_at=F('last_message_at'))
+        for kind, model, target in [
+            ('private', PrivateMessage, 'conversation'),
+            ('group', GroupMessage, 'group'),
+        ]:
+            for has_watermark in (True, False):
+                newer = Q(created_at__gt=OuterRef('last_read_at')) if has_watermark else Q()
+                unread = model.objects.filter(newer, **{target: OuterRef(target)}).exclude(
+                    sender=OuterRef('user')
+                ).values(target).annotate(total=Count('id')).values('total')
+                InboxEntry.objects.filter(kind=kind, last_read_at__isnull=not has_watermark).update(
+                    unread_count=Coalesce(Subquery(unread), 0)
+                )
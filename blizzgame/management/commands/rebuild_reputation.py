@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from blizzgame.reputation_utils import rebuild_reputations
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Recalcule la réputation vendeur/acheteur (compteurs, scores, badges) depuis les évaluations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            default=[],
+            help="Nom d'utilisateur à recalculer (répétable ; par défaut : tous)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Nombre de lignes UserReputation mises à jour par requête',
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['user']:
+            user_ids = list(User.objects.filter(username__in=options['user']).values_list('id', flat=True))
+            if len(user_ids) != len(set(options['user'])):
+                raise CommandError('Utilisateur introuvable')
+
+        changed = rebuild_reputations(user_ids, batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Réputations recalculées: {len(changed)} utilisateurs corrigés')
+        )
+        logger.info(f"Reconstruction des réputations: {len(changed)} utilisateurs corrigés")
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from blizzgame.models import Highlight, HighlightSearchDocument
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Reconstruit les documents de recherche plein texte des Highlights (légende, hashtags, auteur)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Nombre de documents écrits par requête',
+        )
+
+    def handle(self, *args, **options):
+        documents = [
+            HighlightSearchDocument(
+                highlight_id=highlight_id, caption=caption or '',
+                hashtags=' '.join(hashtags or []), username=username
+            )
+            for highlight_id, caption, hashtags, username in Highlight.objects.values_list(
+                'id', 'caption', 'hashtags', 'author__username'
+            ).iterator()
+        ]
+        # Les triggers de la table FTS5 suivent les insertions et mises à jour
+        HighlightSearchDocument.objects.bulk_create(
+            documents, batch_size=options['batch_size'], update_conflicts=True,
+            unique_fields=['highlight'], update_fields=['caption', 'hashtags', 'username'],
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Index de recherche reconstruit: {len(documents)} Highlights')
+        )
+        logger.info(f"Reconstruction de l'index de recherche: {len(documents)} Highlights")
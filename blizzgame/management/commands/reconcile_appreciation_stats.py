@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from blizzgame.models import HighlightAppreciation, Profile
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = "Recalcule l'histogramme des appréciations reçues par chaque profil depuis HighlightAppreciation"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Nombre de profils mis à jour par requête',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Affiche les profils désynchronisés sans les corriger',
+        )
+
+    def handle(self, *args, **options):
+        fields = Profile.APPRECIATION_LEVEL_FIELDS
+
+        # Une seule requête GROUP BY par auteur des Highlights
+        histograms = {
+            row['highlight__author_id']: [row[field] for field in fields]
+            for row in HighlightAppreciation.objects.values('highlight__author_id').annotate(
+                **{f'appreciations_level_{level}': Count('id', filter=Q(appreciation_level=level)) for level in range(1, 7)}
+            )
+        }
+
+        to_update = []
+        for profile in Profile.objects.only('id', 'user_id', *fields).iterator():
+            values = histograms.get(profile.user_id, [0] * len(fields))
+            if [getattr(profile, field) for field in fields] != values:
+                for field, value in zip(fields, values):
+                    setattr(profile, field, value)
+                to_update.append(profile)
+
+        if options['dry_run']:
+            self.stdout.write(
+                self.style.WARNING(f'Mode dry-run: {len(to_update)} profils désynchronisés')
+            )
+            return
+
+        Profile.objects.bulk_update(to_update, fields, batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Histogrammes d'appréciations recalculés: {len(to_update)} profils corrigés")
+        )
+        logger.info(f"Réconciliation des histogrammes d'appréciations: {len(to_update)} profils corrigés")
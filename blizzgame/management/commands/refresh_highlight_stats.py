@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from blizzgame.models import Highlight
+from blizzgame.stats_utils import refresh_highlight_stats
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Rafraîchit la table HighlightStats (vues, temps de visionnage, engagement, score)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Inclut les Highlights expirés ou désactivés (par défaut : actifs uniquement)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Nombre de Highlights traités par lot',
+        )
+
+    def handle(self, *args, **options):
+        highlights = Highlight.objects.all()
+        if not options['all']:
+            highlights = highlights.filter(is_active=True, expires_at__gt=timezone.now())
+        highlight_ids = list(highlights.values_list('id', flat=True))
+
+        batch_size = options['batch_size']
+        refreshed = 0
+        for start in range(0, len(highlight_ids), batch_size):
+            refreshed += refresh_highlight_stats(highlight_ids[start:start + batch_size], batch_size=batch_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Statistiques rafraîchies: {refreshed} Highlights')
+        )
+        logger.info(f"Rafraîchissement des statistiques: {refreshed} Highlights")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from blizzgame.leaderboard_utils import refresh_leaderboard
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Recalcule le classement des vendeurs (scores ajustés au volume et badges)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Nombre de lignes SellerRank insérées par requête',
+        )
+
+    def handle(self, *args, **options):
+        ranked = refresh_leaderboard(batch_size=options['batch_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Classement des vendeurs recalculé: {ranked} vendeurs classés')
+        )
+        logger.info(f"Rafraîchissement du classement des vendeurs: {ranked} vendeurs classés")
@@ -0,0 +1,173 @@
+"""
+Moteur de la boutique (page d'accueil et API /api/marketplace/)
+
+Les annonces (Post) sont filtrées par jeu, fourchette de prix, statut
+vendu/disponible, comptes vérifiés, monnaie, niveau et date, puis triées
+(plus récentes, prix croissant/décroissant, titre) et paginées par curseur
+keyset : chaque tri a un index composite (jeu en tête ou non) et une page
+ne lit que `limit + 1` lignes, sans COUNT(*) ni OFFSET.
+
+Une page se charge en un nombre constant de requêtes : auteur et profil
+par select_related, images par prefetch_related, et transaction en cours
+annotée par une sous-requête EXISTS.
+
+Les compteurs par jeu (facettes, pour les filtres courants hors filtre de
+jeu) viennent d'un seul GROUP BY mis en cache. La clé inclut une version
+incrémentée à chaque écriture d'annonce (Post.save / delete) : les
+compteurs restent exacts sans expiration courte.
+"""
+
+import datetime
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef
+from django.utils import timezone
+
+from .models import Post, Transaction
+from .pagination_utils import keyset_paginate
+
+FACETS_VERSION_KEY = 'marketplace:facets:version'
+FACETS_CACHE_KEY = 'marketplace:facets:{version}:{digest}'
+MAX_PAGE_SIZE = 50
+
+# Tri -> (colonnes du curseur, croissant ?)
+SORTS = {
+    'created_at': (('created_at', 'id'), False),
+    'price_asc': (('price', 'id'), True),
+    'price_desc': (('price', 'id'), False),
+    'title': (('title', 'id'), True),
+}
+DATE_RANGES = {
+    'today': datetime.timedelta(days=1),
+    'week': datetime.timedelta(days=7),
+    'month': datetime.timedelta(days=30),
+}
+STATUS_CHOICES = ('available', 'sold')
+
+def _facets_ttl():
+    return getattr(settings, 'MARKETPLACE_FACETS_CACHE_TTL', 3600)
+
+def invalidate_facets():
+    """Périme les facettes en cache (nouvelle version de la clé)"""
+    try:
+        cache.incr(FACETS_VERSION_KEY)
+    except ValueError:
+        cache.set(FACETS_VERSION_KEY, 2, None)
+
+def _price(value):
+    try:
+        price = Decimal(value)
+    except (InvalidOperation, TypeError):
+        return None
+    return price if price.is_finite() and price >= 0 else None
+
+def parse_filters(params):
+    """
+    Normalise les paramètres GET (valeurs invalides ignorées) en un dict
+    utilisable par le template (current_filters) et par filter_posts.
+    """
+    game_types = dict(Post.GAME_CHOICES)
+    return {
+        'game': params.get('game', '') if params.get('game', '') in game_types else '',
+        'price_min': _price(params.get('price_min')),
+        'price_max': _price(params.get('price_max')),
+        'status': params.get('status', '') if params.get('status', '') in STATUS_CHOICES else '',
+        'verified': params.get('verified') in ('1', 'on', 'true'),
+        'coins': params.get('coins', '').strip()[:100],
+        'level': params.get('level', '').strip()[:50],
+        'date': params.get('date', '') if params.get('date', '') in DATE_RANGES else '',
+        'sort': params.get('sort') if params.get('sort') in SORTS else 'created_at',
+    }
+
+def filter_posts(filters, with_game=True):
+    """Queryset des annonces correspondant aux filtres (sans tri)"""
+    posts = Post.objects.all()
+    if with_game and filters['game']:
+        posts = posts.filter(game_type=filters['game'])
+    if filters['price_min'] is not None:
+        posts = posts.filter(price__gte=filters['price_min'])
+    if filters['price_max'] is not None:
+        posts = posts.filter(price__lte=filters['price_max'])
+    if filters['status']:
+        posts = posts.filter(is_sold=filters['status'] == 'sold')
+    if filters['verified']:
+        posts = posts.filter(is_verified=True)
+    if filters['coins']:
+        posts = posts.filter(coins__icontains=filters['coins'])
+    if filters['level']:
+        posts = posts.filter(level__icontains=filters['level'])
+    if filters['date']:
+        posts = posts.filter(created_at__gte=timezone.now() - DATE_RANGES[filters['date']])
+    return posts
+
+def get_listing_page(filters, limit, cursor=None):
+    """
+    Page d'annonces pour les filtres donnés : dict keyset_paginate (items,
+    has_more, before, after). InvalidCursor si le curseur est altéré.
+    """
+    ordering, ascending = SORTS[filters['sort']]
+    posts = filter_posts(filters).select_related('author__profile').prefetch_related('images').annotate(
+        in_transaction=Exists(
+            Transaction.objects.filter(post=OuterRef('pk'), status__in=['pending', 'processing'])
+        )
+    )
+    # Le tri est signé dans le curseur : un curseur d'un autre tri lève InvalidCursor
+    return keyset_paginate(
+        posts, limit, before=cursor, ordering=ordering, ascending=ascending, scope=filters['sort']
+    )
+
+def get_facets(filters):
+    """Nombre d'annonces par jeu (GAME_CHOICES) pour les filtres courants hors jeu, en cache"""
+    version = cache.get(FACETS_VERSION_KEY)
+    if version is None:
+        version = 1
+        cache.add(FACETS_VERSION_KEY, version, None)
+    # Le jeu et le tri ne changent pas les compteurs : ils sont exclus de la clé
+    key_filters = {name: str(value) for name, value in filters.items() if name not in ('game', 'sort')}
+    if filters['date']:
+        # Fenêtre glissante : les compteurs datés ne sont réutilisés que dans la même heure
+        key_filters['hour'] = timezone.now().strftime('%Y%m%d%H')
+    digest = hashlib.md5(json.dumps(key_filters, sort_keys=True).encode()).hexdigest()
+    key = FACETS_CACHE_KEY.format(version=version, digest=digest)
+
+    facets = cache.get(key)
+    if facets is None:
+        counts = dict(
+            filter_posts(filters, with_game=False).order_by().values('game_type').annotate(
+                total=Count('id')
+            ).values_list('game_type', 'total')
+        )
+        facets = [
+            {'value': value, 'label': label, 'count': counts.get(value, 0)}
+            for value, label in Post.GAME_CHOICES
+        ]
+        cache.set(key, facets, _facets_ttl())
+    return facets
+
+def post_data(post):
+    """Sérialisation JSON d'une annonce de la boutique"""
+    author = post.author
+    profile = getattr(author, 'profile', None) if author else None
+    return {
+        'id': str(post.id),
+        'title': post.title,
+        'caption': post.caption,
+        'price': str(post.price),
+        'game_type': post.game_type,
+        'game': post.get_game_display_name(),
+        'coins': post.coins,
+        'level': post.level,
+        'is_sold': post.is_sold,
+        'is_verified': post.is_verified,
+        'in_transaction': getattr(post, 'in_transaction', False),
+        'banner': post.banner.url if post.has_banner else None,
+        'images': [image.image.url for image in post.images.all()],
+        'created_at': post.created_at.isoformat(),
+        'author': {
+            'username': author.username,
+            'avatar': profile.profileimg.url if profile and profile.profileimg else None,
+        } if author else None,
+    }
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:40
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _count(model, **filters):
+    """Nombre de lignes `model` du highlight courant (0 s'il n'y en a aucune)"""
+    rows = model.objects.filter(highlight=OuterRef('pk'), **filters).order_by().values('highlight').annotate(
+        total=Count('id')
+    ).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+
+def backfill_highlight_counters(apps, schema_editor):
+    """Recalcule tous les compteurs de tous les highlights, y compris ceux sans ligne source"""
+    Highlight = apps.get_model('blizzgame', 'Highlight')
+    HighlightAppreciation = apps.get_model('blizzgame', 'HighlightAppreciation')
+    HighlightComment = apps.get_model('blizzgame', 'HighlightComment')
+    HighlightView = apps.get_model('blizzgame', 'HighlightView')
+    HighlightShare = apps.get_model('blizzgame', 'HighlightShare')
+
+    Highlight.objects.update(
+        appreciations_count=_count(HighlightAppreciation),
+        comments_count=_count(HighlightComment),
+        views_count=_count(HighlightView),
+        shares_count=_count(HighlightShare),
+        **{
+            f'appreciations_level_{level}': _count(HighlightAppreciation, appreciation_level=level)
+            for level in range(1, 7)
+        }
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0027_profile_appreciation_count_profile_score_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='highlight',
+            name='appreciations_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='appreciations_level_1',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='appreciations_level_2',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='appreciations_level_3',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='appreciations_level_4',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='appreciations_level_5',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='appreciations_level_6',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='comments_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='highlight',
+            name='shares_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='score',
+            field=models.IntegerField(default=0, help_text='Score basé sur les appréciations des Highlights'),
+        ),
+        migrations.RunPython(backfill_highlight_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0029_feedaffinity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='groupmessage',
+            index=models.Index(fields=['group', 'created_at'], name='blizzgame_g_group_i_43766b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='highlight',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['expires_at', 'created_at'], name='highlight_active_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='highlight',
+            index=models.Index(fields=['author', 'created_at'], name='blizzgame_h_author__8cc9c7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', 'created_at'], name='blizzgame_n_user_id_77e451_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'created_at'], name='blizzgame_o_user_id_9c52fd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'created_at'], name='blizzgame_p_author__d4b157_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='privatemessage',
+            index=models.Index(fields=['conversation', 'created_at'], name='blizzgame_p_convers_9680fc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='privatemessage',
+            index=models.Index(fields=['conversation', 'is_read', 'sender'], name='blizzgame_p_convers_1c15ce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['buyer', 'created_at'], name='blizzgame_t_buyer_i_b1dc9c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['seller', 'created_at'], name='blizzgame_t_seller__0920e9_idx'),
+        ),
+    ]
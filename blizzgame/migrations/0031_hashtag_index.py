@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0030_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HighlightHashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='highlight_links', to='blizzgame.hashtag')),
+                ('highlight', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hashtag_links', to='blizzgame.highlight')),
+            ],
+            options={
+                'unique_together': {('hashtag', 'highlight')},
+            },
+        ),
+    ]
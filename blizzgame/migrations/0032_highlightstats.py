@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0031_hashtag_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HighlightStats',
+            fields=[
+                ('highlight', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='blizzgame.highlight')),
+                ('views_count', models.IntegerField(default=0)),
+                ('unique_viewers', models.IntegerField(default=0)),
+                ('avg_watch_time', models.FloatField(default=0.0, help_text='Durée moyenne de visionnage en secondes')),
+                ('median_watch_time', models.FloatField(default=0.0)),
+                ('p90_watch_time', models.FloatField(default=0.0)),
+                ('engagement_rate', models.FloatField(default=0.0)),
+                ('performance_score', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
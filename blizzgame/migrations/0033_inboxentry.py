@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-17 11:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0032_highlightstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('private', 'Conversation privée'), ('group', 'Groupe')], max_length=10)),
+                ('last_message_preview', models.CharField(blank=True, max_length=100)),
+                ('last_message_sender_name', models.CharField(blank=True, max_length=150)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('unread_count', models.IntegerField(default=0)),
+                ('member_count', models.IntegerField(default=0)),
+                ('is_admin', models.BooleanField(default=False)),
+                ('conversation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='blizzgame.privateconversation')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='blizzgame.group')),
+                ('other_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'kind', '-last_message_at'], name='blizzgame_i_user_id_6a14ab_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'conversation'), name='unique_inbox_conversation'), models.UniqueConstraint(fields=('user', 'group'), name='unique_inbox_group')],
+            },
+        ),
+    ]
@@ -0,0 +1,156 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:02
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+PREVIEW_LENGTH = 100
+
+
+def _preview(content):
+    content = ' '.join((content or '').split())
+    return content if len(content) <= PREVIEW_LENGTH else content[:PREVIEW_LENGTH - 1] + '…'
+
+
+def _latest(model, field, target, outer='pk'):
+    return Subquery(
+        model.objects.filter(**{target: OuterRef(outer)}).order_by('-created_at', '-id').values(field)[:1]
+    )
+
+
+def populate_inbox_entries(apps, schema_editor):
+    """Crée les lignes InboxEntry (participants privés et membres actifs) avant le calcul des filigranes"""
+    InboxEntry = apps.get_model('blizzgame', 'InboxEntry')
+    PrivateConversation = apps.get_model('blizzgame', 'PrivateConversation')
+    PrivateMessage = apps.get_model('blizzgame', 'PrivateMessage')
+    GroupMembership = apps.get_model('blizzgame', 'GroupMembership')
+    GroupMessage = apps.get_model('blizzgame', 'GroupMessage')
+
+    rows = []
+    conversations = PrivateConversation.objects.annotate(
+        last_content=_latest(PrivateMessage, 'content', 'conversation'),
+        last_sender=_latest(PrivateMessage, 'sender__username', 'conversation'),
+        last_created_at=_latest(PrivateMessage, 'created_at', 'conversation'),
+    )
+    for conversation in conversations.iterator():
+        for user_id, other_id in [
+            (conversation.user1_id, conversation.user2_id),
+            (conversation.user2_id, conversation.user1_id),
+        ]:
+            rows.append(InboxEntry(
+                user_id=user_id, other_user_id=other_id, kind='private', conversation_id=conversation.id,
+                last_message_preview=_preview(conversation.last_content),
+                last_message_sender_name=conversation.last_sender or '',
+                last_message_at=conversation.last_created_at or conversation.created_at,
+            ))
+
+    member_counts = dict(
+        GroupMembership.objects.filter(is_active=True)
+        .values('group_id').annotate(total=Count('id')).values_list('group_id', 'total')
+    )
+    memberships = GroupMembership.objects.filter(is_active=True, group__is_active=True).select_related('group').annotate(
+        last_content=_latest(GroupMessage, 'content', 'group', 'group_id'),
+        last_sender=_latest(GroupMessage, 'sender__username', 'group', 'group_id'),
+        last_created_at=_latest(GroupMessage, 'created_at', 'group', 'group_id'),
+    )
+    for membership in memberships.iterator():
+        rows.append(InboxEntry(
+            user_id=membership.user_id, kind='group', group_id=membership.group_id,
+            is_admin=membership.is_admin, member_count=member_counts.get(membership.group_id, 0),
+            last_message_preview=_preview(membership.last_content),
+            last_message_sender_name=membership.last_sender or '',
+            last_message_at=membership.last_created_at or membership.group.created_at,
+        ))
+    InboxEntry.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+
+
+def backfill_read_watermarks(apps, schema_editor):
+    """
+    Calcule filigranes et non lus depuis l'ancien état de lecture, avant la
+    suppression de PrivateMessage.is_read et de GroupMessageRead.
+    """
+    InboxEntry = apps.get_model('blizzgame', 'InboxEntry')
+    PrivateMessage = apps.get_model('blizzgame', 'PrivateMessage')
+    GroupMessage = apps.get_model('blizzgame', 'GroupMessage')
+    GroupMessageRead = apps.get_model('blizzgame', 'GroupMessageRead')
+
+    # Privé : filigrane = dernier message lu (is_read) de l'autre participant ;
+    # sans message lu, le filigrane reste vide (tout est non lu)
+    read_rows = PrivateMessage.objects.filter(is_read=True).values('conversation_id', 'sender_id').annotate(
+        latest=Max('created_at')
+    )
+    for row in read_rows:
+        InboxEntry.objects.filter(conversation_id=row['conversation_id']).exclude(
+            user_id=row['sender_id']
+        ).update(last_read_at=row['latest'])
+
+    # Groupes : dernier message lu d'après GroupMessageRead ; sans lecture
+    # enregistrée, l'historique antérieur au filigrane est considéré comme lu
+    read_rows = GroupMessageRead.objects.values('user_id', 'message__group_id').annotate(
+        latest=Max('message__created_at')
+    )
+    for row in read_rows:
+        InboxEntry.objects.filter(user_id=row['user_id'], group_id=row['message__group_id']).update(
+            last_read_at=row['latest']
+        )
+    InboxEntry.objects.filter(kind='group', last_read_at__isnull=True).update(
+        last_read_at=models.F('last_message_at')
+    )
+
+    # Non lus : messages des autres participants plus récents que le filigrane
+    for kind, model, target in [
+        ('private', PrivateMessage, 'conversation'),
+        ('group', GroupMessage, 'group'),
+    ]:
+        for has_watermark in (True, False):
+            newer = Q(created_at__gt=OuterRef('last_read_at')) if has_watermark else Q()
+            unread = model.objects.filter(newer, **{target: OuterRef(target)}).exclude(
+                sender=OuterRef('user')
+            ).values(target).annotate(total=Count('id')).values('total')
+            InboxEntry.objects.filter(kind=kind, last_read_at__isnull=not has_watermark).update(
+                unread_count=Coalesce(Subquery(unread), 0)
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0033_inboxentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inboxentry',
+            name='last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(populate_inbox_entries, migrations.RunPython.noop),
+        migrations.RunPython(backfill_read_watermarks, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='groupmessageread',
+            unique_together=None,
+        ),
+        migrations.RemoveField(
+            model_name='groupmessageread',
+            name='message',
+        ),
+        migrations.RemoveField(
+            model_name='groupmessageread',
+            name='user',
+        ),
+        migrations.RemoveIndex(
+            model_name='privatemessage',
+            name='blizzgame_p_convers_1c15ce_idx',
+        ),
+        migrations.RemoveField(
+            model_name='privatemessage',
+            name='is_read',
+        ),
+        migrations.RemoveField(
+            model_name='privatemessage',
+            name='read_at',
+        ),
+        migrations.DeleteModel(
+            name='GroupMessageRead',
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0035_notification_user_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.IntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='group_key',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='type',
+            field=models.CharField(choices=[('purchase_intent', "Intention d'achat"), ('new_message', 'Nouveau message'), ('transaction_update', 'Mise à jour de transaction'), ('system', 'Notification système'), ('private_message', 'Message privé'), ('group_message', 'Message de groupe'), ('group_invite', 'Invitation de groupe'), ('friend_request', "Demande d'ami"), ('friend_accept', 'Amitié acceptée'), ('appreciation', 'Appréciation de highlight'), ('comment', 'Commentaire de highlight'), ('new_subscriber', 'Nouvel abonné'), ('new_highlight', "Nouveau highlight d'un abonnement")], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['group_key', 'user'], name='notification_unread_group_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+# Index de recherche des noms d'utilisateurs (search_utils) : SQLite uniquement,
+# les autres bases utilisent le moteur 'basic'
+FORWARD_SQL = [
+    "CREATE INDEX IF NOT EXISTS blizzgame_auth_user_username_nocase ON auth_user (username COLLATE NOCASE)",
+    "CREATE VIRTUAL TABLE blizzgame_username_search USING fts5("
+    "username, content='auth_user', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER blizzgame_username_search_ai AFTER INSERT ON auth_user BEGIN "
+    "INSERT INTO blizzgame_username_search(rowid, username) VALUES (new.id, new.username); END",
+    "CREATE TRIGGER blizzgame_username_search_ad AFTER DELETE ON auth_user BEGIN "
+    "INSERT INTO blizzgame_username_search(blizzgame_username_search, rowid, username) "
+    "VALUES ('delete', old.id, old.username); END",
+    "CREATE TRIGGER blizzgame_username_search_au AFTER UPDATE OF username ON auth_user BEGIN "
+    "INSERT INTO blizzgame_username_search(blizzgame_username_search, rowid, username) "
+    "VALUES ('delete', old.id, old.username); "
+    "INSERT INTO blizzgame_username_search(rowid, username) VALUES (new.id, new.username); END",
+    "INSERT INTO blizzgame_username_search(blizzgame_username_search) VALUES ('rebuild')",
+]
+
+REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS blizzgame_username_search_au",
+    "DROP TRIGGER IF EXISTS blizzgame_username_search_ad",
+    "DROP TRIGGER IF EXISTS blizzgame_username_search_ai",
+    "DROP TABLE IF EXISTS blizzgame_username_search",
+    "DROP INDEX IF EXISTS blizzgame_auth_user_username_nocase",
+]
+
+
+def create_username_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in FORWARD_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_username_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in REVERSE_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0037_friendrecommendation'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_username_index, drop_username_index),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Index plein texte des Highlights (search_utils) : table FTS5 à contenu externe
+# (HighlightSearchDocument) tenue à jour par triggers ; SQLite uniquement
+TABLE = 'blizzgame_highlight_search'
+CONTENT = 'blizzgame_highlightsearchdocument'
+
+FORWARD_SQL = [
+    f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+    f"caption, hashtags, username, content='{CONTENT}', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER {TABLE}_ai AFTER INSERT ON {CONTENT} BEGIN "
+    f"INSERT INTO {TABLE}(rowid, caption, hashtags, username) "
+    f"VALUES (new.id, new.caption, new.hashtags, new.username); END",
+    f"CREATE TRIGGER {TABLE}_ad AFTER DELETE ON {CONTENT} BEGIN "
+    f"INSERT INTO {TABLE}({TABLE}, rowid, caption, hashtags, username) "
+    f"VALUES ('delete', old.id, old.caption, old.hashtags, old.username); END",
+    f"CREATE TRIGGER {TABLE}_au AFTER UPDATE ON {CONTENT} BEGIN "
+    f"INSERT INTO {TABLE}({TABLE}, rowid, caption, hashtags, username) "
+    f"VALUES ('delete', old.id, old.caption, old.hashtags, old.username); "
+    f"INSERT INTO {TABLE}(rowid, caption, hashtags, username) "
+    f"VALUES (new.id, new.caption, new.hashtags, new.username); END",
+]
+
+REVERSE_SQL = [
+    f"DROP TRIGGER IF EXISTS {TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {TABLE}_ai",
+    f"DROP TABLE IF EXISTS {TABLE}",
+]
+
+
+def create_highlight_index(apps, schema_editor):
+    Highlight = apps.get_model('blizzgame', 'Highlight')
+    HighlightSearchDocument = apps.get_model('blizzgame', 'HighlightSearchDocument')
+
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in FORWARD_SQL:
+            schema_editor.execute(statement)
+
+    HighlightSearchDocument.objects.bulk_create([
+        HighlightSearchDocument(
+            highlight_id=highlight_id, caption=caption or '',
+            hashtags=' '.join(hashtags or []), username=username
+        )
+        for highlight_id, caption, hashtags, username in Highlight.objects.values_list(
+            'id', 'caption', 'hashtags', 'author__username'
+        ).iterator()
+    ], batch_size=500)
+
+
+def drop_highlight_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in REVERSE_SQL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0038_username_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HighlightSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('caption', models.TextField(blank=True)),
+                ('hashtags', models.TextField(blank=True)),
+                ('username', models.CharField(max_length=150)),
+                ('highlight', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='blizzgame.highlight')),
+            ],
+        ),
+        migrations.RunPython(create_highlight_index, drop_highlight_index),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:23
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_appreciation_histogram(apps, schema_editor):
+    HighlightAppreciation = apps.get_model('blizzgame', 'HighlightAppreciation')
+    Profile = apps.get_model('blizzgame', 'Profile')
+
+    rows = HighlightAppreciation.objects.values('highlight__author_id').annotate(
+        **{f'level_{level}': Count('id', filter=Q(appreciation_level=level)) for level in range(1, 7)}
+    )
+    for row in rows:
+        Profile.objects.filter(user_id=row['highlight__author_id']).update(
+            **{f'appreciations_level_{level}': row[f'level_{level}'] for level in range(1, 7)}
+        )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0039_highlightsearchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='appreciations_level_1',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='appreciations_level_2',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='appreciations_level_3',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='appreciations_level_4',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='appreciations_level_5',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='appreciations_level_6',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_appreciation_histogram, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0042_sellerrank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payoutrequest',
+            index=models.Index(fields=['status', 'created_at'], name='blizzgame_p_status_795b6a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', 'security_period_end'], name='blizzgame_t_status_f8aa04_idx'),
+        ),
+    ]
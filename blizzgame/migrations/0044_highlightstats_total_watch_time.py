@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:44
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_total_watch_time(apps, schema_editor):
+    HighlightView = apps.get_model('blizzgame', 'HighlightView')
+    HighlightStats = apps.get_model('blizzgame', 'HighlightStats')
+
+    rows = HighlightView.objects.values('highlight_id').annotate(total=Sum('view_duration'))
+    for row in rows:
+        HighlightStats.objects.filter(highlight_id=row['highlight_id']).update(total_watch_time=row['total'] or 0.0)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0043_escrow_scheduler_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='highlightstats',
+            name='total_watch_time',
+            field=models.FloatField(default=0.0, help_text='Somme des durées de visionnage en secondes'),
+        ),
+        migrations.RunPython(backfill_total_watch_time, migrations.RunPython.noop),
+    ]
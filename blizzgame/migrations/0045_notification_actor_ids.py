@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0044_highlightstats_total_watch_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_ids',
+            field=models.JSONField(blank=True, default=list, help_text='Acteurs distincts regroupés (actor_count = leur nombre)'),
+        ),
+    ]
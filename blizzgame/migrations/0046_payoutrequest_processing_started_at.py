@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-17 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0045_notification_actor_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payoutrequest',
+            name='processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='payoutrequest',
+            index=models.Index(fields=['status', 'processing_started_at'], name='blizzgame_p_status_3bdcdd_idx'),
+        ),
+    ]
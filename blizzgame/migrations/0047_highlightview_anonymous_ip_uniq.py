@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-17 13:03
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def dedupe_anonymous_views(apps, schema_editor):
+    """Garde une vue anonyme par (highlight, IP), la plus longue, et recompte views_count"""
+    Highlight = apps.get_model('blizzgame', 'Highlight')
+    HighlightView = apps.get_model('blizzgame', 'HighlightView')
+
+    duplicates = HighlightView.objects.filter(user__isnull=True, ip_address__isnull=False).values(
+        'highlight_id', 'ip_address'
+    ).annotate(total=Count('id')).filter(total__gt=1)
+    highlight_ids = set()
+    for row in duplicates:
+        views = HighlightView.objects.filter(
+            user__isnull=True, highlight_id=row['highlight_id'], ip_address=row['ip_address']
+        ).order_by('-view_duration', 'created_at')
+        kept = views.values_list('id', flat=True).first()
+        views.exclude(id=kept).delete()
+        highlight_ids.add(row['highlight_id'])
+
+    if highlight_ids:
+        views_count = HighlightView.objects.filter(highlight=OuterRef('pk')).order_by().values('highlight').annotate(
+            total=Count('id')
+        ).values('total')
+        Highlight.objects.filter(pk__in=highlight_ids).update(
+            views_count=Coalesce(Subquery(views_count, output_field=IntegerField()), Value(0))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blizzgame', '0046_payoutrequest_processing_started_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_anonymous_views, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='highlightview',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('highlight', 'ip_address'), name='highlightview_anonymous_ip_uniq'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 import uuid
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator
 from django.utils import timezone
@@ -17,8 +17,32 @@ class Highlight(models.Model):
     views_count = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
     
+    # Compteurs dénormalisés (maintenus par les vues via F-expressions,
+    # reconstruits par la commande rebuild_highlight_counters)
+    appreciations_count = models.IntegerField(default=0)
+    appreciations_level_1 = models.IntegerField(default=0)
+    appreciations_level_2 = models.IntegerField(default=0)
+    appreciations_level_3 = models.IntegerField(default=0)
+    appreciations_level_4 = models.IntegerField(default=0)
+    appreciations_level_5 = models.IntegerField(default=0)
+    appreciations_level_6 = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
+    shares_count = models.IntegerField(default=0)
+    
+    COUNTER_FIELDS = [
+        'appreciations_count',
+        'appreciations_level_1', 'appreciations_level_2', 'appreciations_level_3',
+        'appreciations_level_4', 'appreciations_level_5', 'appreciations_level_6',
+        'comments_count', 'views_count', 'shares_count',
+    ]
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Index partiel : SQLite ne sait pas utiliser un booléen nu ("WHERE is_active") en tête d'index
+            models.Index(fields=['expires_at', 'created_at'], condition=models.Q(is_active=True), name='highlight_active_feed_idx'),
+            models.Index(fields=['author', 'created_at']),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.expires_at:
@@ -35,24 +59,63 @@ class Highlight(models.Model):
             return None
         return self.expires_at - timezone.now()
     
-    @property
-    def appreciations_count(self):
-        return self.appreciations.count()
-    
-    @property
-    def comments_count(self):
-        return self.comments.count()
-    
     def get_appreciation_counts_by_level(self):
         """Retourne un dictionnaire avec le nombre d'appréciations par niveau"""
-        counts = {}
-        for level in range(1, 7):
-            counts[level] = self.appreciations.filter(appreciation_level=level).count()
-        return counts
+        return {level: getattr(self, f'appreciations_level_{level}') for level in range(1, 7)}
+    
+    def bump_counters(self, **deltas):
+        """Incrémente atomiquement les compteurs donnés puis recharge leurs valeurs"""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        Highlight.objects.filter(pk=self.pk).update(
+            **{field: models.F(field) + delta for field, delta in deltas.items()}
+        )
+        self.refresh_from_db(fields=list(deltas))
+    
+    def sync_hashtag_index(self):
+        """Synchronise la table d'index HighlightHashtag avec la liste self.hashtags"""
+        names = {tag.lower()[:100] for tag in (self.hashtags or [])}
+        Hashtag.objects.bulk_create([Hashtag(name=name) for name in names], ignore_conflicts=True)
+        hashtag_ids = list(Hashtag.objects.filter(name__in=names).values_list('id', flat=True))
+        HighlightHashtag.objects.filter(highlight=self).exclude(hashtag_id__in=hashtag_ids).delete()
+        HighlightHashtag.objects.bulk_create(
+            [HighlightHashtag(highlight=self, hashtag_id=hashtag_id) for hashtag_id in hashtag_ids],
+            ignore_conflicts=True
+        )
     
     def __str__(self):
         return f"Highlight by {self.author.username} - {self.created_at}"
 
+class Hashtag(models.Model):
+    """Hashtag normalisé (minuscules, sans #)"""
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"#{self.name}"
+
+class HighlightHashtag(models.Model):
+    """Index hashtag -> highlight (remplace les recherches icontains sur Highlight.hashtags)"""
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='highlight_links')
+    highlight = models.ForeignKey(Highlight, on_delete=models.CASCADE, related_name='hashtag_links')
+    
+    class Meta:
+        unique_together = ['hashtag', 'highlight']
+    
+    def __str__(self):
+        return f"#{self.hashtag.name} -> {self.highlight_id}"
+
+# Impact de chaque niveau d'appréciation sur le score de l'auteur du Highlight
+APPRECIATION_SCORE_IMPACTS = {
+    1: -10,  # Extrêmement nul
+    2: -4,   # Pas terrible
+    3: 2,    # Moyen
+    4: 4,    # Bien
+    5: 6,    # Très bien
+    6: 10,   # Extraordinaire
+}
+
 class HighlightAppreciation(models.Model):
     """Système d'appréciation avec 6 niveaux d'émotions"""
     APPRECIATION_CHOICES = [
@@ -79,15 +142,40 @@ class HighlightAppreciation(models.Model):
     @property
     def score_impact(self):
         """Retourne l'impact sur le score de l'auteur"""
-        score_impacts = {
-            1: -10,  # Extrêmement nul
-            2: -4,   # Pas terrible
-            3: 2,    # Moyen
-            4: 4,    # Bien
-            5: 6,    # Très bien
-            6: 10,   # Extraordinaire
-        }
-        return score_impacts.get(self.appreciation_level, 0)
+        return APPRECIATION_SCORE_IMPACTS.get(self.appreciation_level, 0)
+    
+    @classmethod
+    def record(cls, highlight, user, appreciation_level):
+        """
+        Enregistre (crée ou modifie) l'appréciation de `user` sur `highlight`
+        et répercute le changement sur le score, le compteur et l'histogramme
+        de l'auteur ainsi que sur les compteurs du Highlight, en une
+        transaction et par mises à jour F() : aucune écriture concurrente
+        n'est perdue. Retourne l'ancien niveau (None si l'appréciation est nouvelle).
+        """
+        appreciations = cls.objects.filter(highlight=highlight, user=user)
+        with transaction.atomic():
+            old_level = appreciations.select_for_update().values_list('appreciation_level', flat=True).first()
+            if old_level is None:
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(highlight=highlight, user=user, appreciation_level=appreciation_level)
+                except IntegrityError:
+                    # Créée entre-temps par une requête concurrente du même utilisateur
+                    old_level = appreciations.select_for_update().values_list('appreciation_level', flat=True).get()
+            if old_level == appreciation_level:
+                return old_level
+            if old_level is not None:
+                appreciations.update(appreciation_level=appreciation_level)
+            
+            Profile.apply_appreciation(highlight.author_id, appreciation_level, old_level)
+            deltas = {f'appreciations_level_{appreciation_level}': 1}
+            if old_level is None:
+                deltas['appreciations_count'] = 1
+            else:
+                deltas[f'appreciations_level_{old_level}'] = -1
+            highlight.bump_counters(**deltas)
+        return old_level
 
 class HighlightComment(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
@@ -112,6 +200,13 @@ class HighlightView(models.Model):
     
     class Meta:
         unique_together = ['highlight', 'user']
+        constraints = [
+            # unique_together ne contraint pas user NULL : une seule vue anonyme par IP
+            models.UniqueConstraint(
+                fields=['highlight', 'ip_address'], condition=models.Q(user__isnull=True),
+                name='highlightview_anonymous_ip_uniq'
+            ),
+        ]
     
     def __str__(self):
         return f"View on {self.highlight.id} by {self.user.username if self.user else 'Anonymous'} ({self.view_duration}s)"
@@ -126,6 +221,51 @@ class HighlightShare(models.Model):
     def __str__(self):
         return f"{self.user.username} shared {self.highlight.id}"
 
+class HighlightStats(models.Model):
+    """Statistiques agrégées d'un Highlight (rafraîchies par stats_utils et refresh_highlight_stats)"""
+    highlight = models.OneToOneField(Highlight, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    views_count = models.IntegerField(default=0)
+    unique_viewers = models.IntegerField(default=0)
+    avg_watch_time = models.FloatField(default=0.0, help_text="Durée moyenne de visionnage en secondes")
+    total_watch_time = models.FloatField(default=0.0, help_text="Somme des durées de visionnage en secondes")
+    median_watch_time = models.FloatField(default=0.0)
+    p90_watch_time = models.FloatField(default=0.0)
+    engagement_rate = models.FloatField(default=0.0)
+    performance_score = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats {self.highlight_id} ({self.views_count} vues)"
+
+class HighlightSearchDocument(models.Model):
+    """Texte indexé d'un Highlight (contenu de l'index plein texte FTS5, voir search_utils)"""
+    highlight = models.OneToOneField(Highlight, on_delete=models.CASCADE, related_name='search_document')
+    caption = models.TextField(blank=True)
+    hashtags = models.TextField(blank=True)
+    username = models.CharField(max_length=150)
+
+    def __str__(self):
+        return f"Document de recherche {self.highlight_id}"
+
+class FeedAffinity(models.Model):
+    """Poids d'affinité d'un utilisateur pour un hashtag ou un auteur (feed "Pour toi")"""
+    KIND_CHOICES = [
+        ('hashtag', 'Hashtag'),
+        ('author', 'Auteur'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_affinities')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    key = models.CharField(max_length=100, help_text="Hashtag (sans #) ou id de l'auteur")
+    weight = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'kind', 'key']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.kind}:{self.key} ({self.weight})"
+
 class UserSubscription(models.Model):
     """Système d'abonnement pour les Highlights (remplace les demandes d'amis)"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
@@ -158,23 +298,35 @@ class Profile(models.Model):
     # Champs pour le système de réputation
     score = models.IntegerField(default=0, help_text="Score basé sur les appréciations des Highlights")
     appreciation_count = models.IntegerField(default=0, help_text="Nombre total d'appréciations reçues")
+    
+    # Histogramme des appréciations reçues sur les Highlights existants, par niveau
+    # (maintenu par apply_appreciation, reconstruit par la commande reconcile_appreciation_stats)
+    appreciations_level_1 = models.IntegerField(default=0)
+    appreciations_level_2 = models.IntegerField(default=0)
+    appreciations_level_3 = models.IntegerField(default=0)
+    appreciations_level_4 = models.IntegerField(default=0)
+    appreciations_level_5 = models.IntegerField(default=0)
+    appreciations_level_6 = models.IntegerField(default=0)
+    
+    APPRECIATION_LEVEL_FIELDS = [f'appreciations_level_{level}' for level in range(1, 7)]
 
     @property
     def friends_count(self):
-        """Compte le nombre d'amis (abonnements mutuels)"""
-        user_subscriptions = set(self.user.subscriptions.values_list('subscribed_to_id', flat=True))
-        user_subscribers = set(self.user.subscribers.values_list('subscriber_id', flat=True))
-        return len(user_subscriptions.intersection(user_subscribers))
+        """Compte le nombre d'amis (abonnements mutuels), depuis le graphe social en cache"""
+        from .social_graph_utils import get_counts
+        return get_counts(self.user_id)['friends_count']
     
     @property
     def subscribers_count(self):
         """Compte le nombre d'abonnés"""
-        return self.user.subscribers.count()
+        from .social_graph_utils import get_counts
+        return get_counts(self.user_id)['subscribers_count']
     
     @property
     def subscriptions_count(self):
         """Compte le nombre d'abonnements"""
-        return self.user.subscriptions.count()
+        from .social_graph_utils import get_counts
+        return get_counts(self.user_id)['subscriptions_count']
 
     GAME_CHOICES = [
         ('FreeFire', 'FreeFire'),
@@ -192,46 +344,65 @@ class Profile(models.Model):
     @property
     def appreciation_percentage(self):
         """Calcule le pourcentage d'appréciations positives (niveaux 4-6)"""
-        if self.appreciation_count == 0:
+        counts = self.appreciation_level_counts
+        total = sum(counts.values())
+        if total == 0:
             return 0.0
         
-        # Compter les appréciations positives (niveaux 4-6)
-        positive_appreciations = HighlightAppreciation.objects.filter(
-            highlight__author=self.user
-        ).filter(appreciation_level__gte=4).count()
-        
-        return round((positive_appreciations / self.appreciation_count) * 100, 1)
+        positive_appreciations = counts[4] + counts[5] + counts[6]
+        return round((positive_appreciations / total) * 100, 1)
     
     def update_score_from_appreciation(self, appreciation_level):
         """Met à jour le score basé sur une nouvelle appréciation"""
-        score_impacts = {
-            1: -10,  # Extrêmement nul
-            2: -4,   # Pas terrible
-            3: 2,    # Moyen
-            4: 4,    # Bien
-            5: 6,    # Très bien
-            6: 10,   # Extraordinaire
+        Profile.apply_appreciation(self.user_id, appreciation_level)
+        self.refresh_from_db(fields=['score', 'appreciation_count', *self.APPRECIATION_LEVEL_FIELDS])
+    
+    @classmethod
+    def apply_appreciation(cls, user_id, new_level, old_level=None):
+        """
+        Applique une appréciation reçue (nouvelle, ou passée de old_level à
+        new_level) au score, au compteur et à l'histogramme du profil de
+        `user_id`, en un seul UPDATE relatif (F-expressions).
+        """
+        deltas = {
+            'score': APPRECIATION_SCORE_IMPACTS.get(new_level, 0) - APPRECIATION_SCORE_IMPACTS.get(old_level, 0),
+            f'appreciations_level_{new_level}': 1,
         }
-        
-        impact = score_impacts.get(appreciation_level, 0)
-        self.score += impact
-        self.appreciation_count += 1
-        self.save()
+        if old_level is None:
+            deltas['appreciation_count'] = 1
+        else:
+            deltas[f'appreciations_level_{old_level}'] = -1
+        cls.objects.filter(user_id=user_id).update(
+            **{field: models.F(field) + delta for field, delta in deltas.items() if delta}
+        )
+    
+    @classmethod
+    def discount_highlights(cls, highlights):
+        """
+        Retire de l'histogramme de leurs auteurs les appréciations des
+        Highlights donnés (à appeler avant leur suppression) : une requête
+        GROUP BY sur les compteurs dénormalisés, puis une mise à jour par auteur.
+        """
+        rows = highlights.order_by().values('author_id').annotate(
+            **{field: models.Sum(field) for field in cls.APPRECIATION_LEVEL_FIELDS}
+        )
+        for row in rows:
+            deltas = {field: row[field] for field in cls.APPRECIATION_LEVEL_FIELDS if row[field]}
+            if deltas:
+                cls.objects.filter(user_id=row['author_id']).update(
+                    **{field: models.F(field) - delta for field, delta in deltas.items()}
+                )
 
     @property
     def appreciation_level_counts(self):
         """Retourne un dict {1..6: count} des appréciations reçues par niveau pour tous les highlights de l'utilisateur."""
-        counts = {level: 0 for level in range(1, 7)}
-        qs = HighlightAppreciation.objects.filter(highlight__author=self.user)
-        for level in range(1, 7):
-            counts[level] = qs.filter(appreciation_level=level).count()
-        return counts
+        return {level: getattr(self, f'appreciations_level_{level}') for level in range(1, 7)}
 
     @property
     def appreciation_level_percentages(self):
-        """Retourne un dict {1..6: percent} basé sur appreciation_count (0 si aucun)."""
-        total = self.appreciation_count or 0
+        """Retourne un dict {1..6: percent} des appréciations reçues (0 si aucune)."""
         counts = self.appreciation_level_counts
+        total = sum(counts.values())
         if total == 0:
             return {level: 0.0 for level in range(1, 7)}
         return {level: round((counts[level] / total) * 100, 1) for level in counts}
@@ -265,6 +436,31 @@ class Post(models.Model):
     coins = models.CharField(max_length=100, default='')
     level = models.CharField(max_length=50, default='')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'created_at']),
+            # Boutique (marketplace_utils) : un index par tri, avec ou sans filtre de jeu
+            models.Index(fields=['created_at', 'id'], name='post_newest_idx'),
+            models.Index(fields=['game_type', 'created_at', 'id'], name='post_game_newest_idx'),
+            models.Index(fields=['price', 'id'], name='post_price_idx'),
+            models.Index(fields=['game_type', 'price', 'id'], name='post_game_price_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Jeu, prix ou statut ont pu changer : facettes de la boutique et résumé du vendeur périmés
+        from .marketplace_utils import invalidate_facets
+        from .profile_utils import invalidate_profile_summary
+        invalidate_facets()
+        invalidate_profile_summary(self.author_id)
+
+    def delete(self, *args, **kwargs):
+        from .marketplace_utils import invalidate_facets
+        from .profile_utils import invalidate_profile_summary
+        invalidate_facets()
+        invalidate_profile_summary(self.author_id)
+        return super().delete(*args, **kwargs)
+
     def get_game_display_name(self):
         if self.game_type == 'other' and self.custom_game_name:
             return self.custom_game_name
@@ -331,6 +527,30 @@ class Transaction(models.Model):
     account_verified_before = models.BooleanField(default=False)
     account_verified_after = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['buyer', 'created_at']),
+            models.Index(fields=['seller', 'created_at']),
+            models.Index(fields=['status', 'security_period_end']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_status = instance.__dict__.get('status')
+        return instance
+
+    def save(self, *args, **kwargs):
+        status_changed = getattr(self, '_saved_status', None) != self.status
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if status_changed:
+                # Litige, remboursement ou annulation : évaluations système du vendeur et de
+                # l'acheteur (la réussite est accordée à la libération du séquestre)
+                from .reputation_utils import record_transaction_outcome
+                record_transaction_outcome(self)
+        self._saved_status = self.status
+
     def __str__(self):
         return f"Transaction {self.id} - {self.buyer.username} -> {self.seller.username}"
 
@@ -585,6 +805,9 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
 
     def __str__(self):
         return f"Order #{self.order_number}"
@@ -680,35 +903,46 @@ class UserReputation(models.Model):
     last_updated = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .profile_utils import invalidate_profile_summary
+        invalidate_profile_summary(self.user_id)
+
     def get_seller_badge(self):
         from .badge_config import get_seller_badge
         return get_seller_badge(float(self.seller_score))
 
     def update_reputation(self):
-        from .badge_config import get_seller_badge
-        
-        # Calcul du score vendeur avec facteur de confiance
-        if self.seller_total_transactions > 0:
-            base_score = (self.seller_successful_transactions / self.seller_total_transactions) * 100
-            confidence_factor = min(self.seller_total_transactions / 10, 1.0)
-            volume_adjusted_score = base_score * confidence_factor
-            
-            # Obtenir le badge potentiel et son facteur
-            potential_badge = get_seller_badge(volume_adjusted_score)
-            badge_factor = potential_badge.get('factor', 1.0) if potential_badge else 1.0
-            
-            # Score final avec facteur de badge
-            self.seller_score = volume_adjusted_score * badge_factor
-            
-            # Badge final
-            final_badge = get_seller_badge(self.seller_score)
-            self.seller_badge = final_badge['level'] if final_badge else 'bronze'
-        
+        """Recalcule score et badge depuis les compteurs (reputation_utils.refresh_scores)"""
+        from .reputation_utils import refresh_scores
+        refresh_scores(self)
         self.save()
 
     def __str__(self):
         return f"Reputation for {self.user.username}"
 
+class SellerRank(models.Model):
+    """Classement des vendeurs, recalculé périodiquement (refresh_seller_leaderboard)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='seller_rank')
+    rank = models.PositiveIntegerField(unique=True)
+    score = models.FloatField()
+    badge_level = models.CharField(max_length=50)
+    total_transactions = models.IntegerField(default=0)
+    successful_transactions = models.IntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['rank']
+
+    def __str__(self):
+        return f"#{self.rank} {self.user.username} ({self.score:.1f})"
+
+    @property
+    def badge(self):
+        """Badge vendeur (badge_config) correspondant à badge_level"""
+        from .badge_config import get_badge_by_level
+        return get_badge_by_level(self.badge_level)
+
 class UserRating(models.Model):
     RATING_TYPE_CHOICES = [
         ('seller', 'Vendeur'),
@@ -734,6 +968,28 @@ class UserRating(models.Model):
     class Meta:
         unique_together = ['user', 'transaction', 'rating_type']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        rating = super().from_db(db, field_names, values)
+        # Issue enregistrée, pour appliquer le bon delta aux compteurs de réputation
+        rating._saved_outcome = rating.__dict__.get('outcome')
+        return rating
+
+    def save(self, *args, **kwargs):
+        old_outcome = getattr(self, '_saved_outcome', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old_outcome != self.outcome:
+                from .reputation_utils import apply_rating_change
+                apply_rating_change(self.user_id, self.rating_type, old_outcome, self.outcome)
+        self._saved_outcome = self.outcome
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            from .reputation_utils import apply_rating_change
+            apply_rating_change(self.user_id, self.rating_type, getattr(self, '_saved_outcome', self.outcome), None)
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f"{self.user.username} - {self.rating_type} - {self.outcome}"
 
@@ -771,6 +1027,10 @@ class Notification(models.Model):
         ('group_invite', 'Invitation de groupe'),
         ('friend_request', "Demande d'ami"),
         ('friend_accept', 'Amitié acceptée'),
+        ('appreciation', 'Appréciation de highlight'),
+        ('comment', 'Commentaire de highlight'),
+        ('new_subscriber', 'Nouvel abonné'),
+        ('new_highlight', "Nouveau highlight d'un abonnement"),
     ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
@@ -781,12 +1041,34 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_read = models.BooleanField(default=False)
     
+    # Regroupement (notification_dispatch_utils) : une seule notification non lue
+    # par (utilisateur, group_key), ex. "appreciation:<id du highlight>"
+    group_key = models.CharField(max_length=100, blank=True)
+    actor_count = models.IntegerField(default=1)
+    actor_ids = models.JSONField(default=list, blank=True, help_text="Acteurs distincts regroupés (actor_count = leur nombre)")
+    
     # Relations optionnelles
     transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='notifications', null=True, blank=True)
     message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='notifications', null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at']),
+            models.Index(fields=['user', 'created_at', 'id']),
+            models.Index(fields=['group_key', 'user'], condition=models.Q(is_read=False), name='notification_unread_group_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Création ou lecture : le compteur de non lues en cache est périmé
+        from .notification_utils import invalidate_unread_count
+        invalidate_unread_count(self.user_id)
+
+    def delete(self, *args, **kwargs):
+        from .notification_utils import invalidate_unread_count
+        invalidate_unread_count(self.user_id)
+        return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"Notification for {self.user.username}: {self.title}"
@@ -888,19 +1170,13 @@ class GroupMessage(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['group', 'created_at']),
+        ]
 
     def __str__(self):
         return f"Group message from {self.sender.username} in {self.group.name}"
 
-class GroupMessageRead(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
-    message = models.ForeignKey(GroupMessage, on_delete=models.CASCADE, related_name='read_by')
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='read_group_messages')
-    read_at = models.DateTimeField(auto_now_add=True)
-
-    class Meta:
-        unique_together = ['message', 'user']
-
 class PrivateConversation(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
     user1 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='private_chats_as_user1')
@@ -922,17 +1198,51 @@ class PrivateMessage(models.Model):
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_private_messages')
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)
-    read_at = models.DateTimeField(null=True, blank=True)
     is_edited = models.BooleanField(default=False)
     edited_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['conversation', 'created_at']),
+        ]
 
     def __str__(self):
         return f"Private message from {self.sender.username}"
 
+class InboxEntry(models.Model):
+    """Résumé d'une conversation ou d'un groupe dans la boîte de réception d'un utilisateur (inbox_utils)"""
+    KIND_CHOICES = [
+        ('private', 'Conversation privée'),
+        ('group', 'Groupe'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inbox_entries')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    conversation = models.ForeignKey(PrivateConversation, on_delete=models.CASCADE, null=True, blank=True, related_name='inbox_entries')
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, null=True, blank=True, related_name='inbox_entries')
+    other_user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    last_message_preview = models.CharField(max_length=100, blank=True)
+    last_message_sender_name = models.CharField(max_length=150, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    unread_count = models.IntegerField(default=0)
+    # Filigrane de lecture : les messages créés jusqu'à cette date sont lus
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    member_count = models.IntegerField(default=0)
+    is_admin = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'conversation'], name='unique_inbox_conversation'),
+            models.UniqueConstraint(fields=['user', 'group'], name='unique_inbox_group'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'kind', '-last_message_at']),
+        ]
+
+    def __str__(self):
+        return f"Inbox {self.user.username} - {self.kind}"
+
 # Modèles d'amitié
 class FriendRequest(models.Model):
     STATUS_CHOICES = [
@@ -974,6 +1284,23 @@ class Friendship(models.Model):
     def __str__(self):
         return f"Friendship between {self.user1.username} and {self.user2.username}"
 
+class FriendRecommendation(models.Model):
+    """Recommandation d'ami précalculée (commande compute_friend_recommendations)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='friend_recommendations')
+    candidate = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    common_games = models.JSONField(default=list, blank=True)
+    computed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['user', 'candidate']
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate_id} recommandé à {self.user_id} ({self.score:.2f})"
+
 # Modèles d'escrow et payout (existants)
 class EscrowTransaction(models.Model):
     STATUS_CHOICES = [
@@ -1011,7 +1338,16 @@ class PayoutRequest(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     cinetpay_payout_id = models.CharField(max_length=100, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Réservation par process_escrow : une demande « en cours » plus ancienne que
+    # ESCROW_PAYOUT_TIMEOUT_MINUTES est reprise (escrow_utils.recover_stuck_payouts)
+    processing_started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'processing_started_at']),
+        ]
+
     def __str__(self):
         return f"Payout {self.id} - {self.status}"
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+Diffusion groupée des notifications sociales (fan-out à l'écriture)
+
+Les vues ne créent plus de notifications elles-mêmes : elles déposent un
+événement (appréciation, commentaire, abonnement, message de groupe,
+nouveau Highlight) dans un tampon en mémoire du processus, en temps
+constant quel que soit le nombre d'abonnés ou de membres concernés.
+
+Les événements sont fusionnés par (type, cible, audience) : dix
+appréciations du même Highlight donnent une seule entrée « alice et 9
+autres personnes ont apprécié votre highlight ». Au vidage, un thread
+d'arrière-plan :
+
+- résout les audiences (membres d'un groupe, abonnés d'un auteur) en une
+  requête par type d'audience ;
+- met à jour les notifications non lues de même group_key (acteurs
+  distincts, texte, date) par bulk_update : un acteur déjà compté lors
+  d'un vidage précédent n'est pas recompté ;
+- crée les autres par bulk_create ;
+- invalide les compteurs de non lues en cache (notification_utils).
+
+Le tampon est vidé par le minuteur d'arrière-plan, NOTIFICATIONS_FLUSH_INTERVAL
+secondes après le premier événement en attente, ou immédiatement (toujours
+hors du thread de la requête) dès qu'il atteint NOTIFICATIONS_FLUSH_SIZE
+événements ; il l'est aussi à l'arrêt du processus.
+"""
+
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import GroupMembership, Notification, UserSubscription
+from .notification_utils import invalidate_unread_count
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 500
+
+# Titre et texte (au singulier, au pluriel) de chaque type d'événement
+TEMPLATES = {
+    'appreciation': ('Nouvelle appréciation', 'a apprécié votre highlight', 'ont apprécié votre highlight'),
+    'comment': ('Nouveau commentaire', 'a commenté votre highlight', 'ont commenté votre highlight'),
+    'new_subscriber': ('Nouvel abonné', "s'est abonné à vos highlights", 'se sont abonnés à vos highlights'),
+    'new_highlight': ('Nouveau highlight', 'a publié un nouveau highlight', 'ont publié de nouveaux highlights'),
+    'group_message': ('Message de groupe', 'a écrit dans {target}', 'ont écrit dans {target}'),
+}
+
+_lock = threading.Lock()
+# (type, id de la cible, audience) -> {'label': str, 'actors': {actor_id: nom}} (ordre d'arrivée)
+_pending = {}
+_pending_events = 0
+_timer = None
+_timer_delay = None
+
+def _flush_size():
+    return getattr(settings, 'NOTIFICATIONS_FLUSH_SIZE', 100)
+
+def _flush_interval():
+    return getattr(settings, 'NOTIFICATIONS_FLUSH_INTERVAL', 2)
+
+# ===== Événements =====
+
+def notify_appreciation(highlight, actor):
+    if highlight.author_id != actor.id:
+        _enqueue('appreciation', highlight.id, actor, ('user', highlight.author_id))
+
+def notify_comment(highlight, actor):
+    if highlight.author_id != actor.id:
+        _enqueue('comment', highlight.id, actor, ('user', highlight.author_id))
+
+def notify_subscription(subscribed_to, actor):
+    _enqueue('new_subscriber', subscribed_to.id, actor, ('user', subscribed_to.id))
+
+def notify_new_highlight(highlight):
+    """Prévient tous les abonnés de l'auteur (résolus au vidage)"""
+    _enqueue('new_highlight', highlight.author_id, highlight.author, ('subscribers', highlight.author_id))
+
+def notify_group_message(group, actor):
+    """Prévient tous les membres actifs du groupe sauf l'expéditeur (résolus au vidage)"""
+    _enqueue('group_message', group.id, actor, ('group_members', group.id), label=group.name)
+
+def _enqueue(kind, target_id, actor, audience, label=''):
+    global _pending_events
+    key = (kind, str(target_id), audience)
+    with _lock:
+        entry = _pending.setdefault(key, {'label': label, 'actors': {}})
+        entry['actors'].pop(actor.id, None)
+        entry['actors'][actor.id] = actor.username  # le dernier acteur en fin de dict
+        _pending_events += 1
+        # Seuil atteint : vidage immédiat, mais par le minuteur (hors du thread de la requête)
+        _schedule_flush(0 if _pending_events >= _flush_size() else _flush_interval())
+
+def _schedule_flush(delay):
+    """
+    Démarre le minuteur de vidage (appelé sous _lock) ; un minuteur déjà
+    lancé n'est remplacé que par un délai plus court.
+    """
+    global _timer, _timer_delay
+    if _timer is not None:
+        if _timer_delay <= delay:
+            return
+        _timer.cancel()
+    _timer = threading.Timer(delay, _flush_from_timer)
+    _timer.daemon = True
+    _timer_delay = delay
+    _timer.start()
+
+def _flush_from_timer():
+    try:
+        flush_notifications()
+    finally:
+        # Ce thread a sa propre connexion : la fermer une fois le lot écrit
+        close_old_connections()
+
+def _take_pending():
+    global _timer, _timer_delay, _pending, _pending_events
+    with _lock:
+        if _timer is not None:
+            _timer.cancel()
+            _timer = _timer_delay = None
+        batch, _pending, _pending_events = _pending, {}, 0
+    return batch
+
+def flush_notifications():
+    """Écrit les notifications en attente ; retourne (créées, mises à jour)"""
+    batch = _take_pending()
+    if not batch:
+        return 0, 0
+    try:
+        return _write_batch(batch)
+    except Exception as e:
+        logger.error(f"Erreur lors de l'écriture des notifications en attente ({len(batch)}): {e}")
+        return 0, 0
+
+# ===== Écriture =====
+
+def _resolve_audiences(audiences):
+    """{audience: [user_id, ...]} avec une requête par type d'audience"""
+    recipients = {audience: [] for audience in audiences}
+    for audience in audiences:
+        if audience[0] == 'user':
+            recipients[audience].append(audience[1])
+    group_ids = [audience[1] for audience in audiences if audience[0] == 'group_members']
+    if group_ids:
+        for group_id, user_id in GroupMembership.objects.filter(
+            group_id__in=group_ids, is_active=True
+        ).values_list('group_id', 'user_id'):
+            recipients[('group_members', group_id)].append(user_id)
+    author_ids = [audience[1] for audience in audiences if audience[0] == 'subscribers']
+    if author_ids:
+        for author_id, subscriber_id in UserSubscription.objects.filter(
+            subscribed_to_id__in=author_ids
+        ).values_list('subscribed_to_id', 'subscriber_id'):
+            recipients[('subscribers', author_id)].append(subscriber_id)
+    return recipients
+
+def _describe(kind, label, actor_name, actor_count):
+    title, singular, plural = TEMPLATES[kind]
+    if actor_count == 1:
+        return title, f"{actor_name} {singular.format(target=label)}"
+    others = actor_count - 1
+    suffix = 'autre personne' if others == 1 else 'autres personnes'
+    return title, f"{actor_name} et {others} {suffix} {plural.format(target=label)}"
+
+def _write_batch(batch):
+    recipients = _resolve_audiences({audience for _, _, audience in batch})
+
+    # (destinataire, group_key) -> (type, libellé, [(id, nom) des acteurs hors destinataire])
+    wanted = {}
+    for (kind, target_id, audience), entry in batch.items():
+        for user_id in recipients[audience]:
+            actors = [(actor_id, name) for actor_id, name in entry['actors'].items() if actor_id != user_id]
+            if actors:
+                wanted[(user_id, f'{kind}:{target_id}')] = (kind, entry['label'], actors)
+    if not wanted:
+        return 0, 0
+
+    now = timezone.now()
+    existing = {
+        (notification.user_id, notification.group_key): notification
+        for notification in Notification.objects.filter(
+            is_read=False,
+            group_key__in={group_key for _, group_key in wanted},
+            user_id__in={user_id for user_id, _ in wanted},
+        ).only('id', 'user_id', 'group_key', 'actor_count', 'actor_ids')
+    }
+
+    to_create, to_update = [], []
+    for (user_id, group_key), (kind, label, actors) in wanted.items():
+        notification = existing.get((user_id, group_key))
+        if notification is None:
+            notification = Notification(user_id=user_id, type=kind, group_key=group_key, actor_ids=[])
+            to_create.append(notification)
+        else:
+            to_update.append(notification)
+        # Ensemble des acteurs distincts : un acteur revenu après un vidage n'est pas recompté
+        actor_ids = list(notification.actor_ids or [])
+        actor_ids += [actor_id for actor_id, _ in actors if actor_id not in actor_ids]
+        notification.actor_ids = actor_ids
+        notification.actor_count = len(actor_ids)
+        notification.title, notification.content = _describe(kind, label, actors[-1][1], notification.actor_count)
+        notification.created_at = now
+
+    with transaction.atomic():
+        Notification.objects.bulk_create(to_create, batch_size=WRITE_BATCH_SIZE)
+        Notification.objects.bulk_update(
+            to_update, ['actor_count', 'actor_ids', 'title', 'content', 'created_at'], batch_size=WRITE_BATCH_SIZE
+        )
+
+    # bulk_create ne passe pas par Notification.save()
+    invalidate_unread_count(*{notification.user_id for notification in to_create})
+    return len(to_create), len(to_update)
+
+atexit.register(flush_notifications)
@@ -0,0 +1,62 @@
+"""
+Compteur de notifications non lues et lecture des notifications
+
+Le badge de static/js/notifications.js interroge /notifications/unread/count/
+toutes les 30 secondes depuis chaque onglet ouvert. Le nombre de non lues
+est donc gardé en cache par utilisateur : la requête COUNT sur l'index
+(user, is_read, created_at) n'est refaite qu'après une invalidation.
+
+Le cache est invalidé à chaque création ou lecture d'une notification
+(Notification.save / delete) et par les écritures groupées de ce module
+(mark_all_read), qui ne passent pas par save().
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+from .pagination_utils import keyset_paginate
+
+UNREAD_CACHE_KEY = 'notifications:unread:{user_id}'
+
+def _cache_ttl():
+    return getattr(settings, 'NOTIFICATIONS_UNREAD_CACHE_TTL', 300)
+
+def invalidate_unread_count(*user_ids):
+    """Oublie le compteur en cache des utilisateurs donnés"""
+    cache.delete_many([UNREAD_CACHE_KEY.format(user_id=user_id) for user_id in user_ids])
+
+def get_unread_count(user):
+    """Nombre de notifications non lues (cache, sinon un COUNT indexé)"""
+    key = UNREAD_CACHE_KEY.format(user_id=user.id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user=user, is_read=False).count()
+        cache.set(key, count, _cache_ttl())
+    return count
+
+def mark_all_read(user):
+    """Marque toutes les notifications de l'utilisateur comme lues (un UPDATE)"""
+    updated = Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+    cache.set(UNREAD_CACHE_KEY.format(user_id=user.id), 0, _cache_ttl())
+    return updated
+
+def get_notifications_page(user, limit, before=None):
+    """
+    Page de notifications (plus récentes d'abord) paginée par curseur, avec
+    la transaction et le message liés chargés dans la même requête
+    """
+    queryset = Notification.objects.filter(user=user).select_related('transaction', 'message__chat')
+    return keyset_paginate(queryset, limit, before=before)
+
+def notification_data(notification):
+    """Représentation JSON d'une notification"""
+    return {
+        'id': str(notification.id),
+        'type': notification.type,
+        'title': notification.title,
+        'content': notification.content,
+        'created_at': notification.created_at.isoformat(),
+        'is_read': notification.is_read,
+        'transaction_id': str(notification.transaction_id) if notification.transaction_id else None,
+    }
@@ -0,0 +1,129 @@
+"""
+Pagination par curseur (keyset) pour les feeds et les messages
+
+Un curseur est un jeton opaque (signé via django.core.signing) contenant les
+valeurs des colonnes de tri de la ligne de référence, par défaut
+(created_at, id). Chaque page est un simple parcours d'index borné, sans
+COUNT(*) ni OFFSET, et les lignes insérées pendant le défilement ne
+provoquent ni doublons ni trous.
+
+Le curseur signe aussi les colonnes de tri et, le cas échéant, une portée
+(ex. le tri de la boutique) : un curseur présenté avec un autre ordre ou
+une autre portée est refusé (InvalidCursor) au lieu d'être comparé à des
+colonnes d'un autre type.
+"""
+
+import datetime
+import decimal
+import json
+import uuid
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+CURSOR_SALT = 'blizzgame.pagination'
+DEFAULT_ORDERING = ('created_at', 'id')
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(obj, ordering=DEFAULT_ORDERING, scope=None):
+    """Construit le curseur opaque d'un objet pour l'ordre (et la portée) donnés"""
+    payload = {'o': list(ordering), 'v': [getattr(obj, field) for field in ordering]}
+    if scope:
+        payload['s'] = scope
+    return signing.dumps(payload, salt=CURSOR_SALT, serializer=_CursorSerializer)
+
+def decode_cursor(token, ordering=DEFAULT_ORDERING, scope=None):
+    """
+    Retourne les valeurs de tri contenues dans le curseur (InvalidCursor si
+    altéré, ou émis pour un autre ordre ou une autre portée)
+    """
+    try:
+        payload = signing.loads(token, salt=CURSOR_SALT, serializer=_CursorSerializer)
+    except signing.BadSignature as e:
+        raise InvalidCursor('Curseur invalide') from e
+    if (
+        not isinstance(payload, dict)
+        or payload.get('o') != list(ordering)
+        or payload.get('s') != (scope or None)
+        or not isinstance(payload.get('v'), list)
+        or len(payload['v']) != len(ordering)
+    ):
+        raise InvalidCursor('Curseur invalide')
+    return payload['v']
+
+def _keyset_filter(ordering, values, newer):
+    """
+    Condition lexicographique (a, b, c) < (x, y, z) pour un tri décroissant,
+    ou > quand newer=True.
+    """
+    lookup = 'gt' if newer else 'lt'
+    condition = Q()
+    for i, field in enumerate(ordering):
+        clause = Q(**{f'{field}__{lookup}': values[i]})
+        for previous, value in zip(ordering[:i], values[:i]):
+            clause &= Q(**{previous: value})
+        condition |= clause
+    return condition
+
+def keyset_paginate(queryset, limit, before=None, after=None, ordering=DEFAULT_ORDERING, ascending=False, scope=None):
+    """
+    Pagine un queryset trié par `ordering` décroissant (plus récent d'abord),
+    ou croissant avec ascending=True (ex. prix croissant). `scope` distingue
+    des paginations de même ordre (ex. prix croissant / décroissant).
+
+    before : curseur -> éléments suivants dans l'ordre d'affichage (défilement)
+    after  : curseur -> éléments précédents (nouveautés)
+
+    Retourne un dict avec les éléments (toujours dans l'ordre d'affichage),
+    `has_more` dans la direction demandée, et les curseurs `before`/`after`
+    des bornes de la page.
+    """
+    newer = bool(after) and not before
+    token = after if newer else before
+    # Sens de parcours de l'index : croissant pour les nouveautés d'un tri décroissant,
+    # ou pour le défilement d'un tri croissant
+    upward = newer != ascending
+    if token:
+        try:
+            queryset = queryset.filter(_keyset_filter(ordering, decode_cursor(token, ordering, scope), upward))
+        except (ValidationError, ValueError, TypeError) as e:
+            # Valeur signée mais inutilisable pour ces colonnes
+            raise InvalidCursor('Curseur invalide') from e
+
+    if upward:
+        queryset = queryset.order_by(*ordering)
+    else:
+        queryset = queryset.order_by(*[f'-{field}' for field in ordering])
+
+    items = list(queryset[:limit + 1])
+    has_more = len(items) > limit
+    items = items[:limit]
+    if newer:
+        # Les plus proches du curseur d'abord, puis on remet dans l'ordre d'affichage
+        items.reverse()
+
+    return {
+        'items': items,
+        'has_more': has_more,
+        'before': encode_cursor(items[-1], ordering, scope) if items else before,
+        'after': encode_cursor(items[0], ordering, scope) if items else after,
+    }
+
+def _encode_value(value):
+    # isoformat complet : les microsecondes doivent être conservées pour comparer exactement
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    raise TypeError(f'Valeur de curseur non sérialisable: {value!r}')
+
+class _CursorSerializer:
+    """Sérialiseur JSON acceptant datetimes, UUID et décimaux (pour signing.dumps)"""
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=_encode_value, separators=(',', ':')).encode('latin-1')
+
+    def loads(self, data):
+        return json.loads(data.decode('latin-1'))
@@ -0,0 +1,62 @@
+"""
+Résumé de la page profil vendeur (vue profile)
+
+Les chiffres de la page (annonces, ventes, note et badge vendeur, achats
+échoués) sont calculés en deux requêtes, un agrégat sur Post et la ligne
+UserReputation, puis gardés en cache par utilisateur. Le cache est
+invalidé à chaque écriture qui les change : Post.save / delete (auteur) et
+UserReputation.save.
+
+Les compteurs sociaux viennent du graphe social en cache
+(social_graph_utils) et l'histogramme des appréciations des champs du
+Profile : aucun des deux ne déclenche de requête.
+
+Les annonces elles-mêmes sont paginées par curseur keyset (index
+(author, created_at)), images préchargées.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Post, UserReputation
+from .pagination_utils import keyset_paginate
+from .reputation_utils import reputation_summary_data
+from .social_graph_utils import get_counts
+
+SUMMARY_CACHE_KEY = 'profile:summary:{user_id}'
+
+def _summary_ttl():
+    return getattr(settings, 'PROFILE_SUMMARY_CACHE_TTL', 3600)
+
+def invalidate_profile_summary(*user_ids):
+    """Oublie le résumé en cache des utilisateurs donnés"""
+    cache.delete_many([SUMMARY_CACHE_KEY.format(user_id=user_id) for user_id in user_ids if user_id])
+
+def load_profile_summary(user_id):
+    """Calcule le résumé depuis la base (deux requêtes)"""
+    listings = Post.objects.filter(author_id=user_id).aggregate(
+        listings_count=Count('id'),
+        sales_count=Count('id', filter=Q(is_sold=True)),
+    )
+    reputation = UserReputation.objects.filter(user_id=user_id).first()
+    return {
+        'listings_count': listings['listings_count'],
+        'sales_count': listings['sales_count'],
+        'rating': round(float(reputation.seller_score), 1) if reputation else 0,
+        'reputation': reputation_summary_data(reputation),
+    }
+
+def get_profile_summary(user_id):
+    """Résumé de la page profil : partie agrégée en cache, compteurs sociaux du graphe en cache"""
+    key = SUMMARY_CACHE_KEY.format(user_id=user_id)
+    summary = cache.get(key)
+    if summary is None:
+        summary = load_profile_summary(user_id)
+        cache.set(key, summary, _summary_ttl())
+    return {**summary, 'social': get_counts(user_id)}
+
+def get_listings_page(user_id, limit, cursor=None):
+    """Annonces d'un vendeur, plus récentes d'abord (dict keyset_paginate)"""
+    posts = Post.objects.filter(author_id=user_id).prefetch_related('images')
+    return keyset_paginate(posts, limit, before=cursor)
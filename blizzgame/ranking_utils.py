@@ -0,0 +1,154 @@
+"""
+Classement du feed "Pour toi" des Highlights
+
+Les affinités (hashtags et auteurs) de chaque utilisateur sont stockées dans
+FeedAffinity et mises à jour à chaque appréciation ou commentaire. Le pool des
+Highlights actifs est petit (48h de durée de vie) : il est gardé en cache et
+scoré entièrement en mémoire, puis la liste ordonnée des IDs est mise en cache
+par utilisateur pour que les pages suivantes ne soient que des tranches.
+"""
+
+import math
+import logging
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import FeedAffinity, Highlight
+from .social_graph_utils import get_subscription_ids
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_POOL_CACHE_KEY = 'highlights:active_pool'
+ACTIVE_POOL_TTL = 60  # secondes
+RANKING_CACHE_KEY = 'highlights:ranking:{user_id}'
+RANKING_TTL = 600  # secondes
+
+# Variation d'affinité selon l'appréciation donnée (même ordre que les impacts de score)
+APPRECIATION_AFFINITY = {1: -1.0, 2: -0.4, 3: 0.2, 4: 0.4, 5: 0.6, 6: 1.0}
+COMMENT_AFFINITY = 0.5
+
+# Pondérations du score de classement
+HASHTAG_WEIGHT = 5.0
+AUTHOR_WEIGHT = 3.0
+SUBSCRIPTION_BONUS = 4.0
+RECENCY_WEIGHT = 3.0
+RECENCY_HALF_LIFE_HOURS = 12.0
+ENGAGEMENT_WEIGHT = 1.0
+
+# ===== Affinités utilisateur =====
+
+def _affinity_keys(highlight):
+    keys = [('hashtag', tag[:100]) for tag in (highlight.hashtags or [])]
+    keys.append(('author', str(highlight.author_id)))
+    return keys
+
+def add_affinity(user, highlight, delta):
+    """Ajoute delta aux affinités de l'utilisateur pour les hashtags et l'auteur du highlight"""
+    if not delta or highlight.author_id == user.id:
+        return
+    for kind, key in _affinity_keys(highlight):
+        lookup = {'user': user, 'kind': kind, 'key': key}
+        if FeedAffinity.objects.filter(**lookup).update(weight=F('weight') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                FeedAffinity.objects.create(weight=delta, **lookup)
+        except IntegrityError:
+            # Créée entre-temps par une requête concurrente
+            FeedAffinity.objects.filter(**lookup).update(weight=F('weight') + delta)
+
+def record_appreciation_affinity(user, highlight, new_level, old_level=None):
+    """Met à jour les affinités suite à une appréciation (nouvelle ou modifiée)"""
+    delta = APPRECIATION_AFFINITY.get(new_level, 0) - APPRECIATION_AFFINITY.get(old_level, 0)
+    add_affinity(user, highlight, delta)
+
+def record_comment_affinity(user, highlight):
+    """Met à jour les affinités suite à un commentaire"""
+    add_affinity(user, highlight, COMMENT_AFFINITY)
+
+def get_affinity_vectors(user):
+    """Retourne ({hashtag: poids}, {author_id: poids}) en une seule requête"""
+    hashtags, authors = {}, {}
+    for kind, key, weight in FeedAffinity.objects.filter(user=user).values_list('kind', 'key', 'weight'):
+        if kind == 'hashtag':
+            hashtags[key] = weight
+        else:
+            authors[int(key)] = weight
+    return hashtags, authors
+
+def get_top_affinities(user, kind, limit=10):
+    """Retourne les clés d'affinité les plus fortes d'un utilisateur (hashtags ou ids d'auteurs)"""
+    return list(
+        FeedAffinity.objects.filter(user=user, kind=kind, weight__gt=0)
+        .order_by('-weight')
+        .values_list('key', flat=True)[:limit]
+    )
+
+# ===== Pool des Highlights actifs =====
+
+def get_active_pool():
+    """Retourne les métadonnées des Highlights actifs non expirés (en cache)"""
+    pool = cache.get(ACTIVE_POOL_CACHE_KEY)
+    if pool is None:
+        pool = list(
+            Highlight.objects.filter(is_active=True, expires_at__gt=timezone.now()).values(
+                'id', 'author_id', 'hashtags', 'created_at', 'expires_at',
+                'appreciations_count', 'comments_count', 'shares_count',
+            )
+        )
+        cache.set(ACTIVE_POOL_CACHE_KEY, pool, ACTIVE_POOL_TTL)
+    return pool
+
+def invalidate_active_pool():
+    """À appeler quand un Highlight est créé, supprimé ou désactivé"""
+    cache.delete(ACTIVE_POOL_CACHE_KEY)
+
+# ===== Classement =====
+
+def score_pool(pool, hashtag_affinity, author_affinity, subscribed_ids, now=None):
+    """Score chaque Highlight du pool et retourne la liste des IDs triée par score décroissant"""
+    now = now or timezone.now()
+    half_life = RECENCY_HALF_LIFE_HOURS * 3600
+    scored = []
+    for item in pool:
+        if item['expires_at'] <= now:
+            continue
+        tags = item['hashtags'] or []
+        tag_score = 0.0
+        if tags and hashtag_affinity:
+            tag_score = sum(math.tanh(hashtag_affinity.get(tag, 0.0)) for tag in tags) / math.sqrt(len(tags))
+        author_id = item['author_id']
+        age = (now - item['created_at']).total_seconds()
+        score = (
+            HASHTAG_WEIGHT * tag_score
+            + AUTHOR_WEIGHT * math.tanh(author_affinity.get(author_id, 0.0))
+            + (SUBSCRIPTION_BONUS if author_id in subscribed_ids else 0.0)
+            + RECENCY_WEIGHT * 0.5 ** (age / half_life)
+            + ENGAGEMENT_WEIGHT * math.log1p(item['appreciations_count'] + item['comments_count'] + item['shares_count'])
+        )
+        scored.append((score, item['created_at'], item['id']))
+    scored.sort(reverse=True)
+    return [highlight_id for _, _, highlight_id in scored]
+
+def compute_ranking(user):
+    """Calcule et met en cache la liste ordonnée des IDs du feed "Pour toi" de l'utilisateur"""
+    hashtag_affinity, author_affinity = get_affinity_vectors(user)
+    subscribed_ids = get_subscription_ids(user.id)
+    ranking = score_pool(get_active_pool(), hashtag_affinity, author_affinity, subscribed_ids)
+    cache.set(RANKING_CACHE_KEY.format(user_id=user.id), ranking, RANKING_TTL)
+    return ranking
+
+def get_ranked_page_ids(user, page, per_page):
+    """
+    Retourne (ids de la page, nombre total) du feed "Pour toi".
+    La page 1 recalcule le classement ; les suivantes découpent la liste en cache.
+    """
+    ranking = None
+    if page > 1:
+        ranking = cache.get(RANKING_CACHE_KEY.format(user_id=user.id))
+    if ranking is None:
+        ranking = compute_ranking(user)
+    start = (page - 1) * per_page
+    return ranking[start:start + per_page], len(ranking)
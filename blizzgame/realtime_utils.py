@@ -0,0 +1,150 @@
+"""
+Diffusion en temps réel des messages de chat (Server-Sent Events)
+et lecture incrémentale (?since=) des messages
+
+Chaque conversation privée ou groupe est un canal. À l'envoi d'un message,
+send_private_message / send_group_message publient un marqueur (id et date
+du dernier message) dans le cache et réveillent les flux en attente du
+processus. Un flux inactif ne fait aucune requête SQL : il attend sur une
+condition et relit seulement le marqueur en cache, ce qui suffit aussi
+entre processus : le cache doit être partagé par tous les workers (CACHES
+dans settings), sinon un worker qui n'a pas traité l'envoi garde un
+marqueur périmé. Il ne charge les messages plus récents que son curseur que
+lorsque le marqueur change.
+
+Un flux dure CHAT_STREAM_LIFETIME secondes puis se ferme ; EventSource se
+reconnecte automatiquement en renvoyant le dernier id reçu (Last-Event-ID),
+qui est un curseur keyset (pagination_utils). Pendant ce temps il relit le
+marqueur toutes les CHAT_STREAM_POLL_SECONDS secondes et occupe son worker :
+le flux n'est servi que si CHAT_STREAM_ENABLED (serveur ASGI ou WSGI
+dimensionné, voir settings). Sinon l'endpoint répond 204, ce qui arrête
+EventSource, et les pages de chat interrogent ?since= toutes les
+CHAT_POLL_INTERVAL secondes.
+
+Le même marqueur permet aux requêtes ?since= de répondre sans lire aucun
+message quand rien de nouveau n'a été publié.
+"""
+
+import json
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+from .pagination_utils import encode_cursor, keyset_paginate
+
+MARKER_CACHE_KEY = 'chat:last_message:{channel}'
+MARKER_TTL = 24 * 3600  # secondes
+KEEPALIVE_SECONDS = 15
+BATCH_SIZE = 50
+
+_condition = threading.Condition()
+
+def private_channel(conversation_id):
+    return f'private:{conversation_id}'
+
+def group_channel(group_id):
+    return f'group:{group_id}'
+
+def stream_enabled():
+    return getattr(settings, 'CHAT_STREAM_ENABLED', False)
+
+def poll_interval():
+    """Intervalle (secondes) entre deux ?since= des pages de chat sans flux"""
+    return getattr(settings, 'CHAT_POLL_INTERVAL', 3)
+
+def _stream_lifetime():
+    return getattr(settings, 'CHAT_STREAM_LIFETIME', 30)
+
+def _stream_poll_seconds():
+    # Relecture du marqueur en cache (publications d'autres processus)
+    return getattr(settings, 'CHAT_STREAM_POLL_SECONDS', 1.0)
+
+def get_marker(channel):
+    """Retourne le marqueur du dernier message publié sur le canal, ou None"""
+    return cache.get(MARKER_CACHE_KEY.format(channel=channel))
+
+def get_or_load_marker(channel, queryset):
+    """
+    Retourne le marqueur du canal ; s'il est absent du cache, le reconstruit
+    depuis le message le plus récent de `queryset` (une ligne lue via l'index).
+    Un canal sans message a pour marqueur {'id': None, 'created_at': None}.
+    """
+    marker = get_marker(channel)
+    if marker is None:
+        latest = queryset.order_by('-created_at', '-id').values('id', 'created_at').first()
+        marker = {
+            'id': str(latest['id']) if latest else None,
+            'created_at': latest['created_at'].isoformat() if latest else None,
+        }
+        # add() et non set() : ne pas écraser un marqueur publié entre-temps
+        if not cache.add(MARKER_CACHE_KEY.format(channel=channel), marker, MARKER_TTL):
+            marker = get_marker(channel) or marker
+    return marker
+
+def publish(channel, message):
+    """Signale un nouveau message aux flux abonnés au canal"""
+    marker = {'id': str(message.id), 'created_at': message.created_at.isoformat()}
+    cache.set(MARKER_CACHE_KEY.format(channel=channel), marker, MARKER_TTL)
+    with _condition:
+        _condition.notify_all()
+    return marker
+
+def wait_for_marker_change(channel, marker, timeout):
+    """
+    Attend (au plus timeout secondes) que le marqueur du canal diffère de
+    `marker` ; retourne le nouveau marqueur, ou None à l'expiration.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        current = get_marker(channel)
+        if current != marker:
+            return current
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        with _condition:
+            _condition.wait(min(_stream_poll_seconds(), remaining))
+
+def fetch_since(queryset, cursor):
+    """Retourne (messages plus récents que le curseur, du plus ancien au plus récent, nouveau curseur)"""
+    new_messages = []
+    while True:
+        result = keyset_paginate(queryset, BATCH_SIZE, after=cursor)
+        new_messages.extend(reversed(result['items']))
+        cursor = result['after']
+        if not result['has_more']:
+            return new_messages, cursor
+
+def _format_event(event, data, event_id=None):
+    lines = []
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+def message_event_stream(channel, queryset, cursor, serialize):
+    """
+    Générateur SSE : envoie les messages de `queryset` plus récents que
+    `cursor` dès leur publication, puis se termine après la durée de vie du
+    flux. `serialize(message)` construit le dict JSON de chaque message.
+    """
+    yield 'retry: 2000\n\n'
+    deadline = time.monotonic() + _stream_lifetime()
+    marker = get_marker(channel)
+    check_now = True  # rattrapage des messages envoyés pendant la reconnexion
+    while True:
+        if check_now:
+            new_messages, cursor = fetch_since(queryset, cursor)
+            for message in new_messages:
+                yield _format_event('message', serialize(message), encode_cursor(message))
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        new_marker = wait_for_marker_change(channel, marker, min(KEEPALIVE_SECONDS, remaining))
+        check_now = new_marker is not None
+        if check_now:
+            marker = new_marker
+        else:
+            yield ': keepalive\n\n'
@@ -0,0 +1,150 @@
+"""
+Recommandations d'amis précalculées (page user_search sans recherche)
+
+La commande compute_friend_recommendations (à lancer périodiquement)
+charge le graphe en quelques requêtes groupées et note les candidats de
+chaque utilisateur :
+
+- jeux favoris en commun (index inversé jeu -> utilisateurs, borné à
+  CANDIDATES_PER_GAME inscrits récents par jeu) ;
+- abonnements communs : utilisateurs suivis par les personnes que l'on suit ;
+- l'utilisateur candidat est déjà abonné à nous ;
+- historique d'interactions : affinité d'auteur du feed (FeedAffinity),
+  dans les deux sens.
+
+Les TOP_K meilleurs candidats (hors amis, demandes en attente et soi-même)
+sont stockés dans FriendRecommendation. La page lit ensuite une liste
+triée sur l'index (user, -score) et retire à la volée les amis et
+demandes apparus depuis, via le graphe social en cache.
+"""
+
+import heapq
+import math
+from collections import defaultdict
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .models import FeedAffinity, FriendRecommendation, FriendRequest, Friendship, Profile, UserSubscription
+from .social_graph_utils import get_friend_ids, get_pending_ids
+
+TOP_K = 30
+CANDIDATES_PER_GAME = 500
+
+GAME_WEIGHT = 2.0
+MUTUAL_WEIGHT = 1.5
+FOLLOWS_YOU_WEIGHT = 3.0
+INTERACTION_WEIGHT = 2.0
+
+def _load_graph():
+    """Toutes les données du calcul, une requête par table"""
+    games = {
+        user_id: set(favorite_games or [])
+        for user_id, favorite_games in Profile.objects.values_list('user_id', 'favorite_games').iterator()
+    }
+    game_index = defaultdict(list)
+    for user_id in sorted(games, reverse=True):  # inscrits les plus récents d'abord
+        for game in games[user_id]:
+            if len(game_index[game]) < CANDIDATES_PER_GAME:
+                game_index[game].append(user_id)
+
+    following, followers = defaultdict(set), defaultdict(set)
+    for subscriber_id, subscribed_to_id in UserSubscription.objects.values_list(
+        'subscriber_id', 'subscribed_to_id'
+    ).iterator():
+        following[subscriber_id].add(subscribed_to_id)
+        followers[subscribed_to_id].add(subscriber_id)
+
+    excluded = defaultdict(set)
+    for user1_id, user2_id in Friendship.objects.values_list('user1_id', 'user2_id').iterator():
+        excluded[user1_id].add(user2_id)
+        excluded[user2_id].add(user1_id)
+    for from_id, to_id in FriendRequest.objects.filter(status='pending').values_list(
+        'from_user_id', 'to_user_id'
+    ).iterator():
+        excluded[from_id].add(to_id)
+        excluded[to_id].add(from_id)
+
+    interactions = defaultdict(lambda: defaultdict(float))
+    for user_id, key, weight in FeedAffinity.objects.filter(kind='author', weight__gt=0).values_list(
+        'user_id', 'key', 'weight'
+    ).iterator():
+        # Affinité dans les deux sens : on a apprécié ses highlights, ou lui les nôtres
+        interactions[user_id][int(key)] += weight
+        interactions[int(key)][user_id] += weight
+
+    return games, game_index, following, followers, excluded, interactions
+
+def score_candidates(user_id, graph, top_k=TOP_K):
+    """Retourne [(score, candidate_id, jeux communs)] des top_k candidats d'un utilisateur"""
+    games, game_index, following, followers, excluded, interactions = graph
+    my_games = games.get(user_id, set())
+
+    common = defaultdict(list)
+    for game in my_games:
+        for candidate_id in game_index.get(game, ()):
+            common[candidate_id].append(game)
+
+    mutual = defaultdict(int)
+    for followed_id in following.get(user_id, ()):
+        for candidate_id in following.get(followed_id, ()):
+            mutual[candidate_id] += 1
+
+    my_followers = followers.get(user_id, set())
+    my_interactions = interactions.get(user_id, {})
+    candidates = (set(common) | set(mutual) | my_followers | set(my_interactions)) & games.keys()
+    candidates -= excluded.get(user_id, set()) | {user_id}
+
+    scored = []
+    for candidate_id in candidates:
+        score = (
+            GAME_WEIGHT * len(common.get(candidate_id, ()))
+            + MUTUAL_WEIGHT * math.log1p(mutual.get(candidate_id, 0))
+            + (FOLLOWS_YOU_WEIGHT if candidate_id in my_followers else 0.0)
+            + INTERACTION_WEIGHT * math.tanh(my_interactions.get(candidate_id, 0.0))
+        )
+        if score > 0:
+            scored.append((score, -candidate_id, sorted(common.get(candidate_id, ()))))
+    return [(score, -negative_id, shared) for score, negative_id, shared in heapq.nlargest(top_k, scored)]
+
+def compute_recommendations(user_ids=None, top_k=TOP_K, batch_size=1000):
+    """
+    Recalcule les recommandations des utilisateurs donnés (tous les profils
+    par défaut) ; retourne le nombre de lignes écrites.
+    """
+    graph = _load_graph()
+    if user_ids is None:
+        user_ids = list(graph[0])
+
+    rows = [
+        FriendRecommendation(user_id=user_id, candidate_id=candidate_id, score=score, common_games=shared)
+        for user_id in user_ids
+        for score, candidate_id, shared in score_candidates(user_id, graph, top_k)
+    ]
+    with transaction.atomic():
+        FriendRecommendation.objects.filter(user_id__in=user_ids).delete()
+        FriendRecommendation.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+def get_recommendations(user, limit=10):
+    """
+    Liste (utilisateur, nombre de jeux communs, jeux communs) pour la page
+    user_search : recommandations précalculées, complétées par les inscrits
+    les plus récents (parcours de la clé primaire, sans tri aléatoire).
+    """
+    excluded = set(get_friend_ids(user.id) | get_pending_ids(user.id)) | {user.id}
+    rows = FriendRecommendation.objects.filter(user=user).exclude(
+        candidate_id__in=excluded
+    ).select_related('candidate', 'candidate__profile').order_by('-score')[:limit]
+    recommendations = [(row.candidate, len(row.common_games), row.common_games) for row in rows]
+
+    if len(recommendations) < limit:
+        my_profile = getattr(user, 'profile', None)
+        my_games = set(my_profile.favorite_games or []) if my_profile else set()
+        recommended_ids = {candidate.id for candidate, _, _ in recommendations}
+        newest = User.objects.exclude(id__in=excluded | recommended_ids).filter(
+            profile__isnull=False
+        ).select_related('profile').order_by('-id')[:limit - len(recommendations)]
+        for candidate in newest:
+            shared = sorted(my_games & set(candidate.profile.favorite_games or []))
+            recommendations.append((candidate, len(shared), shared))
+    return recommendations
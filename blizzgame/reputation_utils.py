@@ -0,0 +1,223 @@
+"""
+Moteur de réputation vendeur / acheteur (UserReputation)
+
+Les évaluations UserRating sont la seule source des compteurs : chaque
+création, changement d'issue ou suppression d'une évaluation (hooks de
+UserRating.save / delete) applique un delta par F-expressions sur la ligne
+UserReputation de l'utilisateur évalué, puis recalcule son score et son
+badge (badge_config) dans la même transaction.
+
+Les changements de statut d'une Transaction (hook de Transaction.save)
+créent ou mettent à jour les évaluations système du vendeur et de
+l'acheteur selon TRANSACTION_OUTCOMES (litige, remboursement, paiement
+annulé). La réussite n'est pas accordée au passage à « terminée », qui
+précède la période de sécurité pendant laquelle un litige reste possible,
+mais à la libération du séquestre (escrow_utils.release_escrow_batch,
+RELEASE_OUTCOMES). Chaque rôle n'a qu'une évaluation par transaction : une
+nouvelle issue remplace la précédente, sans double comptage.
+
+La commande rebuild_reputation recalcule tous les compteurs depuis
+UserRating (une requête GROUP BY, bulk_update par lots), par exemple après
+des suppressions en cascade qui ne passent pas par les hooks.
+"""
+
+from decimal import Decimal
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, Q
+
+from .badge_config import SELLER_BADGE_FACTORS, SELLER_BADGES, get_seller_badge, get_seller_badge_index
+from .models import UserRating, UserReputation
+
+CONFIDENCE_THRESHOLD = 10  # transactions avant un score à pleine confiance
+
+# Issue d'une évaluation -> compteur incrémenté (en plus du total)
+SELLER_COUNTERS = {
+    'success': 'seller_successful_transactions',
+    'failed': 'seller_failed_transactions',
+    'fraudulent': 'seller_fraudulent_transactions',
+}
+BUYER_COUNTERS = {
+    'success': 'buyer_successful_transactions',
+    'failed': 'buyer_failed_transactions',
+    'disputed': 'buyer_disputed_transactions',
+}
+COUNTERS = {'seller': SELLER_COUNTERS, 'buyer': BUYER_COUNTERS}
+TOTALS = {'seller': 'seller_total_transactions', 'buyer': 'buyer_total_transactions'}
+
+# Statut de transaction -> issues des évaluations système (par rôle)
+TRANSACTION_OUTCOMES = {
+    'disputed': {'seller': 'disputed', 'buyer': 'disputed'},
+    'refunded': {'seller': 'failed'},
+    'cancelled': {'buyer': 'failed'},  # paiement échoué (cinetpay_payment_failed)
+}
+# Séquestre libéré (période de sécurité échue sans litige) : seule issue réussie
+RELEASE_OUTCOMES = {'seller': 'success', 'buyer': 'success'}
+
+def compute_seller_score(successful, total):
+    """
+    Score vendeur : taux de réussite × confiance (min(total/10, 1)) ×
+    facteur du badge potentiel. Retourne (score, niveau du badge final).
+    """
+    if not total:
+        return 0.0, None
+    volume_adjusted_score = (successful / total) * 100 * min(total / CONFIDENCE_THRESHOLD, 1.0)
+    score = volume_adjusted_score * SELLER_BADGE_FACTORS[get_seller_badge_index(volume_adjusted_score)]
+    return score, SELLER_BADGES[get_seller_badge_index(score)]['level']
+
+def compute_buyer_score(successful, total):
+    """Score acheteur : taux de réussite × confiance, sans facteur de badge"""
+    if not total:
+        return 0.0
+    return (successful / total) * 100 * min(total / CONFIDENCE_THRESHOLD, 1.0)
+
+def refresh_scores(reputation):
+    """Recalcule score et badge vendeur et score acheteur depuis les compteurs (sans sauvegarder)"""
+    seller_score, seller_badge = compute_seller_score(
+        reputation.seller_successful_transactions, reputation.seller_total_transactions
+    )
+    reputation.seller_score = Decimal(seller_score).quantize(Decimal('0.01'))
+    reputation.seller_badge = seller_badge or 'novice'
+    reputation.buyer_score = Decimal(compute_buyer_score(
+        reputation.buyer_successful_transactions, reputation.buyer_total_transactions
+    )).quantize(Decimal('0.01'))
+
+def apply_rating_change(user_id, rating_type, old_outcome=None, new_outcome=None):
+    """
+    Répercute une évaluation créée (old_outcome=None), modifiée ou supprimée
+    (new_outcome=None) sur les compteurs de `user_id`, puis son score.
+    """
+    counters = COUNTERS[rating_type]
+    deltas = {}
+    if old_outcome is None:
+        deltas[TOTALS[rating_type]] = 1
+    if new_outcome is None:
+        deltas[TOTALS[rating_type]] = -1
+    if old_outcome in counters:
+        deltas[counters[old_outcome]] = deltas.get(counters[old_outcome], 0) - 1
+    if new_outcome in counters:
+        deltas[counters[new_outcome]] = deltas.get(counters[new_outcome], 0) + 1
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    with db_transaction.atomic():
+        UserReputation.objects.get_or_create(user_id=user_id)
+        UserReputation.objects.filter(user_id=user_id).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+        reputation = UserReputation.objects.select_for_update().get(user_id=user_id)
+        refresh_scores(reputation)
+        reputation.save(update_fields=['seller_score', 'seller_badge', 'buyer_score', 'last_updated'])
+
+def create_transaction_rating(transaction, user, rating_type, outcome, notes=None):
+    """
+    Crée ou met à jour l'évaluation de `user` (rôle `rating_type`) pour une
+    transaction ; les compteurs suivent via UserRating.save.
+    """
+    with db_transaction.atomic():
+        rating = UserRating.objects.select_for_update().filter(
+            user=user, transaction=transaction, rating_type=rating_type
+        ).first()
+        if rating is None:
+            rating = UserRating(user=user, transaction=transaction, rating_type=rating_type)
+        elif rating.outcome == outcome and (notes is None or rating.notes == notes):
+            return rating
+        rating.outcome = outcome
+        if notes is not None:
+            rating.notes = notes
+        rating.save()
+    return rating
+
+def record_transaction_outcome(transaction, outcomes=None):
+    """
+    Évaluations système du vendeur et de l'acheteur : `outcomes` ({rôle:
+    issue}) ou, par défaut, celles du statut de la transaction.
+    """
+    if outcomes is None:
+        outcomes = TRANSACTION_OUTCOMES.get(transaction.status, {})
+    users = {'seller': transaction.seller, 'buyer': transaction.buyer}
+    for rating_type, outcome in outcomes.items():
+        create_transaction_rating(transaction, users[rating_type], rating_type, outcome)
+
+def record_escrow_release(transaction):
+    """Transaction menée à terme (séquestre libéré) : réussite du vendeur et de l'acheteur"""
+    record_transaction_outcome(transaction, RELEASE_OUTCOMES)
+
+def rebuild_reputations(user_ids=None, batch_size=500):
+    """
+    Recalcule compteurs, scores et badges depuis UserRating (un GROUP BY,
+    bulk_update par lots). Retourne la liste des IDs utilisateurs modifiés.
+    """
+    ratings = UserRating.objects.all()
+    reputations = UserReputation.objects.all()
+    if user_ids is not None:
+        ratings = ratings.filter(user_id__in=user_ids)
+        reputations = reputations.filter(user_id__in=user_ids)
+
+    counts = {}
+    for row in ratings.values('user_id', 'rating_type').annotate(
+        total=Count('id'), **{outcome: Count('id', filter=Q(outcome=outcome)) for outcome, _ in UserRating.OUTCOME_CHOICES}
+    ):
+        values = counts.setdefault(row['user_id'], {})
+        values[TOTALS[row['rating_type']]] = row['total']
+        for outcome, field in COUNTERS[row['rating_type']].items():
+            values[field] = row[outcome]
+
+    UserReputation.objects.bulk_create(
+        [UserReputation(user_id=user_id) for user_id in counts], ignore_conflicts=True
+    )
+    fields = list(TOTALS.values()) + [field for counters in COUNTERS.values() for field in counters.values()]
+    score_fields = ['seller_score', 'seller_badge', 'buyer_score']
+
+    changed, batch = [], []
+    for reputation in reputations.only('id', 'user_id', *fields, *score_fields).iterator(chunk_size=batch_size):
+        before = [getattr(reputation, field) for field in fields + score_fields]
+        values = counts.get(reputation.user_id, {})
+        for field in fields:
+            setattr(reputation, field, values.get(field, 0))
+        refresh_scores(reputation)
+        if [getattr(reputation, field) for field in fields + score_fields] != before:
+            batch.append(reputation)
+        if len(batch) >= batch_size:
+            UserReputation.objects.bulk_update(batch, fields + score_fields)
+            changed += [reputation.user_id for reputation in batch]
+            batch = []
+    if batch:
+        UserReputation.objects.bulk_update(batch, fields + score_fields)
+        changed += [reputation.user_id for reputation in batch]
+
+    # bulk_update ne passe pas par UserReputation.save
+    from .profile_utils import invalidate_profile_summary
+    invalidate_profile_summary(*changed)
+    return changed
+
+def update_user_reputation(user):
+    """Recalcule la réputation d'un utilisateur depuis ses évaluations et la retourne"""
+    rebuild_reputations([user.id])
+    reputation, _ = UserReputation.objects.get_or_create(user=user)
+    return reputation
+
+def reputation_summary_data(reputation):
+    """Résumé vendeur / acheteur d'une ligne UserReputation (ou None)"""
+    seller_score = float(reputation.seller_score) if reputation else 0.0
+    return {
+        'seller': {
+            'total_transactions': reputation.seller_total_transactions if reputation else 0,
+            'successful_transactions': reputation.seller_successful_transactions if reputation else 0,
+            'failed_transactions': reputation.seller_failed_transactions if reputation else 0,
+            'fraudulent_transactions': reputation.seller_fraudulent_transactions if reputation else 0,
+            'score': seller_score,
+            'badge': get_seller_badge(seller_score) if reputation and reputation.seller_total_transactions else None,
+        },
+        'buyer': {
+            'total_transactions': reputation.buyer_total_transactions if reputation else 0,
+            'successful_transactions': reputation.buyer_successful_transactions if reputation else 0,
+            'failed_purchases_count': reputation.buyer_failed_transactions if reputation else 0,
+            'disputed_transactions': reputation.buyer_disputed_transactions if reputation else 0,
+            'score': float(reputation.buyer_score) if reputation else 0.0,
+        },
+    }
+
+def get_user_reputation_summary(user):
+    """Résumé de réputation d'un utilisateur (mêmes clés que reputation_summary du profil)"""
+    return reputation_summary_data(UserReputation.objects.filter(user=user).first())
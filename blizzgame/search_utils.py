@@ -0,0 +1,248 @@
+"""
+Index de recherche : noms d'utilisateurs et Highlights
+
+Noms d'utilisateurs (autocomplétion, user_search). Avec SQLite, la
+migration 0038 crée :
+
+- une table FTS5 blizzgame_username_search (tokenizer trigram, contenu
+  externe = auth_user) tenue à jour par des triggers sur auth_user ;
+- un index auth_user(username COLLATE NOCASE).
+
+Une requête d'au moins 3 caractères est une recherche de sous-chaîne sur
+l'index trigram (préfixes classés d'abord, puis les noms les plus courts) ;
+une requête plus courte est un parcours de préfixe sur l'index NOCASE.
+Aucun des deux cas ne parcourt toute la table auth_user.
+
+Highlights (highlights_search). Chaque Highlight a un HighlightSearchDocument
+(légende, hashtags, nom de l'auteur) écrit par index_highlight à la
+création et supprimé en cascade avec lui ; avec SQLite, la table FTS5
+blizzgame_highlight_search (migration 0039) l'indexe par triggers. Les
+résultats sont classés par bm25 (hashtags > auteur > légende), limités aux
+Highlights actifs et non expirés, et paginés par curseur keyset
+(score, date, id).
+
+Le réglage SEARCH_BACKEND choisit le moteur : 'auto' (FTS5 si l'index
+existe), 'fts5', ou 'basic' (requêtes ORM icontains, pour les bases sans
+FTS5). HIGHLIGHT_SEARCH_BACKEND peut aussi désigner une classe de moteur
+(chemin pointé) exposant search(query, limit, cursor). Les réponses
+d'autocomplétion sont mises en cache par requête.
+"""
+
+import hashlib
+import logging
+import re
+import uuid
+from types import SimpleNamespace
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Collate, Length
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from .models import Highlight, HighlightSearchDocument
+from .pagination_utils import decode_cursor, encode_cursor, keyset_paginate
+
+logger = logging.getLogger(__name__)
+
+USERNAME_INDEX_TABLE = 'blizzgame_username_search'
+HIGHLIGHT_INDEX_TABLE = 'blizzgame_highlight_search'
+AUTOCOMPLETE_CACHE_KEY = 'users:autocomplete:{limit}:{digest}'
+AUTOCOMPLETE_MAX_LIMIT = 20
+TRIGRAM_MIN_LENGTH = 3
+
+_tables = {}
+
+def _autocomplete_ttl():
+    return getattr(settings, 'USER_AUTOCOMPLETE_CACHE_TTL', 60)
+
+def _table_exists(table):
+    """Vrai si la base est SQLite et que la table FTS5 a été créée (mémorisé)"""
+    if table not in _tables:
+        exists = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [table])
+                exists = cursor.fetchone() is not None
+        _tables[table] = exists
+    return _tables[table]
+
+def fts5_available():
+    return _table_exists(USERNAME_INDEX_TABLE)
+
+def get_backend():
+    backend = getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if backend == 'auto':
+        return 'fts5' if fts5_available() else 'basic'
+    return backend
+
+def _fts5_phrase(query):
+    """Chaîne MATCH d'une sous-chaîne littérale (guillemets doublés)"""
+    return '"' + query.replace('"', '""') + '"'
+
+def _like_prefix(query):
+    return query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+def search_user_ids(query, limit, exclude_ids=()):
+    """IDs des utilisateurs dont le nom contient `query`, préfixes d'abord"""
+    query = query.strip()
+    if not query:
+        return []
+    exclude_ids = set(exclude_ids)
+
+    if get_backend() == 'fts5' and len(query) >= TRIGRAM_MIN_LENGTH:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT rowid FROM {USERNAME_INDEX_TABLE} WHERE username MATCH %s "
+                    f"ORDER BY (username LIKE %s ESCAPE '\\') DESC, length(username), username LIMIT %s",
+                    [_fts5_phrase(query), _like_prefix(query), limit + len(exclude_ids)]
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+            return [user_id for user_id in ids if user_id not in exclude_ids][:limit]
+        except DatabaseError as e:
+            logger.error(f"Erreur de recherche FTS5 des utilisateurs: {e}")
+
+    users = User.objects.exclude(id__in=exclude_ids)
+    if len(query) < TRIGRAM_MIN_LENGTH:
+        # Parcours de préfixe dans l'ordre de l'index NOCASE : s'arrête après `limit` lignes
+        users = users.filter(username__istartswith=query)
+        if connection.vendor == 'sqlite':
+            return list(users.order_by(Collate('username', 'NOCASE')).values_list('id', flat=True)[:limit])
+    else:
+        users = users.filter(username__icontains=query)
+    return list(
+        users.annotate(
+            is_prefix=Case(When(username__istartswith=query, then=Value(1)), default=Value(0), output_field=IntegerField()),
+            username_length=Length('username'),
+        ).order_by('-is_prefix', 'username_length', 'username').values_list('id', flat=True)[:limit]
+    )
+
+def search_users(query, limit, exclude_ids=()):
+    """Utilisateurs correspondants (profil chargé), dans l'ordre de pertinence"""
+    user_ids = search_user_ids(query, limit, exclude_ids)
+    users = {user.id: user for user in User.objects.filter(id__in=user_ids).select_related('profile')} if user_ids else {}
+    return [users[user_id] for user_id in user_ids if user_id in users]
+
+def autocomplete_users(query, limit):
+    """Résultats JSON de l'autocomplétion, mis en cache par (requête, limite)"""
+    query = query.strip().lower()
+    limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+    key = AUTOCOMPLETE_CACHE_KEY.format(limit=limit, digest=hashlib.md5(query.encode()).hexdigest())
+    results = cache.get(key)
+    if results is None:
+        results = []
+        for user in search_users(query, limit):
+            profile = getattr(user, 'profile', None)
+            results.append({
+                'id': user.id,
+                'username': user.username,
+                'avatar': profile.profileimg.url if profile and profile.profileimg else None,
+            })
+        cache.set(key, results, _autocomplete_ttl())
+    return results
+
+# ===== Highlights =====
+
+RANK_ORDERING = ('score', 'created_at', 'id')
+# Poids bm25 des colonnes (caption, hashtags, username)
+COLUMN_WEIGHTS = (1.0, 3.0, 2.0)
+
+def index_highlight(highlight):
+    """Crée ou met à jour le document de recherche d'un Highlight"""
+    HighlightSearchDocument.objects.update_or_create(
+        highlight=highlight,
+        defaults={
+            'caption': highlight.caption or '',
+            'hashtags': ' '.join(highlight.hashtags or []),
+            'username': highlight.author.username,
+        }
+    )
+
+def _active_highlights():
+    return Highlight.objects.filter(is_active=True, expires_at__gt=timezone.now())
+
+class BasicHighlightSearch:
+    """Moteur sans index plein texte : sous-chaînes ORM, plus récents d'abord"""
+
+    def search(self, query, limit, cursor=None):
+        highlights = _active_highlights().filter(
+            Q(author__username__icontains=query)
+            | Q(caption__icontains=query)
+            | Q(search_document__hashtags__icontains=query)
+        ).select_related('author', 'author__profile')
+        result = keyset_paginate(highlights, limit, before=cursor)
+        return result['items'], result['before'] if result['has_more'] else None
+
+class Fts5HighlightSearch:
+    """Moteur SQLite FTS5 : préfixes de mots, classement bm25, curseur (score, date, id)"""
+
+    def match_expression(self, query):
+        words = re.findall(r'\w+', query.lower())
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def search(self, query, limit, cursor=None):
+        match = self.match_expression(query)
+        if not match:
+            return [], None
+
+        after = ''
+        params = [match, connection.ops.adapt_datetimefield_value(timezone.now())]
+        if cursor:
+            score, created_at, highlight_id = decode_cursor(cursor, RANK_ORDERING)
+            # Le curseur stocke la date en isoformat : la remettre au format de la colonne
+            created_at = connection.ops.adapt_datetimefield_value(parse_datetime(created_at))
+            after = (
+                "WHERE score > %s OR (score = %s AND "
+                "(created_at < %s OR (created_at = %s AND highlight_id < %s)))"
+            )
+            params += [score, score, created_at, created_at, highlight_id]
+        weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(
+                f"SELECT highlight_id, score, created_at FROM ("
+                f" SELECT d.highlight_id AS highlight_id, h.created_at AS created_at,"
+                f" bm25({HIGHLIGHT_INDEX_TABLE}, {weights}) AS score"
+                f" FROM {HIGHLIGHT_INDEX_TABLE}"
+                f" JOIN {HighlightSearchDocument._meta.db_table} d ON d.id = {HIGHLIGHT_INDEX_TABLE}.rowid"
+                f" JOIN {Highlight._meta.db_table} h ON h.id = d.highlight_id"
+                f" WHERE {HIGHLIGHT_INDEX_TABLE} MATCH %s AND h.is_active AND h.expires_at > %s"
+                f") {after} ORDER BY score, created_at DESC, highlight_id DESC LIMIT %s",
+                params + [limit + 1]
+            )
+            rows = db_cursor.fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        highlights = _active_highlights().select_related('author', 'author__profile').in_bulk(
+            [uuid.UUID(highlight_id) for highlight_id, _, _ in rows]
+        )
+        items = [highlights[uuid.UUID(highlight_id)] for highlight_id, _, _ in rows if uuid.UUID(highlight_id) in highlights]
+        next_cursor = None
+        if has_more:
+            highlight_id, score, created_at = rows[-1]
+            next_cursor = encode_cursor(
+                SimpleNamespace(score=score, created_at=created_at, id=highlight_id), RANK_ORDERING
+            )
+        return items, next_cursor
+
+def get_highlight_search_backend():
+    backend = getattr(settings, 'HIGHLIGHT_SEARCH_BACKEND', None)
+    if backend:
+        return import_string(backend)()
+    if get_backend() == 'fts5' and _table_exists(HIGHLIGHT_INDEX_TABLE):
+        return Fts5HighlightSearch()
+    return BasicHighlightSearch()
+
+def search_highlights(query, limit, cursor=None):
+    """
+    Retourne (Highlights actifs correspondant à `query` par pertinence,
+    curseur de la page suivante ou None). InvalidCursor si le curseur est altéré.
+    """
+    query = query.strip()
+    if not query:
+        return [], None
+    return get_highlight_search_backend().search(query, limit, cursor)
@@ -0,0 +1,118 @@
+"""
+Graphe social en cache (amis, abonnements, abonnés, demandes en attente)
+
+Pour chaque utilisateur, les ensembles d'IDs suivants sont chargés en
+quatre requêtes indexées puis gardés en cache :
+
+- friends           : amitiés acceptées (Friendship, dans les deux sens)
+- subscriptions     : utilisateurs suivis (UserSubscription.subscribed_to)
+- subscribers       : abonnés (UserSubscription.subscriber)
+- pending_sent      : demandes d'ami envoyées en attente
+- pending_received  : demandes d'ami reçues en attente
+
+Les compteurs et tests d'appartenance des vues (profil, recherche, feed
+des abonnements, classement "Pour toi") deviennent de simples lectures
+d'ensembles, sans requête.
+
+L'invalidation est versionnée : chaque utilisateur a un numéro de version
+en cache, inclus dans la clé de son graphe. Une écriture (abonnement,
+demande, acceptation, refus...) incrémente la version des deux
+utilisateurs concernés ; l'ancienne entrée n'est plus jamais lue et
+expire d'elle-même.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import FriendRequest, Friendship, UserSubscription
+
+VERSION_CACHE_KEY = 'social:version:{user_id}'
+GRAPH_CACHE_KEY = 'social:graph:{user_id}:{version}'
+VERSION_TTL = 30 * 24 * 3600  # secondes
+
+def _graph_ttl():
+    return getattr(settings, 'SOCIAL_GRAPH_CACHE_TTL', 3600)
+
+def _version(user_id):
+    version = cache.get(VERSION_CACHE_KEY.format(user_id=user_id))
+    if version is None:
+        version = 1
+        # add() : ne pas revenir en arrière si une invalidation vient d'avoir lieu
+        if not cache.add(VERSION_CACHE_KEY.format(user_id=user_id), version, VERSION_TTL):
+            version = cache.get(VERSION_CACHE_KEY.format(user_id=user_id), version)
+    return version
+
+def invalidate(*user_ids):
+    """Périme le graphe en cache des utilisateurs donnés (nouvelle version)"""
+    for user_id in set(user_ids):
+        key = VERSION_CACHE_KEY.format(user_id=user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Version absente (expirée ou jamais lue) : repartir au-delà de toute version lue
+            cache.set(key, _version(user_id) + 1, VERSION_TTL)
+
+def load_graph(user_id):
+    """Charge le graphe d'un utilisateur depuis la base (quatre requêtes)"""
+    friends = set()
+    for user1_id, user2_id in Friendship.objects.filter(
+        Q(user1_id=user_id) | Q(user2_id=user_id)
+    ).values_list('user1_id', 'user2_id'):
+        friends.add(user2_id if user1_id == user_id else user1_id)
+
+    pending_sent, pending_received = set(), set()
+    for from_id, to_id in FriendRequest.objects.filter(
+        Q(from_user_id=user_id) | Q(to_user_id=user_id), status='pending'
+    ).values_list('from_user_id', 'to_user_id'):
+        if from_id == user_id:
+            pending_sent.add(to_id)
+        else:
+            pending_received.add(from_id)
+
+    return {
+        'friends': frozenset(friends),
+        'subscriptions': frozenset(
+            UserSubscription.objects.filter(subscriber_id=user_id).values_list('subscribed_to_id', flat=True)
+        ),
+        'subscribers': frozenset(
+            UserSubscription.objects.filter(subscribed_to_id=user_id).values_list('subscriber_id', flat=True)
+        ),
+        'pending_sent': frozenset(pending_sent),
+        'pending_received': frozenset(pending_received),
+    }
+
+def get_graph(user_id):
+    """Graphe social d'un utilisateur (cache, sinon load_graph)"""
+    key = GRAPH_CACHE_KEY.format(user_id=user_id, version=_version(user_id))
+    graph = cache.get(key)
+    if graph is None:
+        graph = load_graph(user_id)
+        cache.set(key, graph, _graph_ttl())
+    return graph
+
+def get_friend_ids(user_id):
+    return get_graph(user_id)['friends']
+
+def get_subscription_ids(user_id):
+    return get_graph(user_id)['subscriptions']
+
+def get_subscriber_ids(user_id):
+    return get_graph(user_id)['subscribers']
+
+def get_pending_ids(user_id):
+    """Utilisateurs avec une demande d'ami en attente (envoyée ou reçue)"""
+    graph = get_graph(user_id)
+    return graph['pending_sent'] | graph['pending_received']
+
+def is_subscribed(user_id, other_id):
+    return other_id in get_graph(user_id)['subscriptions']
+
+def get_counts(user_id):
+    """Compteurs du profil : amis (abonnements mutuels), abonnés, abonnements"""
+    graph = get_graph(user_id)
+    return {
+        'friends_count': len(graph['subscriptions'] & graph['subscribers']),
+        'subscribers_count': len(graph['subscribers']),
+        'subscriptions_count': len(graph['subscriptions']),
+    }
@@ -0,0 +1,195 @@
+"""
+Statistiques agrégées des Highlights (table HighlightStats)
+
+Les helpers d'analytics des vues lisent une ligne HighlightStats chargée avec
+select_related('stats') au lieu de recompter vues et engagements à chaque
+appel. Les lignes sont rafraîchies :
+
+- par lot après chaque écriture des vues en attente (view_buffer_utils) :
+  incréments des vues, spectateurs uniques et temps de visionnage total,
+  moyenne, engagement et score, en un seul UPDATE sans relire les vues
+  (un Highlight sans ligne est d'abord initialisé par un recalcul complet) ;
+- à chaque nouvelle appréciation ou commentaire (engagement et score,
+  calculés depuis les compteurs du Highlight, un seul UPDATE) ;
+- périodiquement par la commande refresh_highlight_stats : recalcul complet
+  depuis HighlightView, seul à mettre à jour les percentiles (médiane, p90),
+  qui demandent toutes les durées.
+"""
+
+import logging
+from django.db.models import Avg, Case, Count, F, FloatField, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
+
+from .models import Highlight, HighlightStats, HighlightView
+
+logger = logging.getLogger(__name__)
+
+STATS_FIELDS = [
+    'views_count', 'unique_viewers', 'avg_watch_time', 'total_watch_time',
+    'median_watch_time', 'p90_watch_time', 'engagement_rate', 'performance_score',
+]
+
+def compute_engagement_rate(views_count, appreciations_count, comments_count):
+    """(appréciations + commentaires) / vues, en pourcentage"""
+    if not views_count:
+        return 0.0
+    return round((appreciations_count + comments_count) / views_count * 100, 2)
+
+def compute_performance_score(engagement_rate, views_count, created_at, now=None):
+    """Score pondéré : 40% engagement, 30% vues (plafonné à 50), 30% fraîcheur"""
+    now = now or timezone.now()
+    recency_score = max(0, 100 - (now - created_at).days * 10)
+    score = (
+        engagement_rate * 0.4 +
+        min(views_count / 10, 50) * 0.3 +
+        recency_score * 0.3
+    )
+    return round(score, 1)
+
+def percentile(sorted_values, fraction):
+    """Percentile par interpolation linéaire d'une liste déjà triée"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def get_stats(highlight):
+    """Retourne la ligne HighlightStats du Highlight, ou None si elle n'existe pas encore"""
+    try:
+        return highlight.stats
+    except HighlightStats.DoesNotExist:
+        return None
+
+def refresh_highlight_stats(highlight_ids, batch_size=500):
+    """
+    Recalcule les statistiques des Highlights donnés : une requête groupée
+    pour les agrégats, une pour les durées (percentiles), puis un upsert.
+    Retourne le nombre de lignes écrites.
+    """
+    highlight_ids = list(highlight_ids)
+    if not highlight_ids:
+        return 0
+    now = timezone.now()
+
+    aggregates = {
+        row['highlight_id']: row
+        for row in HighlightView.objects.filter(highlight_id__in=highlight_ids)
+        .values('highlight_id')
+        .annotate(
+            total=Count('id'),
+            users=Count('user', distinct=True),
+            anonymous_ips=Count('ip_address', distinct=True, filter=Q(user__isnull=True)),
+            avg_duration=Avg('view_duration'),
+            total_duration=Sum('view_duration'),
+        )
+    }
+    durations = {}
+    for highlight_id, duration in (
+        HighlightView.objects.filter(highlight_id__in=highlight_ids)
+        .order_by('highlight_id', 'view_duration')
+        .values_list('highlight_id', 'view_duration')
+    ):
+        durations.setdefault(highlight_id, []).append(duration or 0.0)
+
+    rows = []
+    for highlight in Highlight.objects.filter(pk__in=highlight_ids).only(
+        'id', 'created_at', 'views_count', 'appreciations_count', 'comments_count'
+    ):
+        aggregate = aggregates.get(highlight.id, {})
+        values = durations.get(highlight.id, [])
+        engagement_rate = compute_engagement_rate(
+            highlight.views_count, highlight.appreciations_count, highlight.comments_count
+        )
+        rows.append(HighlightStats(
+            highlight_id=highlight.id,
+            views_count=aggregate.get('total', 0),
+            unique_viewers=aggregate.get('users', 0) + aggregate.get('anonymous_ips', 0),
+            avg_watch_time=round(aggregate.get('avg_duration') or 0.0, 1),
+            total_watch_time=aggregate.get('total_duration') or 0.0,
+            median_watch_time=round(percentile(values, 0.5), 1),
+            p90_watch_time=round(percentile(values, 0.9), 1),
+            engagement_rate=engagement_rate,
+            performance_score=compute_performance_score(
+                engagement_rate, highlight.views_count, highlight.created_at, now
+            ),
+            updated_at=now,
+        ))
+
+    HighlightStats.objects.bulk_create(
+        rows, batch_size=batch_size, update_conflicts=True,
+        unique_fields=['highlight'], update_fields=STATS_FIELDS + ['updated_at'],
+    )
+    return len(rows)
+
+def apply_view_deltas(deltas, highlights):
+    """
+    Applique les vues d'un lot aux statistiques, sans relire HighlightView.
+    deltas : {highlight_id: (nouvelles vues, durée ajoutée en secondes)} ;
+    highlights : dicts id, created_at et compteurs des Highlights du lot.
+    Les percentiles restent ceux du dernier refresh_highlight_stats. Un
+    Highlight encore sans ligne est initialisé depuis ses agrégats complets
+    (vues antérieures comprises), pas depuis zéro.
+    """
+    if not deltas:
+        return
+    existing = set(HighlightStats.objects.filter(highlight_id__in=deltas).values_list('highlight_id', flat=True))
+    missing = [highlight_id for highlight_id in deltas if highlight_id not in existing]
+    if missing:
+        # Les vues du lot sont déjà en base : le recalcul les inclut
+        refresh_highlight_stats(missing)
+        deltas = {highlight_id: delta for highlight_id, delta in deltas.items() if highlight_id in existing}
+    if not deltas:
+        return
+    now = timezone.now()
+
+    def case(values, output_field):
+        return Case(
+            *[When(pk=highlight_id, then=Value(value)) for highlight_id, value in values.items()],
+            default=Value(0), output_field=output_field
+        )
+
+    scores = {}
+    for highlight in highlights:
+        if highlight['id'] in deltas:
+            engagement_rate = compute_engagement_rate(
+                highlight['views_count'], highlight['appreciations_count'], highlight['comments_count']
+            )
+            scores[highlight['id']] = (engagement_rate, compute_performance_score(
+                engagement_rate, highlight['views_count'], highlight['created_at'], now
+            ))
+
+    new_views = case({highlight_id: delta[0] for highlight_id, delta in deltas.items()}, IntegerField())
+    added_time = case({highlight_id: float(delta[1]) for highlight_id, delta in deltas.items()}, FloatField())
+    # Les expressions F lisent les valeurs d'avant l'UPDATE : la moyenne utilise les nouvelles sommes
+    total_views = F('views_count') + new_views
+    HighlightStats.objects.filter(highlight_id__in=deltas).update(
+        views_count=total_views,
+        unique_viewers=F('unique_viewers') + new_views,
+        total_watch_time=F('total_watch_time') + added_time,
+        avg_watch_time=Round((F('total_watch_time') + added_time) / Greatest(total_views, 1), 1),
+        engagement_rate=case({highlight_id: score[0] for highlight_id, score in scores.items()}, FloatField()),
+        performance_score=case({highlight_id: score[1] for highlight_id, score in scores.items()}, FloatField()),
+        updated_at=now,
+    )
+
+def update_engagement(highlight):
+    """
+    Met à jour engagement et score après une appréciation ou un commentaire,
+    depuis les compteurs (déjà rechargés par bump_counters).
+    """
+    try:
+        engagement_rate = compute_engagement_rate(
+            highlight.views_count, highlight.appreciations_count, highlight.comments_count
+        )
+        HighlightStats.objects.filter(highlight_id=highlight.id).update(
+            engagement_rate=engagement_rate,
+            performance_score=compute_performance_score(
+                engagement_rate, highlight.views_count, highlight.created_at
+            ),
+            updated_at=timezone.now(),
+        )
+    except Exception as e:
+        logger.error(f"Erreur mise à jour des statistiques du Highlight {highlight.id}: {e}")
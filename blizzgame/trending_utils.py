@@ -0,0 +1,161 @@
+"""
+Hashtags tendance des Highlights sur une fenêtre glissante
+
+Les occurrences de hashtags sont comptées dans des tranches de 5 minutes
+couvrant les dernières 24h. Les compteurs sont mis à jour à la création et à
+la suppression/expiration d'un Highlight, sans relire la table. Le score d'un
+hashtag pondère chaque tranche par une décroissance exponentielle (demi-vie
+de 6h) pour favoriser ce qui monte maintenant. Le top est recalculé au plus
+une fois par tranche ou par mise à jour, puis servi tel quel depuis le cache.
+
+L'état est reconstruit depuis la base (une requête indexée sur created_at)
+s'il est absent du cache, et expire régulièrement. Plusieurs processus le
+modifient (lecture, modification, écriture d'une seule clé) : chaque
+modification se fait sous un verrou de fichier exclusif (TRENDING_LOCK_FILE),
+faute de quoi deux mises à jour simultanées s'écraseraient. Le cache partagé
+(FileBasedCache) et le fichier de verrou sont locaux à la machine.
+"""
+
+import heapq
+import logging
+import os
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import locks
+from django.utils import timezone
+
+from .models import Highlight
+
+logger = logging.getLogger(__name__)
+
+TRENDING_CACHE_KEY = 'highlights:trending'
+TRENDING_TTL = 3600  # secondes, reconstruction périodique depuis la base
+BUCKET_SECONDS = 300
+WINDOW_SECONDS = 24 * 3600
+WINDOW_BUCKETS = WINDOW_SECONDS // BUCKET_SECONDS
+HALF_LIFE_SECONDS = 6 * 3600
+TOP_SIZE = 50  # nombre de hashtags gardés dans le top pré-calculé
+
+@contextmanager
+def _state_lock():
+    """Verrou exclusif entre processus autour d'une lecture-modification-écriture de l'état"""
+    path = getattr(settings, 'TRENDING_LOCK_FILE', os.path.join(settings.BASE_DIR, 'cache', 'trending.lock'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as lock_file:
+        locks.lock(lock_file, locks.LOCK_EX)
+        try:
+            yield
+        finally:
+            locks.unlock(lock_file)
+
+def _bucket_for(moment):
+    return int(moment.timestamp() // BUCKET_SECONDS)
+
+def _current_bucket():
+    return int(time.time() // BUCKET_SECONDS)
+
+def _normalize(tags):
+    return [tag.lower()[:100] for tag in (tags or []) if tag]
+
+def _build_state():
+    """Reconstruit les tranches depuis les Highlights actifs des dernières 24h"""
+    since = timezone.now() - timezone.timedelta(seconds=WINDOW_SECONDS)
+    buckets = {}
+    rows = Highlight.objects.filter(is_active=True, created_at__gte=since).values_list('hashtags', 'created_at')
+    for hashtags, created_at in rows:
+        counts = buckets.setdefault(_bucket_for(created_at), {})
+        for tag in _normalize(hashtags):
+            counts[tag] = counts.get(tag, 0) + 1
+    return {'buckets': buckets, 'top': None}
+
+def _get_state():
+    """
+    Retourne (état, reconstruit) ; un état reconstruit reflète déjà la base.
+    À appeler sous _state_lock() dès que l'état est ensuite modifié.
+    """
+    state = cache.get(TRENDING_CACHE_KEY)
+    if state is not None:
+        return state, False
+    state = _build_state()
+    cache.set(TRENDING_CACHE_KEY, state, TRENDING_TTL)
+    return state, True
+
+def _prune(state, current):
+    oldest = current - WINDOW_BUCKETS + 1
+    for bucket in [b for b in state['buckets'] if b < oldest]:
+        del state['buckets'][bucket]
+
+def _apply(highlight, delta):
+    bucket = _bucket_for(highlight.created_at)
+    current = _current_bucket()
+    if bucket <= current - WINDOW_BUCKETS:
+        # Déjà sorti de la fenêtre : rien à compter ni à retirer
+        return
+    tags = _normalize(highlight.hashtags)
+    if not tags:
+        return
+    try:
+        with _state_lock():
+            state, rebuilt = _get_state()
+            if rebuilt:
+                return
+            _prune(state, current)
+            counts = state['buckets'].setdefault(bucket, {})
+            for tag in tags:
+                value = counts.get(tag, 0) + delta
+                if value > 0:
+                    counts[tag] = value
+                else:
+                    counts.pop(tag, None)
+            if not counts:
+                del state['buckets'][bucket]
+            state['top'] = None
+            cache.set(TRENDING_CACHE_KEY, state, TRENDING_TTL)
+    except Exception as e:
+        logger.error(f"Erreur mise à jour des tendances: {e}")
+
+def record_highlight_created(highlight):
+    """Compte les hashtags d'un nouveau Highlight dans sa tranche"""
+    _apply(highlight, 1)
+
+def record_highlight_removed(highlight):
+    """Retire les hashtags d'un Highlight supprimé ou expiré de la fenêtre"""
+    _apply(highlight, -1)
+
+def compute_top(buckets, current, limit=TOP_SIZE):
+    """Score chaque hashtag (compteurs pondérés par l'âge de la tranche) et retourne le top trié"""
+    scores, totals = {}, {}
+    for bucket, counts in buckets.items():
+        age = current - bucket
+        if age < 0 or age >= WINDOW_BUCKETS:
+            continue
+        weight = 0.5 ** (age * BUCKET_SECONDS / HALF_LIFE_SECONDS)
+        for tag, count in counts.items():
+            scores[tag] = scores.get(tag, 0.0) + count * weight
+            totals[tag] = totals.get(tag, 0) + count
+    # Plus haut score d'abord, puis plus d'occurrences, puis ordre alphabétique (résultat stable)
+    best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], -totals[item[0]], item[0]))
+    return [{'tag': tag, 'count': totals[tag], 'score': round(score, 3)} for tag, score in best]
+
+def get_trending_hashtags(limit=10):
+    """Retourne les hashtags tendance [{'tag', 'count', 'score'}] du plus chaud au moins chaud"""
+    try:
+        current = _current_bucket()
+        state = cache.get(TRENDING_CACHE_KEY)
+        if state is not None and state['top'] is not None and state['top'][0] == current:
+            return state['top'][1][:limit]
+        # Top à recalculer : relu sous le verrou pour ne pas écraser une mise à jour concurrente
+        with _state_lock():
+            state, _ = _get_state()
+            top = state['top']
+            if top is None or top[0] != current:
+                _prune(state, current)
+                top = (current, compute_top(state['buckets'], current))
+                state['top'] = top
+                cache.set(TRENDING_CACHE_KEY, state, TRENDING_TTL)
+        return top[1][:limit]
+    except Exception as e:
+        logger.error(f"Erreur get_trending_hashtags: {e}")
+        return []
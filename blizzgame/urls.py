@@ -5,7 +5,10 @@ from . import webhook_handlers
 urlpatterns = [
     # URLs existantes pour les comptes gaming
     path('', views.index, name='index'),
+    path('api/marketplace/', views.marketplace_api, name='marketplace_api'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('sellers/top/', views.top_sellers, name='top_sellers'),
+    path('api/sellers/top/', views.top_sellers_api, name='top_sellers_api'),
     path('settings/', views.settings, name='settings'),
     path('create/', views.create, name='create'),
     path('product/<uuid:post_id>/', views.product_detail, name='product_detail'),
@@ -37,12 +40,17 @@ urlpatterns = [
     path('chat/list/', views.chat_list, name='chat_list'),
     path('notifications/', views.notifications, name='notifications'),
     path('notifications/mark-read/<uuid:notification_id>/', views.mark_notification_read, name='mark_notification_read'),
+    path('notifications/mark-all-read/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
+    path('notifications/unread/count/', views.unread_notifications_count, name='unread_notifications_count'),
+    path('api/notifications/', views.notifications_api, name='notifications_api'),
     
     # Chat privé et groupes
     path('chat/search/', views.user_search, name='user_search'),
+    path('api/users/autocomplete/', views.user_autocomplete, name='user_autocomplete'),
     path('chat/private/<int:user_id>/', views.private_chat, name='private_chat'),
     path('chat/private/<uuid:conversation_id>/send/', views.send_private_message, name='send_private_message'),
     path('chat/private/<uuid:conversation_id>/messages/', views.get_private_messages, name='get_private_messages'),
+    path('chat/private/<uuid:conversation_id>/stream/', views.stream_private_messages, name='stream_private_messages'),
     
     # Groupes
     path('chat/groups/', views.group_list, name='group_list'),
@@ -50,6 +58,7 @@ urlpatterns = [
     path('chat/group/<uuid:group_id>/', views.group_chat, name='group_chat'),
     path('chat/group/<uuid:group_id>/send/', views.send_group_message, name='send_group_message'),
     path('chat/group/<uuid:group_id>/messages/', views.get_group_messages, name='get_group_messages'),
+    path('chat/group/<uuid:group_id>/stream/', views.stream_group_messages, name='stream_group_messages'),
     path('chat/group/<uuid:group_id>/members/', views.group_members, name='group_members'),
     path('chat/group/<uuid:group_id>/settings/', views.group_settings, name='group_settings'),
     path('chat/group/<uuid:group_id>/add-member/', views.add_group_member, name='add_group_member'),
@@ -0,0 +1,195 @@
+"""
+Ingestion groupée des vues de Highlights
+
+Le défilement avec lecture automatique envoie une vue par Highlight affiché :
+au lieu d'un get_or_create (et souvent d'une deuxième écriture) par requête,
+les vues sont accumulées dans un tampon en mémoire du processus, fusionnées
+par (highlight, utilisateur ou IP) en gardant la durée maximale, puis écrites
+en lot :
+
+- bulk_create(ignore_conflicts=True) pour les nouvelles vues (une par
+  utilisateur, ou par IP pour les vues anonymes : contraintes uniques) ;
+  seules les lignes réellement insérées sont comptées ;
+- bulk_update de view_duration quand la nouvelle durée est plus longue ;
+- une seule requête UPDATE pour les compteurs views_count de tous les
+  Highlights concernés ;
+- un seul UPDATE incrémental de leurs HighlightStats (stats_utils :
+  vues, temps de visionnage total et moyen, engagement), sans relire les
+  vues déjà enregistrées. Les percentiles de durée sont recalculés par la
+  commande périodique refresh_highlight_stats.
+
+Le tampon est vidé par un minuteur, hors du thread de la requête :
+HIGHLIGHT_VIEWS_FLUSH_INTERVAL secondes après la première vue en attente,
+ou aussitôt qu'il atteint HIGHLIGHT_VIEWS_FLUSH_SIZE entrées (et à l'arrêt
+du processus). Les endpoints répondent depuis
+les compteurs en cache, sans écrire en base.
+"""
+
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from .models import Highlight, HighlightView
+from .stats_utils import apply_view_deltas
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_CACHE_KEY = 'highlights:counters:{highlight_id}'
+COUNTERS_TTL = 60  # secondes
+COUNTER_FIELDS = ('views_count', 'appreciations_count', 'comments_count', 'shares_count')
+
+_lock = threading.Lock()
+_pending = {}  # (highlight_id, user_id, ip si anonyme) -> (durée maximale, ip)
+_timer = None
+_timer_delay = None
+
+def _flush_size():
+    return getattr(settings, 'HIGHLIGHT_VIEWS_FLUSH_SIZE', 200)
+
+def _flush_interval():
+    return getattr(settings, 'HIGHLIGHT_VIEWS_FLUSH_INTERVAL', 5)
+
+# ===== Compteurs en cache =====
+
+def get_cached_counters(highlight_id):
+    """
+    Retourne les compteurs {views_count, appreciations_count, ...} d'un
+    Highlight actif depuis le cache (une requête en cas d'absence), ou None
+    si le Highlight n'existe pas ou n'est plus actif.
+    """
+    key = COUNTERS_CACHE_KEY.format(highlight_id=highlight_id)
+    counters = cache.get(key)
+    if counters is None:
+        counters = Highlight.objects.filter(pk=highlight_id, is_active=True).values(*COUNTER_FIELDS).first()
+        if counters is None:
+            return None
+        cache.set(key, counters, COUNTERS_TTL)
+    return counters
+
+def _cache_counters(rows):
+    cache.set_many(
+        {COUNTERS_CACHE_KEY.format(highlight_id=row.pop('id')): row for row in rows},
+        COUNTERS_TTL
+    )
+
+# ===== Tampon =====
+
+def record_view(highlight_id, user_id=None, ip_address=None, duration=0.0):
+    """Ajoute une vue au tampon (les vues anonymes sans IP sont ignorées, comme auparavant)"""
+    if user_id is None and not ip_address:
+        return
+    key = (highlight_id, user_id, None if user_id else ip_address)
+    with _lock:
+        previous = _pending.get(key, (0.0, None))[0]
+        _pending[key] = (max(previous, duration or 0.0), ip_address)
+        # Seuil atteint : vidage immédiat, mais par le minuteur (hors du thread de la requête)
+        _schedule_flush(0 if len(_pending) >= _flush_size() else _flush_interval())
+
+def _schedule_flush(delay):
+    """
+    Démarre le minuteur de vidage (appelé sous _lock) ; un minuteur déjà
+    lancé n'est remplacé que par un délai plus court.
+    """
+    global _timer, _timer_delay
+    if _timer is not None:
+        if _timer_delay <= delay:
+            return
+        _timer.cancel()
+    _timer = threading.Timer(delay, _flush_from_timer)
+    _timer.daemon = True
+    _timer_delay = delay
+    _timer.start()
+
+def _flush_from_timer():
+    try:
+        flush_views()
+    finally:
+        # Ce thread a sa propre connexion : la fermer une fois le lot écrit
+        close_old_connections()
+
+def _take_pending():
+    global _timer, _timer_delay, _pending
+    with _lock:
+        if _timer is not None:
+            _timer.cancel()
+            _timer = _timer_delay = None
+        batch, _pending = _pending, {}
+    return batch
+
+def flush_views():
+    """Écrit en base les vues en attente ; retourne le nombre de nouvelles vues"""
+    batch = _take_pending()
+    if not batch:
+        return 0
+    try:
+        return _write_batch(batch)
+    except Exception as e:
+        logger.error(f"Erreur lors de l'écriture des vues en attente ({len(batch)}): {e}")
+        return 0
+
+def _write_batch(batch):
+    highlight_ids = {highlight_id for highlight_id, _, _ in batch}
+    active_ids = set(
+        Highlight.objects.filter(pk__in=highlight_ids, is_active=True).values_list('pk', flat=True)
+    )
+    batch = {key: value for key, value in batch.items() if key[0] in active_ids}
+    if not batch:
+        return 0
+
+    user_ids = {user_id for _, user_id, _ in batch if user_id}
+    ips = {ip for _, user_id, ip in batch if not user_id}
+    existing_filter = Q(user_id__in=user_ids)
+    if ips:
+        existing_filter |= Q(user__isnull=True, ip_address__in=ips)
+    existing = {
+        (view.highlight_id, view.user_id, None if view.user_id else view.ip_address): view
+        for view in HighlightView.objects.filter(existing_filter, highlight_id__in=active_ids)
+        .only('id', 'highlight_id', 'user_id', 'ip_address', 'view_duration')
+    }
+
+    to_create, to_update, deltas = [], [], {}
+    for key, (duration, ip_address) in batch.items():
+        highlight_id, user_id, _ = key
+        view = existing.get(key)
+        if view is None:
+            to_create.append(HighlightView(
+                highlight_id=highlight_id, user_id=user_id, ip_address=ip_address, view_duration=duration
+            ))
+        elif duration > (view.view_duration or 0):
+            count, added = deltas.get(highlight_id, (0, 0.0))
+            deltas[highlight_id] = (count, added + duration - (view.view_duration or 0))
+            view.view_duration = duration
+            to_update.append(view)
+
+    new_views = {}
+    with transaction.atomic():
+        # Une vue créée entre-temps par un autre processus est ignorée par ignore_conflicts :
+        # seules les lignes réellement insérées (clés générées ici) sont comptées
+        HighlightView.objects.bulk_create(to_create, ignore_conflicts=True)
+        inserted = set(HighlightView.objects.filter(pk__in=[view.pk for view in to_create]).values_list('pk', flat=True))
+        for view in to_create:
+            if view.pk in inserted:
+                new_views[view.highlight_id] = new_views.get(view.highlight_id, 0) + 1
+                count, added = deltas.get(view.highlight_id, (0, 0.0))
+                deltas[view.highlight_id] = (count + 1, added + view.view_duration)
+        if to_update:
+            HighlightView.objects.bulk_update(to_update, ['view_duration'])
+        if new_views:
+            # Un seul UPDATE pour tous les Highlights du lot
+            Highlight.objects.filter(pk__in=new_views).update(views_count=F('views_count') + Case(
+                *[When(pk=highlight_id, then=Value(count)) for highlight_id, count in new_views.items()],
+                default=Value(0), output_field=IntegerField()
+            ))
+
+    highlights = list(Highlight.objects.filter(pk__in=active_ids).values('id', 'created_at', *COUNTER_FIELDS))
+    apply_view_deltas(deltas, highlights)
+    _cache_counters([
+        {'id': highlight['id'], **{field: highlight[field] for field in COUNTER_FIELDS}} for highlight in highlights
+    ])
+    return len(inserted)
+
+atexit.register(flush_views)
@@ -2,53 +2,173 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse, HttpResponseNotModified
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.models import User
 from django.core.paginator import Paginator
 from django.db.models import Q, Count, Avg, Sum
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.urls import reverse
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 import json
 import logging
+import uuid
+from urllib.parse import urlencode
 
 from .models import (
     Profile, Post, PostImage, PostVideo, Transaction, Notification,
     Product, ProductCategory, Cart, CartItem, Order, OrderItem, ShopCinetPayTransaction,
     ProductVariant, UserReputation, SellerPaymentInfo, Highlight, HighlightAppreciation, 
     HighlightComment, HighlightView, HighlightShare, UserSubscription, FriendRequest, Friendship,
-    PrivateConversation, PrivateMessage, Group, GroupMembership, GroupMessage, GroupMessageRead
+    PrivateConversation, PrivateMessage, Group, GroupMembership, GroupMessage
 )
 from .shopify_utils import create_shopify_order_from_blizz_order, sync_products_from_shopify
 from .cinetpay_utils import CinetPayAPI, handle_cinetpay_notification, convert_currency_for_cinetpay
-from django.db.models import Exists, OuterRef
+from django.db.models import Exists, OuterRef, Subquery
+from .pagination_utils import keyset_paginate, encode_cursor, decode_cursor, InvalidCursor
+from .marketplace_utils import (
+    MAX_PAGE_SIZE as MARKETPLACE_MAX_PAGE_SIZE, get_facets, get_listing_page, parse_filters, post_data
+)
+from .escrow_utils import start_security_period
+from .inbox_utils import (
+    ensure_group_entries, ensure_private_entries, get_inbox, mark_read, read_watermarks, record_message
+)
+from .notification_dispatch_utils import (
+    notify_appreciation, notify_comment, notify_group_message, notify_new_highlight, notify_subscription
+)
+from .notification_utils import get_notifications_page, get_unread_count, mark_all_read, notification_data
+from .leaderboard_utils import get_leaderboard_page, seller_rank_data
+from .profile_utils import get_listings_page, get_profile_summary
+from .recommendation_utils import get_recommendations
+from .search_utils import autocomplete_users, index_highlight, search_highlights, search_users
+from .social_graph_utils import (
+    get_friend_ids, get_pending_ids, get_subscriber_ids, get_subscription_ids,
+    invalidate as invalidate_social_graph
+)
+from .realtime_utils import (
+    group_channel, get_or_load_marker, message_event_stream, poll_interval, private_channel, publish, stream_enabled
+)
+from .ranking_utils import (
+    get_ranked_page_ids, invalidate_active_pool,
+    record_appreciation_affinity, record_comment_affinity
+)
+from .trending_utils import get_trending_hashtags, record_highlight_created, record_highlight_removed
+from .view_buffer_utils import get_cached_counters, record_view
+from .stats_utils import compute_engagement_rate, compute_performance_score, get_stats, update_engagement
 import re
 
 logger = logging.getLogger(__name__)
 
 # ===== Vues existantes simples (stubs pour garantir l'import) =====
 
+MARKETPLACE_PAGE_SIZE = 20
+
 def index(request):
-	posts = Post.objects.all().order_by('-created_at')[:20]
-	return render(request, 'index.html', {'posts': posts})
+    """Boutique : annonces filtrées, triées et paginées par curseur (?cursor=)"""
+    filters = parse_filters(request.GET)
+    params = request.GET.copy()
+    try:
+        page = get_listing_page(filters, MARKETPLACE_PAGE_SIZE, cursor=params.pop('cursor', [None])[0])
+    except InvalidCursor:
+        # Curseur altéré : retour à la première page avec les mêmes filtres
+        return redirect(f"{reverse('index')}?{params.urlencode()}")
+    
+    if page['has_more']:
+        params['cursor'] = page['before']
+    return render(request, 'index.html', {
+        'posts': page['items'],
+        'current_filters': filters,
+        'game_choices': Post.GAME_CHOICES,
+        'facets': get_facets(filters),
+        'next_page_query': params.urlencode() if page['has_more'] else '',
+    })
+
+def marketplace_api(request):
+    """API JSON de la boutique : filtres de l'accueil, ?cursor=&limit=, facettes par jeu"""
+    try:
+        limit = min(int(request.GET.get('limit', MARKETPLACE_PAGE_SIZE)), MARKETPLACE_MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Paramètre limit invalide'}, status=400)
+    
+    filters = parse_filters(request.GET)
+    try:
+        page = get_listing_page(filters, max(limit, 1), cursor=request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Curseur invalide'}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'posts': [post_data(post) for post in page['items']],
+        'facets': get_facets(filters),
+        'pagination': {
+            'limit': limit,
+            'has_more': page['has_more'],
+            'cursor': page['before'] if page['has_more'] else None,
+        }
+    })
+
+TOP_SELLERS_PAGE_SIZE = 25
+
+def top_sellers(request):
+    """Classement des vendeurs (SellerRank), paginé par curseur (?cursor=)"""
+    try:
+        page = get_leaderboard_page(TOP_SELLERS_PAGE_SIZE, cursor=request.GET.get('cursor'))
+    except InvalidCursor:
+        return redirect('top_sellers')
+    
+    return render(request, 'top_sellers.html', {
+        'seller_ranks': page['items'],
+        'next_cursor': page['before'] if page['has_more'] else None,
+    })
+
+def top_sellers_api(request):
+    """API JSON du classement des vendeurs (?cursor=&limit=)"""
+    try:
+        limit = min(int(request.GET.get('limit', TOP_SELLERS_PAGE_SIZE)), 100)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Paramètre limit invalide'}, status=400)
+    
+    try:
+        page = get_leaderboard_page(max(limit, 1), cursor=request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Curseur invalide'}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'sellers': [seller_rank_data(seller_rank) for seller_rank in page['items']],
+        'pagination': {
+            'limit': limit,
+            'has_more': page['has_more'],
+            'cursor': page['before'] if page['has_more'] else None,
+        }
+    })
+
+PROFILE_LISTINGS_PAGE_SIZE = 12
 
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
+    user = get_object_or_404(User.objects.select_related('profile'), username=username)
     prof = getattr(user, 'profile', None)
-    user_posts = Post.objects.filter(author=user).order_by('-created_at')
     
-    # Calculer les statistiques pour la page profile
-    total_sales = Post.objects.filter(author=user, is_sold=True).count()
+    # Annonces paginées par curseur (?cursor=), chiffres du profil depuis le résumé en cache
+    try:
+        listings = get_listings_page(user.id, PROFILE_LISTINGS_PAGE_SIZE, cursor=request.GET.get('cursor'))
+    except InvalidCursor:
+        return redirect('profile', username=username)
+    summary = get_profile_summary(user.id)
     
     context = {
         'profile': prof,
         'user_obj': user,
         'user_profile': prof,  # Pour compatibilité avec le template
-        'posts': user_posts,
-        'total_sales': total_sales,
-        'rating': 0,  # Initialisé à zéro
+        'posts': listings['items'],
+        'next_cursor': listings['before'] if listings['has_more'] else None,
+        'summary': summary,
+        'total_sales': summary['sales_count'],
+        'rating': summary['rating'],
+        'reputation_summary': summary['reputation'],
     }
     return render(request, 'profile.html', context)
 
@@ -204,9 +324,10 @@ def transaction_list(request):
 @login_required
 def confirm_reception(request, transaction_id):
     transaction = get_object_or_404(Transaction, id=transaction_id, buyer=request.user)
-    transaction.status = 'completed'
-    transaction.completed_at = timezone.now()
-    transaction.save()
+    if transaction.status != 'completed':
+        # Le séquestre sera libéré à la fin de la période de sécurité (process_escrow)
+        start_security_period(transaction)
+        transaction.save()
     messages.success(request, 'Réception confirmée')
     return redirect('transaction_detail', transaction_id=transaction.id)
 
@@ -229,7 +350,8 @@ def cinetpay_payment_success(request, transaction_id):
 
 def cinetpay_payment_failed(request, transaction_id):
     transaction = get_object_or_404(Transaction, id=transaction_id)
-    transaction.status = 'failed'
+    # Paiement échoué : transaction annulée (échec de l'acheteur, reputation_utils)
+    transaction.status = 'cancelled'
     transaction.save()
     return render(request, 'cinetpay_failed.html', {'transaction': transaction})
 
@@ -239,37 +361,10 @@ def chat_home(request):
     if not request.user.is_authenticated:
         return redirect('login')
     
-    # Récupérer les conversations privées de l'utilisateur
-    private_conversations = PrivateConversation.objects.filter(
-        models.Q(user1=request.user) | models.Q(user2=request.user),
-        is_active=True
-    ).select_related('user1', 'user2').order_by('-last_message_at')[:10]
-    
-    # Préparer les données des conversations
-    conversations_data = []
-    for conv in private_conversations:
-        other_user = conv.user2 if conv.user1 == request.user else conv.user1
-        last_message = conv.private_messages.order_by('-created_at').first()
-        
-        conversations_data.append({
-            'conversation': conv,
-            'other_user': other_user,
-            'last_message': last_message,
-            'unread_count': conv.private_messages.filter(
-                is_read=False
-            ).exclude(sender=request.user).count()
-        })
-    
-    # Récupérer les groupes de l'utilisateur
-    user_groups = Group.objects.filter(
-        memberships__user=request.user,
-        memberships__is_active=True,
-        is_active=True
-    ).select_related('created_by').order_by('-last_message_at')[:5]
-    
+    # Boîte de réception matérialisée (inbox_utils) : une requête par liste
     context = {
-        'conversations': conversations_data,
-        'groups': user_groups,
+        'conversations': get_inbox(request.user, 'private', limit=10),
+        'groups': get_inbox(request.user, 'group', limit=5),
     }
     
     return render(request, 'chat/chat_home.html', context)
@@ -277,16 +372,73 @@ def chat_home(request):
 def chat_list(request):
     return render(request, 'chat_list.html')
 
+NOTIFICATIONS_PAGE_SIZE = 20
+
 def notifications(request):
-    notes = Notification.objects.filter(user=request.user) if request.user.is_authenticated else []
-    return render(request, 'notifications.html', {'notifications': notes})
+    if not request.user.is_authenticated:
+        return render(request, 'notifications.html', {'notifications': []})
+    
+    # Pagination par curseur : ?before=<curseur> pour les plus anciennes
+    try:
+        result = get_notifications_page(request.user, NOTIFICATIONS_PAGE_SIZE, before=request.GET.get('before'))
+    except InvalidCursor:
+        return redirect('notifications')
+    
+    context = {
+        'notifications': result['items'],
+        'next_cursor': result['before'] if result['has_more'] else None,
+        'unread_count': get_unread_count(request.user),
+    }
+    return render(request, 'notifications.html', context)
 
 def mark_notification_read(request, notification_id):
     note = get_object_or_404(Notification, id=notification_id, user=request.user)
-    note.is_read = True
-    note.save()
+    if not note.is_read:
+        note.is_read = True
+        note.save(update_fields=['is_read'])
+    return redirect('notifications')
+
+@login_required
+@require_POST
+def mark_all_notifications_read(request):
+    """Marque toutes les notifications comme lues en un seul UPDATE"""
+    updated = mark_all_read(request.user)
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({'success': True, 'updated': updated, 'count': 0})
     return redirect('notifications')
 
+def unread_notifications_count(request):
+    """Compteur du badge de notifications (interrogé toutes les 30 s par notifications.js)"""
+    if not request.user.is_authenticated:
+        return JsonResponse({'count': 0}, status=401)
+    return JsonResponse({'count': get_unread_count(request.user)})
+
+def notifications_api(request):
+    """API JSON des notifications, paginée par curseur (?before=<curseur>&limit=)"""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Non authentifié'}, status=401)
+    
+    try:
+        limit = min(int(request.GET.get('limit', NOTIFICATIONS_PAGE_SIZE)), 50)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Paramètre limit invalide'}, status=400)
+    
+    try:
+        result = get_notifications_page(request.user, max(limit, 1), before=request.GET.get('before'))
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Curseur invalide'}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'notifications': [notification_data(notification) for notification in result['items']],
+        'unread_count': get_unread_count(request.user),
+        'pagination': {
+            'limit': limit,
+            'has_more': result['has_more'],
+            'before': result['before'],
+        }
+    })
+
 def user_search(request):
     if not request.user.is_authenticated:
         return redirect('login')
@@ -294,39 +446,13 @@ def user_search(request):
     user_profile = getattr(request.user, 'profile', None)
     user_favorite_games = user_profile.favorite_games if user_profile else []
     
-    user_friendships = Friendship.objects.filter(
-        models.Q(user1=request.user) | models.Q(user2=request.user)
-    )
-    
-    existing_friends = set()
-    for friendship in user_friendships:
-        if friendship.user1 == request.user:
-            existing_friends.add(friendship.user2.id)
-        else:
-            existing_friends.add(friendship.user1.id)
-    
-    existing_requests = set(
-        FriendRequest.objects.filter(
-            models.Q(from_user=request.user) | models.Q(to_user=request.user),
-            status='pending'
-        ).values_list('from_user_id', 'to_user_id')
-    )
-    
-    blocked_users = set()
-    for from_id, to_id in existing_requests:
-        if from_id == request.user.id:
-            blocked_users.add(to_id)
-        else:
-            blocked_users.add(from_id)
-    
-    excluded_users = existing_friends | blocked_users | {request.user.id}
+    # Amis et demandes en attente depuis le graphe social en cache (social_graph_utils)
+    excluded_users = set(get_friend_ids(request.user.id) | get_pending_ids(request.user.id)) | {request.user.id}
     search_query = request.GET.get('q', '').strip()
     
     if search_query:
-        # Recherche simple par nom d'utilisateur sans limitation par jeux favoris
-        search_results = User.objects.filter(
-            username__icontains=search_query
-        ).exclude(id__in=excluded_users).select_related('profile')[:50]
+        # Recherche par nom d'utilisateur sur l'index dédié (search_utils), sans limitation par jeux favoris
+        search_results = search_users(search_query, 50, exclude_ids=excluded_users)
         
         recommendations = []
         for user in search_results:
@@ -335,35 +461,8 @@ def user_search(request):
             similarity_score = len(common_games)
             recommendations.append((user, similarity_score, list(common_games)))
     else:
-        recommendations = []
-        if user_favorite_games:
-            potential_users = User.objects.filter(
-                profile__favorite_games__overlap=user_favorite_games
-            ).exclude(id__in=excluded_users).select_related('profile')[:20]
-            
-            user_scores = []
-            for user in potential_users:
-                user_games = user.profile.favorite_games if user.profile else []
-                common_games = set(user_favorite_games) & set(user_games)
-                similarity_score = len(common_games)
-                if similarity_score > 0:
-                    user_scores.append((user, similarity_score, list(common_games)))
-            
-            user_scores.sort(key=lambda x: x[1], reverse=True)
-            recommendations = user_scores[:10]
-        
-        if len(recommendations) < 10:
-            remaining_slots = 10 - len(recommendations)
-            recommended_user_ids = {user[0].id for user in recommendations}
-            
-            random_users = User.objects.exclude(
-                id__in=excluded_users | recommended_user_ids
-            ).select_related('profile').order_by('?')[:remaining_slots]
-            
-            for user in random_users:
-                user_games = user.profile.favorite_games if user.profile else []
-                common_games = set(user_favorite_games) & set(user_games) if user_favorite_games else set()
-                recommendations.append((user, len(common_games), list(common_games)))
+        # Recommandations précalculées (recommendation_utils, commande compute_friend_recommendations)
+        recommendations = get_recommendations(request.user, limit=10)
     
     context = {
         'recommendations': recommendations,
@@ -373,6 +472,20 @@ def user_search(request):
     
     return render(request, 'chat/user_search.html', context)
 
+def user_autocomplete(request):
+    """Autocomplétion des noms d'utilisateurs (JSON, ?q=&limit=), réponses en cache par requête"""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Non authentifié'}, status=401)
+    
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Paramètre limit invalide'}, status=400)
+    
+    users = autocomplete_users(query, limit) if len(query) >= 2 else []
+    return JsonResponse({'success': True, 'users': [user for user in users if user['id'] != request.user.id]})
+
 def private_chat(request, user_id):
     if not request.user.is_authenticated:
         return redirect('login')
@@ -396,26 +509,21 @@ def private_chat(request, user_id):
             user1=request.user,
             user2=other
         )
+        ensure_private_entries(conversation)
     
     # Récupérer les derniers messages (50 max)
     messages_list = conversation.private_messages.select_related('sender').order_by('-created_at')[:50]
     messages_list = list(reversed(messages_list))  # Ordre chronologique
     
-    # Marquer les messages comme lus
-    unread_messages = conversation.private_messages.filter(
-        is_read=False
-    ).exclude(sender=request.user)
-    
-    for message in unread_messages:
-        message.is_read = True
-        message.read_at = timezone.now()
-    
-    PrivateMessage.objects.bulk_update(unread_messages, ['is_read', 'read_at'])
+    # Marquer les messages comme lus (filigrane de lecture, un UPDATE)
+    mark_read(request.user, conversation=conversation)
     
     context = {
         'other': other,
         'conversation': conversation,
         'messages': messages_list,
+        'stream_cursor': encode_cursor(messages_list[-1]) if messages_list else '',
+        **chat_refresh_context(messages_list),
     }
     
     return render(request, 'chat/private_chat.html', context)
@@ -449,6 +557,8 @@ def send_private_message(request, conversation_id):
         # Mettre à jour le timestamp de la conversation
         conversation.last_message_at = timezone.now()
         conversation.save()
+        record_message(message, conversation=conversation)
+        publish(private_channel(conversation.id), message)
         
         return JsonResponse({
             'success': True,
@@ -465,6 +575,157 @@ def send_private_message(request, conversation_id):
         logger.error(f"Erreur envoi message privé: {e}")
         return JsonResponse({'success': False, 'error': 'Erreur serveur'})
 
+def private_message_data(message, user, read_until=None):
+    """
+    Représentation JSON d'un message privé (API et flux temps réel).
+    read_until : filigranes de lecture par expéditeur (inbox_utils.read_watermarks)
+    """
+    watermark = (read_until or {}).get(message.sender_id)
+    return {
+        'id': str(message.id),
+        'content': message.content,
+        'sender': message.sender.username,
+        'sender_id': message.sender.id,
+        'created_at': message.created_at.isoformat(),
+        'is_read': watermark is not None and message.created_at <= watermark,
+        'is_own': message.sender_id == user.id,
+        'is_edited': message.is_edited
+    }
+
+def private_message_serializer(conversation):
+    """
+    Sérialiseur des messages d'une conversation : les filigranes de lecture
+    sont chargés une fois, au premier message sérialisé (aucune requête
+    quand il n'y a rien à renvoyer)
+    """
+    watermarks = []
+    
+    def serialize(message, user):
+        if not watermarks:
+            watermarks.append(read_watermarks(conversation))
+        return private_message_data(message, user, watermarks[0])
+    
+    return serialize
+
+def group_message_data(message, user):
+    """Représentation JSON d'un message de groupe (API et flux temps réel)"""
+    return {
+        'id': str(message.id),
+        'content': message.content,
+        'sender': message.sender.username,
+        'sender_id': message.sender.id,
+        'created_at': message.created_at.isoformat(),
+        'is_own': message.sender_id == user.id,
+        'is_edited': message.is_edited
+    }
+
+def chat_refresh_context(messages_list):
+    """Contexte des pages de chat : flux SSE, ou ?since= périodique s'il est désactivé"""
+    return {
+        'chat_stream_enabled': stream_enabled(),
+        'poll_since': str(messages_list[-1].id) if messages_list else timezone.now().isoformat(),
+        'poll_interval_ms': int(poll_interval() * 1000),
+    }
+
+def message_stream_response(request, channel, queryset, serialize):
+    """
+    Réponse SSE des nouveaux messages d'un canal. Le curseur de départ vient
+    de Last-Event-ID (reconnexion EventSource) ou du paramètre ?after=.
+    Flux désactivé (CHAT_STREAM_ENABLED) : 204, EventSource ne se reconnecte pas.
+    """
+    if not stream_enabled():
+        return HttpResponse(status=204)
+    cursor = request.headers.get('Last-Event-ID') or request.GET.get('after') or None
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except InvalidCursor:
+            return JsonResponse({'success': False, 'error': 'Curseur invalide'}, status=400)
+    user = request.user
+    response = StreamingHttpResponse(
+        message_event_stream(channel, queryset, cursor, lambda message: serialize(message, user)),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # pas de mise en tampon par nginx
+    return response
+
+def messages_since_response(request, channel, queryset, serialize, limit):
+    """
+    Réponse du mode ?since=<id de message|date ISO> : uniquement les messages
+    plus récents, dans l'ordre chronologique, sans COUNT. Le marqueur du
+    dernier message (en cache) permet de répondre sans lire de message
+    quand il n'y a rien de nouveau (liste vide, ou 304 si If-None-Match
+    correspond à l'ETag renvoyé précédemment).
+    """
+    since = request.GET.get('since', '').strip()
+    marker = get_or_load_marker(channel, queryset)
+    etag = f'"{marker["id"] or "empty"}"'
+    
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    
+    try:
+        since_id = uuid.UUID(since)
+        since_date = None
+    except ValueError:
+        since_id = None
+        since_date = parse_datetime(since)
+        if since_date is None:
+            return JsonResponse({'success': False, 'error': 'Paramètre since invalide'}, status=400)
+        if timezone.is_naive(since_date):
+            since_date = timezone.make_aware(since_date)
+    
+    up_to_date = (
+        marker['id'] is None
+        or (since_id is not None and str(since_id) == marker['id'])
+        or (since_date is not None and since_date >= parse_datetime(marker['created_at']))
+    )
+    if up_to_date:
+        messages_list, has_more = [], False
+    else:
+        if since_id is not None:
+            reference = queryset.filter(id=since_id).values('created_at', 'id').first()
+            if reference is None:
+                return JsonResponse({'success': False, 'error': 'Message since introuvable'}, status=400)
+            newer = Q(created_at__gt=reference['created_at']) | Q(created_at=reference['created_at'], id__gt=reference['id'])
+        else:
+            newer = Q(created_at__gt=since_date)
+        messages_list = list(queryset.filter(newer).order_by('created_at', 'id')[:limit + 1])
+        has_more = len(messages_list) > limit
+        messages_list = messages_list[:limit]
+    
+    response = JsonResponse({
+        'success': True,
+        'messages': [serialize(message, request.user) for message in messages_list],
+        'pagination': {
+            'limit': limit,
+            'has_more': has_more,
+            # À renvoyer comme prochain ?since= (suite si has_more)
+            'since': str(messages_list[-1].id) if messages_list else since,
+        }
+    })
+    response['ETag'] = etag
+    return response
+
+def stream_private_messages(request, conversation_id):
+    """Flux SSE des nouveaux messages d'une conversation privée"""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Non authentifié'}, status=401)
+    
+    conversation = get_object_or_404(PrivateConversation, id=conversation_id)
+    if request.user.id not in (conversation.user1_id, conversation.user2_id):
+        return JsonResponse({'success': False, 'error': 'Accès non autorisé'}, status=403)
+    
+    return message_stream_response(
+        request,
+        private_channel(conversation.id),
+        conversation.private_messages.select_related('sender'),
+        private_message_serializer(conversation)
+    )
+
 def get_private_messages(request, conversation_id):
     if not request.user.is_authenticated:
         return JsonResponse({'success': False, 'error': 'Non authentifié'})
@@ -473,43 +734,61 @@ def get_private_messages(request, conversation_id):
         conversation = get_object_or_404(PrivateConversation, id=conversation_id)
         
         # Vérifier que l'utilisateur fait partie de la conversation
-        if request.user not in [conversation.user1, conversation.user2]:
+        if request.user.id not in (conversation.user1_id, conversation.user2_id):
             return JsonResponse({'success': False, 'error': 'Accès non autorisé'})
         
-        # Paramètres de pagination
-        page = int(request.GET.get('page', 1))
         limit = min(int(request.GET.get('limit', 20)), 50)  # Max 50 messages
-        offset = (page - 1) * limit
-        
-        # Récupérer les messages
-        messages_query = conversation.private_messages.select_related('sender').order_by('-created_at')
-        total_messages = messages_query.count()
-        messages_list = messages_query[offset:offset + limit]
+        messages_query = conversation.private_messages.select_related('sender')
         
-        messages_data = []
-        for message in reversed(messages_list):  # Ordre chronologique
-            messages_data.append({
-                'id': str(message.id),
-                'content': message.content,
-                'sender': message.sender.username,
-                'sender_id': message.sender.id,
-                'created_at': message.created_at.isoformat(),
-                'is_read': message.is_read,
-                'is_own': message.sender == request.user,
-                'is_edited': message.is_edited
-            })
+        if 'since' in request.GET:
+            # Mode incrémental : seulement les messages plus récents
+            return messages_since_response(
+                request, private_channel(conversation.id), messages_query,
+                private_message_serializer(conversation), limit
+            )
         
-        return JsonResponse({
-            'success': True,
-            'messages': messages_data,
-            'pagination': {
+        if 'page' in request.GET:
+            # Mode compatibilité : pagination par numéro de page (COUNT + OFFSET)
+            page = int(request.GET.get('page', 1))
+            offset = (page - 1) * limit
+            messages_query = messages_query.order_by('-created_at')
+            total_messages = messages_query.count()
+            messages_list = messages_query[offset:offset + limit]
+            pagination = {
                 'page': page,
                 'limit': limit,
                 'total': total_messages,
                 'has_more': offset + limit < total_messages
             }
+        else:
+            # Pagination par curseur : ?before=<curseur> (plus anciens) ou ?after=<curseur> (plus récents)
+            result = keyset_paginate(
+                messages_query, limit,
+                before=request.GET.get('before'),
+                after=request.GET.get('after')
+            )
+            messages_list = result['items']
+            pagination = {
+                'limit': limit,
+                'has_more': result['has_more'],
+                'before': result['before'],
+                'after': result['after']
+            }
+        
+        serialize = private_message_serializer(conversation)
+        messages_data = [
+            serialize(message, request.user)
+            for message in reversed(messages_list)  # Ordre chronologique
+        ]
+        
+        return JsonResponse({
+            'success': True,
+            'messages': messages_data,
+            'pagination': pagination
         })
         
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Curseur invalide'}, status=400)
     except Exception as e:
         logger.error(f"Erreur récupération messages: {e}")
         return JsonResponse({'success': False, 'error': 'Erreur serveur'})
@@ -518,26 +797,9 @@ def group_list(request):
     if not request.user.is_authenticated:
         return redirect('login')
     
-    # Récupérer les groupes dont l'utilisateur est membre
-    user_groups = Group.objects.filter(
-        memberships__user=request.user,
-        memberships__is_active=True,
-        is_active=True
-    ).select_related('created_by').prefetch_related('memberships').order_by('-last_message_at')
-    
-    # Ajouter des informations supplémentaires pour chaque groupe
-    groups_data = []
-    for group in user_groups:
-        membership = group.memberships.filter(user=request.user, is_active=True).first()
-        groups_data.append({
-            'group': group,
-            'is_admin': membership.is_admin if membership else False,
-            'member_count': group.memberships.filter(is_active=True).count(),
-            'unread_count': 0  # TODO: Implémenter le comptage des messages non lus
-        })
-    
+    # Groupes de l'utilisateur depuis la boîte de réception matérialisée (inbox_utils)
     context = {
-        'groups_data': groups_data,
+        'groups': get_inbox(request.user, 'group'),
     }
     
     return render(request, 'chat/group_list.html', context)
@@ -571,6 +833,7 @@ def create_group(request):
                 is_admin=True,
                 added_by=request.user
             )
+            ensure_group_entries(group)
             
             messages.success(request, f"Groupe '{name}' créé avec succès.")
             return redirect('group_chat', group_id=group.id)
@@ -603,6 +866,8 @@ def group_chat(request, group_id):
         messages_list = group.group_messages.select_related('sender').order_by('-created_at')[:50]
         messages_list = list(reversed(messages_list))  # Ordre chronologique
         
+        mark_read(request.user, group=group)
+        
         # Récupérer les membres du groupe
         members = GroupMembership.objects.filter(
             group=group,
@@ -615,6 +880,8 @@ def group_chat(request, group_id):
             'messages': messages_list,
             'members': members,
             'member_count': members.count(),
+            'stream_cursor': encode_cursor(messages_list[-1]) if messages_list else '',
+            **chat_refresh_context(messages_list),
         }
         
         return render(request, 'chat/group_chat.html', context)
@@ -659,6 +926,9 @@ def send_group_message(request, group_id):
         # Mettre à jour le timestamp du groupe
         group.last_message_at = timezone.now()
         group.save()
+        record_message(message, group=group)
+        publish(group_channel(group.id), message)
+        notify_group_message(group, request.user)
         
         return JsonResponse({
             'success': True,
@@ -675,6 +945,22 @@ def send_group_message(request, group_id):
         logger.error(f"Erreur envoi message groupe: {e}")
         return JsonResponse({'success': False, 'error': 'Erreur serveur'})
 
+def stream_group_messages(request, group_id):
+    """Flux SSE des nouveaux messages d'un groupe"""
+    if not request.user.is_authenticated:
+        return JsonResponse({'success': False, 'error': 'Non authentifié'}, status=401)
+    
+    group = get_object_or_404(Group, id=group_id, is_active=True)
+    if not GroupMembership.objects.filter(user=request.user, group=group, is_active=True).exists():
+        return JsonResponse({'success': False, 'error': 'Accès non autorisé'}, status=403)
+    
+    return message_stream_response(
+        request,
+        group_channel(group.id),
+        group.group_messages.select_related('sender'),
+        group_message_data
+    )
+
 def get_group_messages(request, group_id):
     if not request.user.is_authenticated:
         return JsonResponse({'success': False, 'error': 'Non authentifié'})
@@ -692,39 +978,56 @@ def get_group_messages(request, group_id):
         if not membership:
             return JsonResponse({'success': False, 'error': 'Accès non autorisé'})
         
-        # Paramètres de pagination
-        page = int(request.GET.get('page', 1))
         limit = min(int(request.GET.get('limit', 20)), 50)  # Max 50 messages
-        offset = (page - 1) * limit
-        
-        # Récupérer les messages
-        messages_query = group.group_messages.select_related('sender').order_by('-created_at')
-        total_messages = messages_query.count()
-        messages_list = messages_query[offset:offset + limit]
+        messages_query = group.group_messages.select_related('sender')
         
-        messages_data = []
-        for message in reversed(messages_list):  # Ordre chronologique
-            messages_data.append({
-                'id': str(message.id),
-                'content': message.content,
-                'sender': message.sender.username,
-                'sender_id': message.sender.id,
-                'created_at': message.created_at.isoformat(),
-                'is_own': message.sender == request.user,
-                'is_edited': message.is_edited
-            })
+        if 'since' in request.GET:
+            # Mode incrémental : seulement les messages plus récents
+            return messages_since_response(
+                request, group_channel(group.id), messages_query, group_message_data, limit
+            )
         
-        return JsonResponse({
-            'success': True,
-            'messages': messages_data,
-            'pagination': {
+        if 'page' in request.GET:
+            # Mode compatibilité : pagination par numéro de page (COUNT + OFFSET)
+            page = int(request.GET.get('page', 1))
+            offset = (page - 1) * limit
+            messages_query = messages_query.order_by('-created_at')
+            total_messages = messages_query.count()
+            messages_list = messages_query[offset:offset + limit]
+            pagination = {
                 'page': page,
                 'limit': limit,
                 'total': total_messages,
                 'has_more': offset + limit < total_messages
             }
+        else:
+            # Pagination par curseur : ?before=<curseur> (plus anciens) ou ?after=<curseur> (plus récents)
+            result = keyset_paginate(
+                messages_query, limit,
+                before=request.GET.get('before'),
+                after=request.GET.get('after')
+            )
+            messages_list = result['items']
+            pagination = {
+                'limit': limit,
+                'has_more': result['has_more'],
+                'before': result['before'],
+                'after': result['after']
+            }
+        
+        messages_data = [
+            group_message_data(message, request.user)
+            for message in reversed(messages_list)  # Ordre chronologique
+        ]
+        
+        return JsonResponse({
+            'success': True,
+            'messages': messages_data,
+            'pagination': pagination
         })
         
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Curseur invalide'}, status=400)
     except Exception as e:
         logger.error(f"Erreur récupération messages groupe: {e}")
         return JsonResponse({'success': False, 'error': 'Erreur serveur'})
@@ -798,17 +1101,8 @@ def friend_requests(request):
         status='pending'
     ).select_related('to_user')
     
-    # Récupérer les amis existants (friendships bidirectionnelles)
-    user_friendships = Friendship.objects.filter(
-        models.Q(user1=request.user) | models.Q(user2=request.user)
-    )
-    
-    friends = []
-    for friendship in user_friendships:
-        if friendship.user1 == request.user:
-            friends.append(friendship.user2)
-        else:
-            friends.append(friendship.user1)
+    # Récupérer les amis existants (IDs du graphe social en cache, une requête)
+    friends = User.objects.filter(id__in=get_friend_ids(request.user.id)).order_by('username')
     
     context = {
         'friends': friends,
@@ -857,6 +1151,7 @@ def send_friend_request(request, user_id):
             to_user=to_user,
             status='pending'
         )
+        invalidate_social_graph(request.user.id, to_user.id)
         
         messages.success(request, f"Demande d'ami envoyée à {to_user.username}.")
         
@@ -886,6 +1181,7 @@ def accept_friend_request(request, request_id):
             user1=friend_request.from_user,
             user2=friend_request.to_user
         )
+        invalidate_social_graph(friend_request.from_user_id, friend_request.to_user_id)
         
         messages.success(request, f"Vous êtes maintenant ami avec {friend_request.from_user.username}.")
         
@@ -909,6 +1205,7 @@ def decline_friend_request(request, request_id):
         friend_request.status = 'declined'
         friend_request.responded_at = timezone.now()
         friend_request.save()
+        invalidate_social_graph(friend_request.from_user_id, friend_request.to_user_id)
         
         messages.info(request, f"Demande d'ami de {friend_request.from_user.username} refusée.")
         
@@ -932,6 +1229,7 @@ def cancel_friend_request(request, request_id):
         friend_request.status = 'cancelled'
         friend_request.responded_at = timezone.now()
         friend_request.save()
+        invalidate_social_graph(friend_request.from_user_id, friend_request.to_user_id)
         
         messages.info(request, f"Demande d'ami à {friend_request.to_user.username} annulée.")
         
@@ -1311,8 +1609,8 @@ def highlights_home(request):
         if request.user.is_authenticated:
             user_stats = {
                 'highlights_count': Highlight.objects.filter(author=request.user, is_active=True).count(),
-                'subscribers_count': request.user.subscribers.count(),
-                'subscriptions_count': request.user.subscriptions.count(),
+                'subscribers_count': len(get_subscriber_ids(request.user.id)),
+                'subscriptions_count': len(get_subscription_ids(request.user.id)),
             }
         
         context = {
@@ -1331,13 +1629,12 @@ def highlights_for_you(request):
         highlights = Highlight.objects.filter(
             is_active=True,
             expires_at__gt=timezone.now()
-        ).select_related('author', 'author__profile').prefetch_related(
-            'appreciations', 'comments', 'views'
-        ).order_by('-created_at')
+        ).select_related('author', 'author__profile').order_by('-created_at')
+        
+        ordering = ('created_at', 'id')
         
         # Si l'utilisateur est connecté, prioriser les highlights des abonnements
         if request.user.is_authenticated:
-            subscribed_users = request.user.subscriptions.values_list('subscribed_to', flat=True)
             highlights = highlights.annotate(
                 is_from_subscription=Exists(
                     UserSubscription.objects.filter(
@@ -1346,22 +1643,30 @@ def highlights_for_you(request):
                     )
                 )
             ).order_by('-is_from_subscription', '-created_at')
+            ordering = ('is_from_subscription', 'created_at', 'id')
         
-        paginator = Paginator(highlights, 20)
-        page_number = request.GET.get('page')
-        highlights = paginator.get_page(page_number)
+        next_cursor = None
+        if 'page' in request.GET:
+            # Mode compatibilité : pagination par numéro de page
+            paginator = Paginator(highlights, 20)
+            highlights = paginator.get_page(request.GET.get('page'))
+        else:
+            result = keyset_paginate(
+                highlights, 20,
+                before=request.GET.get('before'),
+                after=request.GET.get('after'),
+                ordering=ordering
+            )
+            highlights = result['items']
+            next_cursor = result['before'] if result['has_more'] else None
         
         # Ajouter les appréciations utilisateur et compteurs pour chaque highlight
         if request.user.is_authenticated:
-            for highlight in highlights:
-                highlight.user_appreciation = HighlightAppreciation.objects.filter(
-                    highlight=highlight,
-                    user=request.user
-                ).first()
-                highlight.appreciation_counts = highlight.get_appreciation_counts_by_level()
+            attach_user_appreciations(highlights, request.user)
         
         context = {
             'highlights': highlights,
+            'next_cursor': next_cursor,
             'page_title': 'Highlights',
         }
         return render(request, 'highlights/feed.html', context)
@@ -1374,27 +1679,18 @@ def highlights_for_you(request):
 def highlights_friends(request):
     """Highlights des amis/abonnements uniquement"""
     try:
-        subscribed_users = request.user.subscriptions.values_list('subscribed_to', flat=True)
-        
         highlights = Highlight.objects.filter(
-            author__in=subscribed_users,
+            author__in=get_subscription_ids(request.user.id),
             is_active=True,
             expires_at__gt=timezone.now()
-        ).select_related('author', 'author__profile').prefetch_related(
-            'appreciations', 'comments', 'views'
-        ).order_by('-created_at')
+        ).select_related('author', 'author__profile').order_by('-created_at')
         
         paginator = Paginator(highlights, 20)
         page_number = request.GET.get('page')
         highlights = paginator.get_page(page_number)
         
         # Ajouter les appréciations utilisateur et compteurs pour chaque highlight
-        for highlight in highlights:
-            highlight.user_appreciation = HighlightAppreciation.objects.filter(
-                highlight=highlight,
-                user=request.user
-            ).first()
-            highlight.appreciation_counts = highlight.get_appreciation_counts_by_level()
+        attach_user_appreciations(highlights, request.user)
         
         context = {
             'highlights': highlights,
@@ -1410,43 +1706,32 @@ def highlights_search(request):
     """Recherche de Highlights par hashtags ou utilisateurs"""
     try:
         query = request.GET.get('q', '').strip()
+        cursor = request.GET.get('cursor') or None
         highlights = Highlight.objects.filter(
             is_active=True,
             expires_at__gt=timezone.now()
         ).select_related('author', 'author__profile')
         
-        if query:
-            if query.startswith('#'):
-                # Recherche par hashtag
-                hashtag = query[1:].lower()
-                highlights = highlights.filter(hashtags__icontains=hashtag)
-            else:
-                # Recherche par utilisateur ou caption
-                highlights = highlights.filter(
-                    Q(author__username__icontains=query) |
-                    Q(caption__icontains=query)
-                )
-        
-        paginator = Paginator(highlights, 20)
-        page_number = request.GET.get('page')
-        highlights = paginator.get_page(page_number)
-        
-        # Hashtags populaires
-        popular_hashtags = []
         try:
-            all_hashtags = []
-            for h in Highlight.objects.filter(is_active=True, expires_at__gt=timezone.now()).values_list('hashtags', flat=True):
-                if h:
-                    all_hashtags.extend(h)
-            
-            from collections import Counter
-            hashtag_counts = Counter(all_hashtags)
-            popular_hashtags = [tag for tag, count in hashtag_counts.most_common(10)]
-        except Exception:
-            pass
+            if query and not query.startswith('#'):
+                # Recherche plein texte par pertinence (légende, hashtags, auteur) : search_utils
+                highlights, next_cursor = search_highlights(query, 20, cursor)
+            else:
+                if query:
+                    # Recherche par hashtag (correspondance exacte via l'index HighlightHashtag)
+                    highlights = highlights.filter(hashtag_links__hashtag__name=query[1:].lower())
+                result = keyset_paginate(highlights, 20, before=cursor)
+                highlights = result['items']
+                next_cursor = result['before'] if result['has_more'] else None
+        except InvalidCursor:
+            return redirect(f"{reverse('highlights_search')}?{urlencode({'q': query})}")
+        
+        # Hashtags populaires (fenêtre glissante maintenue en cache)
+        popular_hashtags = [item['tag'] for item in get_trending_hashtags(10)]
         
         context = {
             'highlights': highlights,
+            'next_cursor': next_cursor,
             'query': query,
             'popular_hashtags': popular_hashtags,
             'page_title': 'Recherche',
@@ -1461,7 +1746,7 @@ def highlights_hashtag(request, hashtag):
     """Highlights pour un hashtag spécifique"""
     try:
         highlights = Highlight.objects.filter(
-            hashtags__icontains=hashtag.lower(),
+            hashtag_links__hashtag__name=hashtag.lower(),
             is_active=True,
             expires_at__gt=timezone.now()
         ).select_related('author', 'author__profile').order_by('-created_at')
@@ -1503,6 +1788,11 @@ def create_highlight(request):
                 caption=caption,
                 hashtags=hashtags
             )
+            highlight.sync_hashtag_index()
+            index_highlight(highlight)
+            invalidate_active_pool()
+            record_highlight_created(highlight)
+            notify_new_highlight(highlight)
             
             messages.success(request, 'Highlight créé avec succès!')
             return redirect('highlight_detail', highlight_id=highlight.id)
@@ -1527,13 +1817,9 @@ def highlight_detail(request, highlight_id):
             messages.warning(request, "Ce Highlight a expiré")
             return redirect('highlights_home')
         
-        # Enregistrer la vue
+        # Enregistrer la vue (écrite en lot avec les autres)
         if request.user.is_authenticated:
-            HighlightView.objects.get_or_create(
-                highlight=highlight,
-                user=request.user,
-                defaults={'ip_address': request.META.get('REMOTE_ADDR')}
-            )
+            record_view(highlight.id, user_id=request.user.id, ip_address=request.META.get('REMOTE_ADDR'))
         
         # Récupérer les commentaires
         comments = highlight.comments.select_related('user', 'user__profile').order_by('-created_at')
@@ -1576,7 +1862,11 @@ def delete_highlight(request, highlight_id):
         highlight = get_object_or_404(Highlight, id=highlight_id, author=request.user)
         
         if request.method == 'POST':
-            highlight.delete()
+            with transaction.atomic():
+                Profile.discount_highlights(Highlight.objects.filter(pk=highlight.pk))
+                highlight.delete()
+            invalidate_active_pool()
+            record_highlight_removed(highlight)
             messages.success(request, 'Highlight supprimé avec succès')
             return redirect('highlights_home')
         
@@ -1597,57 +1887,28 @@ def toggle_highlight_appreciation(request, highlight_id):
         if appreciation_level not in [1, 2, 3, 4, 5, 6]:
             return JsonResponse({'error': 'Niveau d\'appréciation invalide'}, status=400)
         
-        # Vérifier si l'utilisateur a déjà apprécié
-        existing_appreciation = HighlightAppreciation.objects.filter(
-            highlight=highlight,
-            user=request.user
-        ).first()
+        # Appréciation, score et histogramme de l'auteur, compteurs du Highlight : une transaction
+        old_level = HighlightAppreciation.record(highlight, request.user, appreciation_level)
         
-        if existing_appreciation:
-            # Mettre à jour l'appréciation existante
-            old_level = existing_appreciation.appreciation_level
-            existing_appreciation.appreciation_level = appreciation_level
-            existing_appreciation.save()
-            
-            # Mettre à jour le score de l'auteur
-            author_profile = highlight.author.profile
-            # Annuler l'ancien impact
-            old_impact = {
-                1: -10, 2: -4, 3: 2, 4: 4, 5: 6, 6: 10
-            }.get(old_level, 0)
-            # Ajouter le nouvel impact
-            new_impact = {
-                1: -10, 2: -4, 3: 2, 4: 4, 5: 6, 6: 10
-            }.get(appreciation_level, 0)
-            
-            author_profile.score = author_profile.score - old_impact + new_impact
-            author_profile.save()
-            
-        else:
-            # Créer une nouvelle appréciation
-            HighlightAppreciation.objects.create(
-                highlight=highlight,
-                user=request.user,
-                appreciation_level=appreciation_level
-            )
-            
-            # Mettre à jour le score de l'auteur
-            author_profile = highlight.author.profile
-            author_profile.update_score_from_appreciation(appreciation_level)
+        if old_level is None:
+            record_appreciation_affinity(request.user, highlight, appreciation_level)
+            update_engagement(highlight)
+            notify_appreciation(highlight, request.user)
+        elif old_level != appreciation_level:
+            record_appreciation_affinity(request.user, highlight, appreciation_level, old_level)
         
-        # Calculer les statistiques d'appréciation
-        appreciations = highlight.appreciations.all()
-        appreciation_stats = {}
-        for level in range(1, 7):
-            count = appreciations.filter(appreciation_level=level).count()
-            appreciation_stats[f'level_{level}'] = count
+        # Statistiques d'appréciation (compteurs dénormalisés)
+        appreciation_stats = {
+            f'level_{level}': count
+            for level, count in highlight.get_appreciation_counts_by_level().items()
+        }
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
                 'success': True,
                 'appreciation_level': appreciation_level,
                 'appreciation_stats': appreciation_stats,
-                'total_appreciations': appreciations.count()
+                'total_appreciations': highlight.appreciations_count
             })
         
         return redirect('highlight_detail', highlight_id=highlight.id)
@@ -1671,6 +1932,10 @@ def add_highlight_comment(request, highlight_id):
             user=request.user,
             content=content
         )
+        highlight.bump_counters(comments_count=1)
+        record_comment_affinity(request.user, highlight)
+        update_engagement(highlight)
+        notify_comment(highlight, request.user)
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
@@ -1707,6 +1972,7 @@ def share_highlight(request, highlight_id):
             user=request.user,
             shared_to=shared_to
         )
+        highlight.bump_counters(shares_count=1)
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({'success': True, 'message': 'Highlight partagé'})
@@ -1719,27 +1985,19 @@ def share_highlight(request, highlight_id):
 
 @require_POST
 def record_highlight_view(request, highlight_id):
-    """Enregistrer une vue sur un Highlight"""
+    """Enregistrer une vue sur un Highlight (écriture groupée, voir view_buffer_utils)"""
     try:
-        highlight = get_object_or_404(Highlight, id=highlight_id, is_active=True)
-        
-        if request.user.is_authenticated:
-            view, created = HighlightView.objects.get_or_create(
-                highlight=highlight,
-                user=request.user,
-                defaults={'ip_address': request.META.get('REMOTE_ADDR')}
-            )
-        else:
-            # Pour les utilisateurs anonymes, utiliser l'IP
-            ip_address = request.META.get('REMOTE_ADDR')
-            if ip_address:
-                view, created = HighlightView.objects.get_or_create(
-                    highlight=highlight,
-                    ip_address=ip_address,
-                    user=None
-                )
+        counters = get_cached_counters(highlight_id)
+        if counters is None:
+            return JsonResponse({'success': False, 'error': 'Highlight introuvable'}, status=404)
+        
+        record_view(
+            highlight_id,
+            user_id=request.user.id if request.user.is_authenticated else None,
+            ip_address=request.META.get('REMOTE_ADDR')
+        )
         
-        return JsonResponse({'success': True, 'views_count': highlight.views.count()})
+        return JsonResponse({'success': True, 'views_count': counters['views_count']})
     except Exception as e:
         logger.error(f"Erreur record_highlight_view: {e}")
         return JsonResponse({'success': False, 'error': str(e)})
@@ -1766,13 +2024,15 @@ def toggle_subscription(request, user_id):
         else:
             subscribed = True
             action = 'abonné'
+            notify_subscription(target_user, request.user)
+        invalidate_social_graph(request.user.id, target_user.id)
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
                 'success': True,
                 'subscribed': subscribed,
                 'action': action,
-                'subscribers_count': target_user.subscribers.count()
+                'subscribers_count': len(get_subscriber_ids(target_user.id))
             })
         
         messages.success(request, f'Vous êtes maintenant {action} à {target_user.username}')
@@ -1820,39 +2080,56 @@ def my_subscribers(request):
 def highlights_feed_api(request):
     """API pour le feed des Highlights (AJAX) avec analytics"""
     try:
-        page = int(request.GET.get('page', 1))
+        page = max(int(request.GET.get('page', 1)), 1)
         feed_type = request.GET.get('type', 'for_you')
+        per_page = 10
+        cursors = None
         
         highlights = Highlight.objects.filter(
             is_active=True,
             expires_at__gt=timezone.now()
-        ).select_related('author', 'author__profile').prefetch_related(
-            'appreciations', 'comments', 'views'
-        )
+        ).select_related('author', 'author__profile', 'stats')
+        
+        if request.user.is_authenticated:
+            highlights = highlights.annotate(
+                user_appreciation_level=Subquery(
+                    HighlightAppreciation.objects.filter(
+                        highlight=OuterRef('pk'),
+                        user=request.user
+                    ).values('appreciation_level')[:1]
+                )
+            )
         
-        # Smart discovery algorithm
         if feed_type == 'for_you' and request.user.is_authenticated:
-            # Prioritize based on user engagement patterns
-            user_liked_hashtags = get_user_preferred_hashtags(request.user)
-            user_interactions = get_user_interaction_history(request.user)
+            # Classement précalculé (ranking_utils) : la page n'est qu'une recherche par clé primaire
+            page_ids, total_highlights = get_ranked_page_ids(request.user, page, per_page)
+            highlights_by_id = {h.id: h for h in highlights.filter(id__in=page_ids)}
+            highlights_page = [highlights_by_id[i] for i in page_ids if i in highlights_by_id]
+            has_next = page * per_page < total_highlights
+        else:
+            if feed_type == 'friends' and request.user.is_authenticated:
+                highlights = highlights.filter(author__in=get_subscription_ids(request.user.id))
             
-            # Apply intelligent sorting
-            highlights = apply_discovery_algorithm(highlights, request.user, user_liked_hashtags, user_interactions)
-        elif feed_type == 'friends' and request.user.is_authenticated:
-            subscribed_users = request.user.subscriptions.values_list('subscribed_to', flat=True)
-            highlights = highlights.filter(author__in=subscribed_users)
-        
-        highlights = highlights.order_by('-created_at')
-        
-        paginator = Paginator(highlights, 10)
-        highlights_page = paginator.get_page(page)
+            if 'page' in request.GET:
+                # Mode compatibilité : pagination par numéro de page (COUNT + OFFSET)
+                paginator = Paginator(highlights.order_by('-created_at'), per_page)
+                highlights_page = paginator.get_page(page)
+                total_highlights = paginator.count
+                has_next = highlights_page.has_next()
+            else:
+                # Pagination par curseur, sans total
+                result = keyset_paginate(
+                    highlights, per_page,
+                    before=request.GET.get('before'),
+                    after=request.GET.get('after')
+                )
+                highlights_page = result['items']
+                total_highlights = None
+                has_next = result['has_more']
+                cursors = {'before': result['before'], 'after': result['after']}
         
         highlights_data = []
         for highlight in highlights_page:
-            user_appreciated = None
-            if request.user.is_authenticated:
-                user_appreciated = highlight.appreciations.filter(user=request.user).first()
-            
             # Enhanced analytics data
             engagement_rate = calculate_engagement_rate(highlight)
             view_duration_avg = get_average_view_duration(highlight)
@@ -1868,8 +2145,10 @@ def highlights_feed_api(request):
                 },
                 'appreciations_count': highlight.appreciations_count,
                 'comments_count': highlight.comments_count,
-                'views_count': highlight.views.count(),
-                'user_appreciated': user_appreciated.appreciation_level if user_appreciated else None,
+                'views_count': highlight.views_count,
+                'shares_count': highlight.shares_count,
+                'appreciation_counts': highlight.get_appreciation_counts_by_level(),
+                'user_appreciated': getattr(highlight, 'user_appreciation_level', None),
                 'created_at': highlight.created_at.strftime('%H:%M'),
                 'time_remaining': str(highlight.time_remaining) if highlight.time_remaining else None,
                 'engagement_rate': engagement_rate,
@@ -1880,14 +2159,17 @@ def highlights_feed_api(request):
         return JsonResponse({
             'success': True,
             'highlights': highlights_data,
-            'has_next': highlights_page.has_next(),
-            'next_page': highlights_page.next_page_number() if highlights_page.has_next() else None,
+            'has_next': has_next,
+            'next_page': page + 1 if has_next and cursors is None else None,
+            'cursors': cursors,
             'analytics': {
-                'total_highlights': highlights.count(),
+                'total_highlights': total_highlights,
                 'avg_engagement': calculate_average_engagement(highlights_page),
                 'trending_hashtags': get_trending_hashtags()
             }
         })
+    except InvalidCursor:
+        return JsonResponse({'success': False, 'error': 'Curseur invalide'}, status=400)
     except Exception as e:
         logger.error(f"Erreur highlights_feed_api: {e}")
         return JsonResponse({'success': False, 'error': str(e)})
@@ -1920,114 +2202,43 @@ def highlight_comments_api(request, highlight_id):
 
 # ===== ANALYTICS AND PERFORMANCE HELPERS =====
 
-def get_user_preferred_hashtags(user, limit=10):
-    """Get user's preferred hashtags based on interaction history"""
-    try:
-        # Get hashtags from highlights the user liked
-        liked_highlights = Highlight.objects.filter(
-            appreciations__user=user,
-            is_active=True
-        ).values_list('hashtags', flat=True)
-        
-        all_hashtags = []
-        for hashtag_list in liked_highlights:
-            if hashtag_list:
-                all_hashtags.extend(hashtag_list)
-        
-        from collections import Counter
-        hashtag_counts = Counter(all_hashtags)
-        return [tag for tag, count in hashtag_counts.most_common(limit)]
-    except Exception as e:
-        logger.error(f"Error getting user preferred hashtags: {e}")
-        return []
-
-def get_user_interaction_history(user):
-    """Get user's interaction patterns for recommendation algorithm"""
-    try:
-        from django.db.models import Count
-        
-        # Get users the current user interacts with most
-        interacted_users = User.objects.filter(
-            Q(highlights__appreciations__user=user) |
-            Q(highlights__comments__user=user)
-        ).annotate(
-            interaction_count=Count('highlights__appreciations') + Count('highlights__comments')
-        ).order_by('-interaction_count')[:20]
-        
-        return list(interacted_users.values_list('id', flat=True))
-    except Exception as e:
-        logger.error(f"Error getting user interaction history: {e}")
-        return []
-
-def apply_discovery_algorithm(highlights_queryset, user, preferred_hashtags, interaction_users):
-    """Apply smart discovery algorithm to sort highlights"""
-    try:
-        from django.db.models import Case, When, IntegerField, F
-        
-        # Create scoring conditions
-        hashtag_score = Case(
-            *[When(hashtags__icontains=tag, then=5) for tag in preferred_hashtags[:5]],
-            default=0,
-            output_field=IntegerField()
-        )
-        
-        interaction_score = Case(
-            When(author__id__in=interaction_users[:10], then=3),
-            default=0,
-            output_field=IntegerField()
+def attach_user_appreciations(highlights, user):
+    """Attache user_appreciation et appreciation_counts à chaque highlight d'une page"""
+    appreciations = {
+        a.highlight_id: a
+        for a in HighlightAppreciation.objects.filter(
+            user=user,
+            highlight__in=[h.id for h in highlights]
         )
-        
-        # Apply scoring and sort
-        return highlights_queryset.annotate(
-            discovery_score=hashtag_score + interaction_score
-        ).order_by('-discovery_score', '-created_at')
-        
-    except Exception as e:
-        logger.error(f"Error applying discovery algorithm: {e}")
-        return highlights_queryset.order_by('-created_at')
+    }
+    for highlight in highlights:
+        highlight.user_appreciation = appreciations.get(highlight.id)
+        highlight.appreciation_counts = highlight.get_appreciation_counts_by_level()
 
 def calculate_engagement_rate(highlight):
-    """Calculate engagement rate for a highlight"""
+    """Calculate engagement rate for a highlight (from HighlightStats when available)"""
     try:
-        views_count = highlight.views.count()
-        if views_count == 0:
-            return 0.0
-        
-        engagements = highlight.appreciations_count + highlight.comments_count
-        return round((engagements / views_count) * 100, 2)
+        stats = get_stats(highlight)
+        if stats is not None:
+            return stats.engagement_rate
+        return compute_engagement_rate(
+            highlight.views_count, highlight.appreciations_count, highlight.comments_count
+        )
     except Exception as e:
         logger.error(f"Error calculating engagement rate: {e}")
         return 0.0
 
 def get_average_view_duration(highlight):
-    """Get average view duration for a highlight (placeholder for future implementation)"""
-    # This would require tracking actual view durations
-    # For now, return a simulated value based on engagement
-    try:
-        base_duration = 8.0  # seconds
-        engagement_multiplier = min(calculate_engagement_rate(highlight) / 10, 2.0)
-        return round(base_duration * (1 + engagement_multiplier), 1)
-    except Exception:
-        return 8.0
+    """Get the real average view duration of a highlight (HighlightStats)"""
+    stats = get_stats(highlight)
+    return stats.avg_watch_time if stats is not None else 0.0
 
 def calculate_performance_score(highlight):
-    """Calculate overall performance score for a highlight"""
-    try:
-        engagement_rate = calculate_engagement_rate(highlight)
-        views_count = highlight.views.count()
-        recency_score = max(0, 100 - (timezone.now() - highlight.created_at).days * 10)
-        
-        # Weighted score calculation
-        score = (
-            engagement_rate * 0.4 +  # 40% engagement
-            min(views_count / 10, 50) * 0.3 +  # 30% views (capped at 50)
-            recency_score * 0.3  # 30% recency
-        )
-        
-        return round(score, 1)
-    except Exception as e:
-        logger.error(f"Error calculating performance score: {e}")
-        return 0.0
+    """Get the overall performance score of a highlight (HighlightStats when available)"""
+    stats = get_stats(highlight)
+    if stats is not None:
+        return stats.performance_score
+    return compute_performance_score(calculate_engagement_rate(highlight), highlight.views_count, highlight.created_at)
 
 def calculate_average_engagement(highlights_page):
     """Calculate average engagement for a page of highlights"""
@@ -2041,65 +2252,29 @@ def calculate_average_engagement(highlights_page):
         logger.error(f"Error calculating average engagement: {e}")
         return 0.0
 
-def get_trending_hashtags(limit=10):
-    """Get currently trending hashtags"""
-    try:
-        from collections import Counter
-        
-        # Get hashtags from recent highlights (last 24 hours)
-        recent_highlights = Highlight.objects.filter(
-            is_active=True,
-            created_at__gte=timezone.now() - timezone.timedelta(hours=24)
-        ).values_list('hashtags', flat=True)
-        
-        all_hashtags = []
-        for hashtag_list in recent_highlights:
-            if hashtag_list:
-                all_hashtags.extend(hashtag_list)
-        
-        hashtag_counts = Counter(all_hashtags)
-        return [{'tag': tag, 'count': count} for tag, count in hashtag_counts.most_common(limit)]
-    except Exception as e:
-        logger.error(f"Error getting trending hashtags: {e}")
-        return []
-
 # Enhanced view recording with duration tracking
 @require_POST
 def record_highlight_view_enhanced(request, highlight_id):
-    """Enhanced view recording with duration and analytics"""
+    """Enhanced view recording with duration and analytics (buffered, see view_buffer_utils)"""
     try:
-        highlight = get_object_or_404(Highlight, id=highlight_id, is_active=True)
+        counters = get_cached_counters(highlight_id)
+        if counters is None:
+            return JsonResponse({'success': False, 'error': 'Highlight introuvable'}, status=404)
         view_duration = request.POST.get('duration', 0)  # Duration in seconds
         
-        if request.user.is_authenticated:
-            view, created = HighlightView.objects.get_or_create(
-                highlight=highlight,
-                user=request.user,
-                defaults={
-                    'ip_address': request.META.get('REMOTE_ADDR'),
-                    'view_duration': float(view_duration) if view_duration else 0
-                }
-            )
-            
-            # Update duration if view already exists
-            if not created and view_duration:
-                view.view_duration = max(view.view_duration or 0, float(view_duration))
-                view.save()
-        else:
-            # For anonymous users, use IP
-            ip_address = request.META.get('REMOTE_ADDR')
-            if ip_address:
-                view, created = HighlightView.objects.get_or_create(
-                    highlight=highlight,
-                    ip_address=ip_address,
-                    user=None,
-                    defaults={'view_duration': float(view_duration) if view_duration else 0}
-                )
+        record_view(
+            highlight_id,
+            user_id=request.user.id if request.user.is_authenticated else None,
+            ip_address=request.META.get('REMOTE_ADDR'),
+            duration=float(view_duration) if view_duration else 0.0
+        )
         
         return JsonResponse({
             'success': True,
-            'views_count': highlight.views.count(),
-            'engagement_rate': calculate_engagement_rate(highlight)
+            'views_count': counters['views_count'],
+            'engagement_rate': compute_engagement_rate(
+                counters['views_count'], counters['appreciations_count'], counters['comments_count']
+            )
         })
     except Exception as e:
         logger.error(f"Erreur record_highlight_view_enhanced: {e}")
@@ -89,9 +89,39 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Les transactions prennent le verrou d'écriture dès BEGIN : des écritures
+            # concurrentes attendent leur tour au lieu d'échouer ("database is locked")
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
+# Cache partagé entre tous les processus (obligatoire) : les marqueurs de chat
+# (realtime_utils), les versions des facettes de la boutique et les résumés de
+# profil sont invalidés par le processus qui écrit et relus par tous les autres.
+# Un cache local au processus (LocMemCache, la valeur par défaut de Django)
+# laisserait les autres workers servir des données périmées. En production,
+# préférer Redis ou Memcached (django.core.cache.backends.redis.RedisCache).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+
+# Chat en temps réel (realtime_utils). Un flux SSE occupe un worker (ou un thread)
+# pendant toute sa durée de vie : avec un serveur WSGI synchrone et peu de workers,
+# quelques onglets ouverts suffisent à bloquer les autres requêtes. N'activer le
+# flux qu'avec un serveur ASGI ou un serveur WSGI dimensionné pour (ex. gunicorn
+# --worker-class gthread --threads N). Désactivé, le chat interroge ?since= toutes
+# les CHAT_POLL_INTERVAL secondes (réponse sans lecture de message s'il n'y a rien).
+CHAT_STREAM_ENABLED = False
+CHAT_STREAM_LIFETIME = 30  # secondes avant reconnexion du navigateur
+CHAT_STREAM_POLL_SECONDS = 1.0  # relecture du marqueur en cache par un flux ouvert
+CHAT_POLL_INTERVAL = 3  # secondes entre deux ?since= quand le flux est désactivé
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
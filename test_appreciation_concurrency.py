@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Test de concurrence : appréciations simultanées sur les Highlights d'un même auteur
+"""
+
+import os
+import random
+import threading
+import django
+
+# Configuration Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'socialgame.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from blizzgame.models import APPRECIATION_SCORE_IMPACTS, Highlight, HighlightAppreciation, Profile
+
+THREADS = 16
+APPRECIATIONS_PER_THREAD = 10
+
+def test_appreciation_concurrency():
+    """Les compteurs restent exacts quand de nombreux threads apprécient en parallèle"""
+    print("🧪 Test de concurrence des appréciations")
+    print("=" * 50)
+
+    author = User.objects.create_user(username='concurrency_author')
+    Profile.objects.create(user=author, id_user=author.id)
+    highlights = [Highlight.objects.create(author=author, caption=f'Concurrence {i}') for i in range(3)]
+    fans = [User.objects.create_user(username=f'concurrency_fan_{i}') for i in range(THREADS)]
+    errors = []
+    barrier = threading.Barrier(THREADS)
+
+    def appreciate(fan, seed):
+        rng = random.Random(seed)
+        try:
+            barrier.wait()
+            for _ in range(APPRECIATIONS_PER_THREAD):
+                # Créations et changements de niveau mêlés, sur les mêmes lignes
+                HighlightAppreciation.record(rng.choice(highlights), fan, rng.randint(1, 6))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    try:
+        threads = [threading.Thread(target=appreciate, args=(fan, i)) for i, fan in enumerate(fans)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors
+
+        appreciations = list(HighlightAppreciation.objects.filter(highlight__author=author).values_list(
+            'highlight_id', 'appreciation_level'
+        ))
+        profile = Profile.objects.get(user=author)
+        print(f"✅ {len(appreciations)} appréciations, score {profile.score}")
+
+        assert profile.appreciation_count == len(appreciations)
+        assert profile.score == sum(APPRECIATION_SCORE_IMPACTS[level] for _, level in appreciations)
+        for level in range(1, 7):
+            expected = sum(1 for _, appreciation_level in appreciations if appreciation_level == level)
+            assert profile.appreciation_level_counts[level] == expected
+        for highlight in Highlight.objects.filter(author=author):
+            levels = [level for highlight_id, level in appreciations if highlight_id == highlight.id]
+            assert highlight.appreciations_count == len(levels)
+            assert highlight.get_appreciation_counts_by_level() == {
+                level: levels.count(level) for level in range(1, 7)
+            }
+        print("✅ Score, compteur et histogramme exacts")
+    finally:
+        # Nettoyer (Highlights, appréciations et profil supprimés en cascade)
+        User.objects.filter(username__startswith='concurrency_').delete()
+
+if __name__ == '__main__':
+    test_appreciation_concurrency()
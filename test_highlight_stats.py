@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Test des statistiques incrémentales : Highlight avec des vues antérieures et sans ligne HighlightStats
+"""
+
+import os
+import django
+
+# Configuration Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'socialgame.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from blizzgame.models import Highlight, HighlightStats, HighlightView
+from blizzgame.view_buffer_utils import flush_views, record_view
+
+def test_stats_seeded_from_existing_views():
+    """La première vue tamponnée initialise les statistiques depuis toutes les vues, pas depuis zéro"""
+    print("🧪 Test d'initialisation des statistiques")
+    print("=" * 50)
+
+    author = User.objects.create_user(username='stats_author')
+    viewers = [User.objects.create_user(username=f'stats_viewer_{i}') for i in range(3)]
+    highlight = Highlight.objects.create(author=author, caption='Statistiques')
+
+    try:
+        # Vues antérieures à HighlightStats (aucune ligne de statistiques)
+        for i, viewer in enumerate(viewers):
+            HighlightView.objects.create(highlight=highlight, user=viewer, view_duration=10.0 * (i + 1))
+        HighlightView.objects.create(highlight=highlight, ip_address='10.9.9.9', view_duration=5.0)
+        Highlight.objects.filter(pk=highlight.pk).update(views_count=4)
+        assert not HighlightStats.objects.filter(highlight=highlight).exists()
+
+        flush_views()
+        record_view(highlight.id, user_id=author.id, ip_address='10.9.9.8', duration=15.0)
+        assert flush_views() == 1
+
+        stats = HighlightStats.objects.get(highlight=highlight)
+        print(f"✅ {stats.views_count} vues, {stats.unique_viewers} spectateurs, moyenne {stats.avg_watch_time}s")
+        assert stats.views_count == 5
+        assert stats.unique_viewers == 5
+        assert stats.total_watch_time == 80.0
+        assert stats.avg_watch_time == 16.0
+        assert stats.median_watch_time == 15.0
+
+        # Lot suivant : la ligne existe, incrément seulement
+        record_view(highlight.id, ip_address='10.9.9.7', duration=4.0)
+        assert flush_views() == 1
+        stats.refresh_from_db()
+        assert (stats.views_count, stats.total_watch_time, stats.avg_watch_time) == (6, 84.0, 14.0)
+        print("✅ Statistiques initialisées puis incrémentées")
+    finally:
+        # Nettoyer (Highlight, vues et statistiques supprimés en cascade)
+        User.objects.filter(username__startswith='stats_').delete()
+
+if __name__ == '__main__':
+    test_stats_seeded_from_existing_views()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Test de concurrence : mises à jour simultanées des hashtags tendance
+"""
+
+import os
+import threading
+import django
+
+# Configuration Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'socialgame.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.utils import timezone
+from blizzgame.models import Highlight
+from blizzgame.trending_utils import TRENDING_CACHE_KEY, _current_bucket, get_trending_hashtags, record_highlight_created
+
+THREADS = 8
+UPDATES_PER_THREAD = 20
+TAG = 'concurrencytrend'
+
+def _tag_count():
+    state = cache.get(TRENDING_CACHE_KEY)
+    return sum(counts.get(TAG, 0) for counts in state['buckets'].values())
+
+def test_trending_concurrency():
+    """Aucune occurrence n'est perdue quand plusieurs threads comptent des hashtags en même temps"""
+    print("🧪 Test de concurrence des tendances")
+    print("=" * 50)
+
+    cache.delete(TRENDING_CACHE_KEY)
+    get_trending_hashtags()  # état reconstruit depuis la base, mis en cache
+    before = _tag_count()
+    errors = []
+    barrier = threading.Barrier(THREADS)
+
+    def update(index):
+        try:
+            barrier.wait()
+            for i in range(UPDATES_PER_THREAD):
+                # Chaque thread compte aussi un hashtag à lui : les écritures s'entrelacent sur la même clé
+                record_highlight_created(Highlight(
+                    hashtags=[TAG, f'{TAG}{index}'], created_at=timezone.now(), expires_at=timezone.now()
+                ))
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        threads = [threading.Thread(target=update, args=(i,)) for i in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors
+
+        assert _tag_count() - before == THREADS * UPDATES_PER_THREAD
+        top = {item['tag']: item['count'] for item in get_trending_hashtags(limit=THREADS + 10)}
+        for index in range(THREADS):
+            assert top[f'{TAG}{index}'] == UPDATES_PER_THREAD
+        assert cache.get(TRENDING_CACHE_KEY)['top'][0] == _current_bucket()
+        print(f"✅ {THREADS * UPDATES_PER_THREAD} occurrences comptées, aucune perdue")
+    finally:
+        # Nettoyer : l'état sera reconstruit depuis la base
+        cache.delete(TRENDING_CACHE_KEY)
+
+if __name__ == '__main__':
+    test_trending_concurrency()